@@ -0,0 +1,67 @@
+"""Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare baseline.json current.json --threshold 0.15
+
+Metrics ending in `_ms`, `_us_per_row` or `_bytes_per_row` are better when
+lower; `_per_s` metrics are better when higher. Exits with status 1 if any metric regressed
+by more than the threshold.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+
+def flatten(node, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+def direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if informational"""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith(("_ms", "_us_per_row", "_bytes_per_row")):
+        return -1
+    return 0
+
+
+def compare(baseline: Dict, current: Dict, threshold: float):
+    base = dict(flatten({k: v for k, v in baseline.items() if k != "meta"}))
+    rows = []
+    for metric, value in flatten({k: v for k, v in current.items() if k != "meta"}):
+        sign = direction(metric)
+        if not sign or metric not in base or base[metric] == 0:
+            continue
+        change = (value - base[metric]) / base[metric]
+        regressed = change * sign < -threshold
+        rows.append((metric, base[metric], value, change, regressed))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative change counted as a regression (default 0.15)")
+    args = parser.parse_args(argv)
+    with open(args.baseline, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    with open(args.current, encoding="utf-8") as fh:
+        current = json.load(fh)
+
+    print(f"baseline {baseline['meta']['commit']}  ->  current {current['meta']['commit']}")
+    regressions = 0
+    for metric, old, new, change, regressed in compare(baseline, current, args.threshold):
+        flag = "REGRESSION" if regressed else ""
+        regressions += regressed
+        print(f"{metric:<60} {old:>12.3f} {new:>12.3f} {change:>+8.1%} {flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
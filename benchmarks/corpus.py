@@ -0,0 +1,71 @@
+"""Deterministic synthetic corpora of study materials.
+
+Tags follow a Zipf-like distribution over a vocabulary of course/topic tags
+(a few tags such as "exam" are on most rows, most tags are rare). Content is
+drawn from a Zipf-distributed word list with lognormal note lengths, so
+full-text queries hit a realistic mix of common and rare terms.
+"""
+import itertools
+import random
+from typing import Iterator, List, Tuple
+
+SUBJECTS = [
+    "calculus", "linear algebra", "statistics", "physics", "chemistry", "biology",
+    "history", "economics", "machine learning", "databases", "operating systems",
+    "networks", "literature", "philosophy", "psychology", "genetics", "thermodynamics",
+    "compilers", "algorithms", "microeconomics",
+]
+KINDS = ["lecture", "notes", "summary", "problem set", "lab report", "cheat sheet", "reading"]
+BASE_TAGS = [
+    "exam", "midterm", "final", "week1", "week2", "week3", "week4", "week5", "week6",
+    "important", "review", "todo", "html", "ml", "sql", "proofs", "formulas", "essay",
+]
+BASE_WORDS = (
+    "the of and to in is that for it as with was on be by this are from or an which "
+    "theorem proof function matrix vector derivative integral limit probability "
+    "distribution variance mean energy force momentum reaction enzyme protein cell "
+    "market demand supply equilibrium algorithm complexity graph tree queue stack "
+    "kernel process thread memory cache index query transaction network packet "
+    "protocol gradient descent regression classification entropy eigenvalue basis "
+    "orthogonal convergence series sequence lemma corollary hypothesis experiment"
+).split()
+
+
+def build_vocabulary(rng: random.Random, size: int = 5000) -> List[str]:
+    words = list(BASE_WORDS)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    while len(words) < size:
+        words.append("".join(rng.choice(letters) for _ in range(rng.randint(4, 11))))
+    return words
+
+
+def zipf_cum_weights(n: int, s: float = 1.1) -> List[float]:
+    """Cumulative Zipf weights, precomputed so random.choices stays cheap"""
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def generate(count: int, seed: int = 42, mean_words: int = 120) -> Iterator[Tuple[str, str, str, str, str, str]]:
+    """Yield (title, content, tags, file_path, date_added, last_modified) rows.
+
+    Dates are Unix timestamps, as DatabaseManager stores them.
+    """
+    rng = random.Random(seed)
+    vocabulary = build_vocabulary(rng)
+    word_weights = zipf_cum_weights(len(vocabulary))
+    tag_vocabulary = BASE_TAGS + [s.replace(" ", "-") for s in SUBJECTS] + [
+        f"course{n:03d}" for n in range(200)
+    ]
+    tag_weights = zipf_cum_weights(len(tag_vocabulary), 0.9)
+    start = 1577836800  # 2020-01-01 00:00 UTC
+    span_minutes = 5 * 365 * 24 * 60
+
+    for n in range(count):
+        subject = rng.choice(SUBJECTS)
+        title = f"{subject.title()} {rng.choice(KINDS)} {n % 40 + 1}"
+        tags = ",".join(dict.fromkeys(rng.choices(tag_vocabulary, cum_weights=tag_weights, k=rng.randint(0, 5))))
+        length = max(0, int(rng.lognormvariate(0, 0.8) * mean_words))
+        content = " ".join(rng.choices(vocabulary, cum_weights=word_weights, k=length))
+        added = start + 60 * rng.randrange(span_minutes)
+        modified = added + 60 * rng.randrange(60 * 24 * 90)
+        file_path = f"/home/student/files/{subject.replace(' ', '_')}/{n}.pdf" if rng.random() < 0.3 else ""
+        yield title, content, tags, file_path, added, modified
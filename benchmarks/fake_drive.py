@@ -0,0 +1,222 @@
+"""In-process stand-in for the parts of the Drive v3 HTTP API the app uses.
+
+Supports resumable uploads (POST + chunked PUTs with 308 responses), file
+metadata (GET /drive/v3/files/<id>), trashing (PATCH) and media downloads with
+Range requests (GET ...?alt=media). Files are kept in memory. Only meant for benchmarks and
+local experiments; there is no authentication.
+
+`latency` (seconds added to every response) and `stream_bytes_per_s` (a
+per-connection cap on response bodies) make localhost behave more like a
+remote server, where a single stream rarely fills the link. `fail_every=N`
+answers every Nth request with a 503 to exercise retries.
+"""
+import hashlib
+import http.server
+import json
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+RANGE_PATTERN = re.compile(r"bytes=(\d*)-(\d*)")
+CONTENT_RANGE_PATTERN = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+PACING_SLICE = 64 * 1024
+
+
+class FakeDriveState:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions: Dict[str, dict] = {}
+        self.files: Dict[str, dict] = {}
+        self.requests = 0
+
+    def add_file(self, name: str, data: bytes, mime_type: str = "application/octet-stream") -> dict:
+        """Store a file directly (e.g. to benchmark downloads) and return its resource"""
+        file_id = uuid.uuid4().hex[:20]
+        resource = {
+            "id": file_id,
+            "name": name,
+            "mimeType": mime_type,
+            "size": str(len(data)),
+            "md5Checksum": hashlib.md5(data).hexdigest(),
+            "modifiedTime": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+        }
+        with self.lock:
+            self.files[file_id] = {"resource": resource, "data": data}
+        return resource
+
+
+class FakeDriveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    server: "FakeDriveServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: bytes = b"", headers: Optional[dict] = None):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body and self.command != "HEAD":
+            self._write_paced(body)
+
+    def _write_paced(self, body: bytes):
+        rate = self.server.stream_bytes_per_s
+        if not rate:
+            return self.wfile.write(body)
+        start = time.perf_counter()
+        view = memoryview(body)
+        for offset in range(0, len(body), PACING_SLICE):
+            self.wfile.write(view[offset:offset + PACING_SLICE])
+            ahead = (offset + PACING_SLICE) / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload).encode("utf-8"),
+                   {"Content-Type": "application/json; charset=UTF-8"})
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def _injected_failure(self) -> bool:
+        fail_every = self.server.fail_every
+        if not fail_every or self.server.state.requests % fail_every:
+            return False
+        self._body()  # drain it so the connection stays usable
+        self._send_json(503, {"error": {"code": 503, "message": "Backend Error"}})
+        return True
+
+    def do_POST(self):
+        state = self.server.state
+        state.requests += 1
+        if self._injected_failure():
+            return
+        parts = urlsplit(self.path)
+        if not parts.path.endswith("/files") or "resumable" not in parts.query:
+            return self._send(404)
+        metadata = json.loads(self._body() or b"{}")
+        session_id = uuid.uuid4().hex
+        with state.lock:
+            state.sessions[session_id] = {
+                "metadata": metadata,
+                "size": int(self.headers.get("X-Upload-Content-Length") or 0),
+                "mime_type": self.headers.get("X-Upload-Content-Type") or "application/octet-stream",
+                "data": bytearray(),
+            }
+        self._send(200, headers={"Location": f"{self.server.base_url}/upload/session/{session_id}"})
+
+    def do_PUT(self):
+        state = self.server.state
+        state.requests += 1
+        if self._injected_failure():
+            return
+        session_id = urlsplit(self.path).path.rsplit("/", 1)[-1]
+        body = self._body()
+        session = state.sessions.get(session_id)
+        if session is None:
+            return self._send(404, b"Session not found")
+        match = CONTENT_RANGE_PATTERN.match(self.headers.get("Content-Range", ""))
+        if match and int(match.group(1)) == len(session["data"]):
+            session["data"] += body
+        if len(session["data"]) >= session["size"]:
+            data = bytes(session["data"])
+            resource = state.add_file(session["metadata"].get("name", "untitled"), data,
+                                      session["mime_type"])
+            with state.lock:
+                state.sessions.pop(session_id, None)
+            return self._send_json(200, resource)
+        headers = {"Range": f"bytes=0-{len(session['data']) - 1}"} if session["data"] else {}
+        self._send(308, headers=headers)
+
+    def do_GET(self):
+        state = self.server.state
+        state.requests += 1
+        if self._injected_failure():
+            return
+        parts = urlsplit(self.path)
+        file_id = parts.path.rsplit("/", 1)[-1]
+        entry = state.files.get(file_id)
+        if entry is None:
+            return self._send_json(404, {"error": {"code": 404, "message": "File not found"}})
+        if parse_qs(parts.query).get("alt") != ["media"]:
+            return self._send_json(200, entry["resource"])
+
+        data = entry["data"]
+        match = RANGE_PATTERN.fullmatch(self.headers.get("Range", ""))
+        if not match:
+            return self._send(200, data, {"Content-Type": entry["resource"]["mimeType"]})
+        start, end = match.groups()
+        if start == "":
+            start, end = max(0, len(data) - int(end)), len(data) - 1
+        else:
+            start, end = int(start), min(int(end) if end else len(data) - 1, len(data) - 1)
+        if start >= len(data) or start > end:
+            return self._send(416, headers={"Content-Range": f"bytes */{len(data)}"})
+        self._send(206, data[start:end + 1], {
+            "Content-Type": entry["resource"]["mimeType"],
+            "Content-Range": f"bytes {start}-{end}/{len(data)}",
+        })
+
+    do_HEAD = do_GET
+
+    def do_PATCH(self):
+        state = self.server.state
+        state.requests += 1
+        if self._injected_failure():
+            return
+        file_id = urlsplit(self.path).path.rsplit("/", 1)[-1]
+        changes = json.loads(self._body() or b"{}")
+        with state.lock:
+            entry = state.files.get(file_id)
+            if entry is not None:
+                entry["resource"].update(changes)  # e.g. {"trashed": true}
+        if entry is None:
+            return self._send_json(404, {"error": {"code": 404, "message": "File not found"}})
+        self._send_json(200, entry["resource"])
+
+
+class FakeDriveServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 stream_bytes_per_s: Optional[int] = None, fail_every: int = 0):
+        super().__init__((host, port), FakeDriveHandler)
+        self.state = FakeDriveState()
+        self.latency = latency
+        self.stream_bytes_per_s = stream_bytes_per_s
+        self.fail_every = fail_every
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    @property
+    def upload_url(self) -> str:
+        return f"{self.base_url}/upload/drive/v3/files"
+
+    @property
+    def files_url(self) -> str:
+        return f"{self.base_url}/drive/v3/files"
+
+    def start(self) -> "FakeDriveServer":
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "FakeDriveServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,337 @@
+"""Benchmark the hot paths of Study Material Manager.
+
+    python -m benchmarks.run --sizes 1000 10000 100000 -o results.json
+    python -m benchmarks.compare baseline.json results.json
+
+Every size gets a fresh database filled from the deterministic corpus in
+benchmarks/corpus.py. Results are written as JSON together with the commit,
+Python and SQLite versions so runs can be compared across commits.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict
+
+from study_core import (DatabaseManager, HttpClient, MaterialPager, RangedDownload,
+                        RequestExecutor, ResumableUpload, format_material)
+
+from . import corpus, startup
+from .fake_drive import FakeDriveServer
+from .stats import percentiles, timed
+
+# Query shapes for search latency; the corpus guarantees each kind of hit
+QUERY_SHAPES = {
+    "browse": "",
+    "single_common": "theorem",
+    "single_rare": "corollary",
+    "prefix": "algo",
+    "multi_term": "gradient descent",
+    "tag": "midterm",
+    "title_phrase": "calculus lecture",
+    "no_match": "zzqqxv",
+}
+VISIBLE_ROWS = 40
+RANGED_STREAM_MIB_PER_S = 64  # per-connection cap of the paced server
+MiB = 1024 * 1024
+
+
+def bench_inserts(workdir: str, count: int) -> Dict:
+    """Throughput of single add_material calls, one commit each"""
+    rows = list(corpus.generate(min(count, 2000), seed=7))
+    db = DatabaseManager(os.path.join(workdir, f"insert_single_{count}.db"))
+    start = time.perf_counter()
+    for title, content, tags, file_path, _, _ in rows:
+        db.add_material(title, content, tags, file_path)
+    single = time.perf_counter() - start
+    db.close()
+    return {"single_rows": len(rows), "single_rows_per_s": len(rows) / single}
+
+
+def load_corpus(path: str, count: int, batch: int = 10000) -> Dict:
+    """Fill a database with batched add_materials; only the inserts are timed"""
+    db = DatabaseManager(path)
+    elapsed = 0.0
+    rows = corpus.generate(count)
+    while True:
+        pending = list(itertools.islice(rows, batch))
+        if not pending:
+            break
+        start = time.perf_counter()
+        db.add_materials(pending)
+        elapsed += time.perf_counter() - start
+    db.close()
+    return {"batch_rows": count, "batch_rows_per_s": count / elapsed,
+            "db_bytes": os.path.getsize(path)}
+
+
+def bench_search(db: DatabaseManager, repeat: int) -> Dict:
+    """Latency of what the search bar runs (count + first page) per query shape"""
+    results = {}
+    for shape, query in QUERY_SHAPES.items():
+        def first_page():
+            db.count_materials(query)
+            db.page_materials(query, limit=200)
+        samples = timed(first_page, repeat)
+        results[shape] = percentiles(samples)
+        results[shape]["matches"] = db.count_materials(query)
+    return results
+
+
+def bench_list(db: DatabaseManager, count: int, repeat: int) -> Dict:
+    """Cost of refresh_list: formatting the viewport vs. formatting every row"""
+    def viewport():
+        pager = MaterialPager(db)
+        for index in range(min(VISIBLE_ROWS, len(pager))):
+            pager.display(index)
+
+    def scroll_through():
+        pager = MaterialPager(db)
+        for index in range(len(pager)):
+            pager.display(index)
+
+    result = {"viewport": percentiles(timed(viewport, repeat))}
+    if count <= 100000:
+        result["format_all_rows"] = percentiles(timed(scroll_through, 1 if count > 10000 else 3))
+        result.update(list_memory(db))
+
+    rows, _ = db.page_materials(limit=min(count, 10000))
+    start = time.perf_counter()
+    for row in rows:
+        format_material(row)
+    result["format_material_us_per_row"] = (time.perf_counter() - start) / max(len(rows), 1) * 1e6
+    return result
+
+
+def list_memory(db: DatabaseManager) -> Dict:
+    """Bytes per row a pager holds with every page resident, without and with labels.
+
+    `full_rows_bytes_per_row` is what the list held before it paged: every
+    row of search_materials(), content included, for the same materials.
+    """
+    tracemalloc.start()
+    try:
+        pager = MaterialPager(db, max_pages=sys.maxsize)
+        for index in range(len(pager)):
+            pager[index]
+        rows = tracemalloc.get_traced_memory()[0]
+        for index in range(len(pager)):
+            pager.display(index)
+        labelled = tracemalloc.get_traced_memory()[0]
+        del pager
+        before = tracemalloc.get_traced_memory()[0]
+        full_rows = db.search_materials()
+        full = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    total = max(len(full_rows), 1)
+    return {"resident_bytes_per_row": rows / total,
+            "resident_with_labels_bytes_per_row": labelled / total,
+            "full_rows_bytes_per_row": full / total}
+
+
+def drop_file_cache(path: str):
+    """Evict the database files from the OS page cache where the platform allows it"""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for name in (path, path + "-wal"):
+        if os.path.exists(name):
+            fd = os.open(name, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            finally:
+                os.close(fd)
+
+
+def bench_storage(path: str, count: int, repeat: int) -> Dict:
+    """Content compression, cold-cache listing and view (get_material) latency.
+
+    Cold samples open a fresh DatabaseManager, so SQLite's page cache is
+    empty, after evicting the file from the OS cache (POSIX only). View
+    samples fetch the full row, decompressing its content, as view_material
+    and the edit dialog do.
+    """
+    db = DatabaseManager(path)
+    content_bytes, stored_bytes = db.reader().execute(
+        "SELECT COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM material_content"
+    ).fetchone()
+    ids = [row[0] for row in db.reader().execute("SELECT id FROM materials")]
+    db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    db.close()
+    result = {
+        "db_bytes_per_row": os.path.getsize(path) / max(count, 1),
+        "content_bytes": content_bytes,
+        "content_stored_bytes": stored_bytes,
+        "compression_ratio": content_bytes / stored_bytes if stored_bytes else 1.0,
+    }
+
+    def cold(fn):
+        samples = []
+        for _ in range(max(1, repeat // 3)):
+            drop_file_cache(path)
+            cold_db = DatabaseManager(path)
+            start = time.perf_counter()
+            fn(cold_db)
+            samples.append(time.perf_counter() - start)
+            cold_db.close()
+        return percentiles(samples)
+
+    def first_page(cold_db):
+        cold_db.count_materials()
+        cold_db.page_materials(limit=200)
+
+    def scan_all(cold_db):
+        _, after = cold_db.page_materials(limit=1000)
+        while after is not None:
+            _, after = cold_db.page_materials(after=after, limit=1000)
+
+    result["cold_first_page"] = cold(first_page)
+    if count <= 100000:
+        result["cold_scan_all"] = cold(scan_all)
+
+    rng = random.Random(11)
+    sample = rng.sample(ids, min(len(ids), repeat * 10))
+    db = DatabaseManager(path)
+    picks = iter(sample)
+    result["view_material"] = percentiles(timed(lambda: db.get_material(next(picks)), len(sample)))
+    db.close()
+    picks = iter(sample)
+    result["view_material_cold"] = cold(lambda cold_db: cold_db.get_material(next(picks)))
+    return result
+
+
+def bench_drive(workdir: str, file_mib: int) -> Dict:
+    """Upload and download throughput against the local fake Drive server"""
+    path = os.path.join(workdir, "upload.bin")
+    with open(path, "wb") as fh:
+        for _ in range(file_mib):
+            fh.write(os.urandom(MiB))
+    size = file_mib * MiB
+    results = {"file_bytes": size}
+    with FakeDriveServer() as server:
+        for chunk_mib in (1, 8):
+            http = HttpClient()
+            upload = ResumableUpload(http, lambda: "token", path, {"name": "upload.bin"},
+                                     chunk_size=chunk_mib * MiB, upload_url=server.upload_url)
+            start = time.perf_counter()
+            resource = upload.run()
+            elapsed = time.perf_counter() - start
+            http.close()
+            results[f"upload_chunk_{chunk_mib}mib_mib_per_s"] = size / MiB / elapsed
+
+        http = HttpClient()
+        start = time.perf_counter()
+        status, _, data = http.request("GET", f"{server.files_url}/{resource['id']}?alt=media")
+        elapsed = time.perf_counter() - start
+        http.close()
+        assert status == 200 and len(data) == size
+        results["download_single_stream_mib_per_s"] = size / MiB / elapsed
+
+    # Ranged downloads against a server that paces each stream, like a remote one does
+    destination = os.path.join(workdir, "download.bin")
+    with FakeDriveServer(latency=0.02, stream_bytes_per_s=RANGED_STREAM_MIB_PER_S * MiB) as server:
+        resource = server.state.add_file("download.bin", data)
+        for connections, part_mib in ((1, 8), (4, 8), (8, 4), (8, 8)):
+            download = RangedDownload(lambda: "token", resource["id"], destination,
+                                      size=size, md5=resource["md5Checksum"],
+                                      part_size=part_mib * MiB, connections=connections,
+                                      files_url=server.files_url)
+            start = time.perf_counter()
+            download.run()
+            elapsed = time.perf_counter() - start
+            results[f"download_ranged_{connections}conn_{part_mib}mib_mib_per_s"] = size / MiB / elapsed
+
+    # The same transfers when every 7th request fails with a 503 and is retried
+    with FakeDriveServer(fail_every=7) as server:
+        executor = RequestExecutor(rate=1000, burst=100, base_delay=0.01)
+        http = HttpClient()
+        start = time.perf_counter()
+        resource = ResumableUpload(http, lambda: "token", path, {"name": "upload.bin"},
+                                   chunk_size=MiB, upload_url=server.upload_url,
+                                   executor=executor).run()
+        results["upload_flaky_mib_per_s"] = size / MiB / (time.perf_counter() - start)
+        http.close()
+        start = time.perf_counter()
+        RangedDownload(lambda: "token", resource["id"], destination, size=size,
+                       md5=resource["md5Checksum"], part_size=MiB, connections=4,
+                       files_url=server.files_url, executor=executor).run()
+        results["download_flaky_mib_per_s"] = size / MiB / (time.perf_counter() - start)
+        results["flaky_retries"] = sum(entry["retries"] for entry in executor.stats().values())
+    os.remove(destination)
+    os.remove(path)
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="corpus sizes (1k to 1M materials)")
+    parser.add_argument("--repeat", type=int, default=30, help="samples per latency measurement")
+    parser.add_argument("--drive-mib", type=int, default=32, help="file size for transfer benchmarks")
+    parser.add_argument("--skip-drive", action="store_true")
+    parser.add_argument("--skip-startup", action="store_true")
+    parser.add_argument("-o", "--output", help="write results JSON here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="smm-bench-") as workdir:
+        for count in args.sizes:
+            print(f"[{count} materials] loading corpus...", file=sys.stderr)
+            path = os.path.join(workdir, f"corpus_{count}.db")
+            result = {"insert": load_corpus(path, count)}
+            result["insert"].update(bench_inserts(workdir, count))
+            db = DatabaseManager(path)
+            print(f"[{count} materials] search...", file=sys.stderr)
+            result["search"] = bench_search(db, args.repeat)
+            print(f"[{count} materials] list rendering...", file=sys.stderr)
+            result["list"] = bench_list(db, count, args.repeat)
+            db.close()
+            print(f"[{count} materials] storage and view...", file=sys.stderr)
+            result["storage"] = bench_storage(path, count, args.repeat)
+            report["sizes"][str(count)] = result
+        if not args.skip_drive:
+            print("[drive] transfers...", file=sys.stderr)
+            report["drive"] = bench_drive(workdir, args.drive_mib)
+        if not args.skip_startup:
+            print("[startup] imports and first paint...", file=sys.stderr)
+            report["startup"] = startup.bench_startup(workdir, min(5, args.repeat))
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Startup cost: module import times and the GUI's time to first paint.
+
+    python -m benchmarks.startup --materials 10000
+
+Each measurement runs in a fresh interpreter so nothing is already imported.
+The GUI is started with SMM_STARTUP_TRACE=exit, which makes it report its
+startup milestones on stderr and quit once the first page is on screen; that
+part needs a display and the GUI dependencies and is skipped otherwise.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from study_core import DatabaseManager
+
+from . import corpus
+from .stats import percentiles
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GUI_SCRIPT = os.path.join(REPO_ROOT, "StudyMaterialManager.py")
+IMPORTS = ["study_core", "study_core.drive_service", "customtkinter", "tkinterdnd2"]
+# Must not be loaded until the user connects to Drive
+GOOGLE_MODULES = ["googleapiclient", "google_auth_oauthlib", "google.auth", "google.oauth2"]
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+LOADED_PROBE = """
+import json, sys
+import study_core
+print(json.dumps([m for m in {modules!r} if m in sys.modules]))
+"""
+
+
+def python(code: str, cwd: str = REPO_ROOT) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", code], cwd=cwd, capture_output=True, text=True)
+
+
+def bench_import(module: str, repeat: int) -> Dict:
+    samples = []
+    for _ in range(repeat):
+        result = python(IMPORT_PROBE.format(module=module))
+        if result.returncode != 0:
+            return {"skipped": result.stderr.strip().splitlines()[-1]}
+        samples.append(float(result.stdout))
+    return percentiles(samples)
+
+
+def google_modules_loaded() -> List[str]:
+    """Google modules that `import study_core` drags in (should be none)"""
+    return json.loads(python(LOADED_PROBE.format(modules=GOOGLE_MODULES)).stdout)
+
+
+def run_gui(workdir: str) -> Optional[Dict[str, float]]:
+    """Start the GUI once and return its startup milestones in ms"""
+    env = dict(os.environ, SMM_STARTUP_TRACE="exit", PYTHONPATH=REPO_ROOT,
+               SMM_LAUNCHED_AT=repr(time.time()))
+    try:
+        result = subprocess.run([sys.executable, GUI_SCRIPT], cwd=workdir, env=env,
+                                capture_output=True, text=True, timeout=120)
+    except subprocess.TimeoutExpired:
+        return None
+    milestones = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("{"):
+            event = json.loads(line)
+            milestones[event["milestone"]] = event["ms"] / 1000
+    return milestones if "first_page" in milestones else None
+
+
+def bench_first_paint(workdir: str, materials: int, repeat: int) -> Dict:
+    # The GUI opens study_materials.db in its working directory
+    db = DatabaseManager(os.path.join(workdir, "study_materials.db"))
+    if materials:
+        db.add_materials(corpus.generate(materials))
+    db.close()
+
+    runs = []
+    for _ in range(repeat):
+        milestones = run_gui(workdir)
+        if milestones is None:
+            return {"skipped": "GUI could not start (needs a display and the GUI dependencies)"}
+        runs.append(milestones)
+    return {"materials": materials, **{
+        milestone: percentiles([run[milestone] for run in runs])
+        for milestone in ("imports", "first_paint", "first_page")
+    }}
+
+
+def bench_startup(workdir: str, repeat: int = 5, materials: int = 10000) -> Dict:
+    gui_dir = os.path.join(workdir, "startup")
+    os.makedirs(gui_dir, exist_ok=True)
+    return {
+        "import": {module: bench_import(module, repeat) for module in IMPORTS},
+        "google_modules_loaded_by_study_core": google_modules_loaded(),
+        "gui": bench_first_paint(gui_dir, materials, repeat),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--materials", type=int, default=10000,
+                        help="size of the database the GUI starts with")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="smm-startup-") as workdir:
+        print(json.dumps(bench_startup(workdir, args.repeat, args.materials), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
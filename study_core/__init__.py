@@ -0,0 +1,46 @@
+"""Headless core of Study Material Manager.
+
+Everything here works without a display: the materials store and search,
+attachment caching, Drive uploads/transfers and sync. The GUI in
+study_gui.py (launched by StudyMaterialManager.py) and the command line
+(`python -m study_core`) are both clients of this package.
+
+`drive_service` is not imported here because it needs the Google client
+libraries; import it from `study_core.drive_service` when Drive is used.
+"""
+from .attachment_cache import AttachmentCache, drive_version, file_md5
+from .bulk_import import BulkImporter, derive_material, walk_files
+from .database import (
+    CHANGE_DELETED, CHANGE_INSERTED, CHANGE_UPDATED, DatabaseManager, LIST_COLUMNS,
+    MATERIAL_COLUMNS, SCHEMA_VERSION, parse_tags
+)
+from .download import DownloadError, RangedDownload
+from .drive_metadata import MetadataCache, is_drive_id
+from .drive_sync import SyncEngine
+from .extraction import TextIndexer, extract_text
+from .request_executor import RequestExecutor, RetryableError, TokenBucket
+from .search import (
+    LabelCache, MaterialPager, MaterialRow, ROW_COLUMNS, SearchWorker, format_material,
+    format_timestamp, highlight_segments
+)
+from .transfer_scheduler import (
+    PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, Transfer, TransferCancelled, TransferScheduler
+)
+from .upload_manager import (
+    SYNC_FAILED, SYNC_LOCAL, SYNC_NONE, SYNC_QUEUED, SYNC_SYNCED, SYNC_UPLOADING, HttpClient,
+    HttpPool, ResumableUpload, UploadError, UploadManager, sync_state
+)
+
+__all__ = [
+    "AttachmentCache", "BulkImporter", "CHANGE_DELETED", "CHANGE_INSERTED",
+    "CHANGE_UPDATED", "DatabaseManager", "DownloadError", "HttpClient", "HttpPool",
+    "LIST_COLUMNS", "LabelCache", "MATERIAL_COLUMNS", "MaterialPager", "MaterialRow",
+    "MetadataCache", "PRIORITY_BACKGROUND", "PRIORITY_INTERACTIVE", "ROW_COLUMNS",
+    "RangedDownload", "RequestExecutor", "ResumableUpload", "RetryableError",
+    "SCHEMA_VERSION", "SYNC_FAILED", "SYNC_LOCAL", "SYNC_NONE", "SYNC_QUEUED",
+    "SYNC_SYNCED", "SYNC_UPLOADING", "SearchWorker", "SyncEngine", "TextIndexer",
+    "TokenBucket", "Transfer", "TransferCancelled", "TransferScheduler", "UploadError",
+    "UploadManager", "derive_material", "drive_version", "extract_text", "file_md5",
+    "format_material", "format_timestamp", "highlight_segments", "is_drive_id",
+    "parse_tags", "sync_state", "walk_files",
+]
@@ -0,0 +1,156 @@
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from .database import DatabaseManager
+
+DEFAULT_CACHE_DIR = Path.home() / "StudyMaterialManager_Downloads" / "cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GiB
+
+
+def drive_version(metadata: dict) -> str:
+    """Version key for a Drive file: its content checksum, else its modified time"""
+    if metadata.get("md5Checksum"):
+        return f"md5:{metadata['md5Checksum']}"
+    return f"mtime:{metadata.get('modifiedTime', '')}"
+
+
+class AttachmentCache:
+    """Local cache of downloaded Drive attachments.
+
+    Entries are keyed by (Drive file ID, version), so two attachments with the
+    same file name never collide and a file changed on Drive is fetched again
+    instead of serving the stale copy. The index lives in SQLite alongside the
+    materials; when the cache grows past `max_bytes` the least recently
+    opened entries are evicted. Downloads are written to a temporary file and
+    renamed into place, so a partial download is never opened.
+    """
+
+    def __init__(self, db: DatabaseManager, cache_dir: Path = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.db = db
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.create_tables()
+
+    def create_tables(self):
+        with self.db.transaction() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS attachment_cache (
+                file_id TEXT NOT NULL,
+                version TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (file_id, version)
+            )
+            ''')
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_attachment_cache_last_access "
+                "ON attachment_cache(last_access)"
+            )
+
+    def entry_dir(self, file_id: str, version: str) -> Path:
+        key = hashlib.sha1(f"{file_id}\0{version}".encode("utf-8")).hexdigest()
+        return self.cache_dir / key[:2] / key
+
+    def lookup(self, file_id: str, version: str) -> Optional[Path]:
+        """Return the cached file for this version, or None on a miss"""
+        row = self.db.reader().execute(
+            "SELECT path, size FROM attachment_cache WHERE file_id=? AND version=?",
+            (file_id, version)
+        ).fetchone()
+        if row is None:
+            return None
+        path = Path(row[0])
+        with self.db.transaction() as conn:
+            if not path.is_file() or path.stat().st_size != row[1]:
+                # Deleted or tampered with outside the app
+                self._drop(conn, file_id, version, path)
+                return None
+            conn.execute(
+                "UPDATE attachment_cache SET last_access=? WHERE file_id=? AND version=?",
+                (time.time(), file_id, version)
+            )
+        return path
+
+    def fetch(self, file_id: str, version: str, file_name: str,
+              download: Callable[[str], None],
+              expected_md5: Optional[str] = None) -> Path:
+        """Return the cached file, downloading it with `download(temp_path)` on a miss"""
+        cached = self.lookup(file_id, version)
+        if cached is not None:
+            return cached
+
+        final_path = self.entry_dir(file_id, version) / (os.path.basename(file_name) or file_id)
+        final_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = final_path.with_name(f".{final_path.name}.{threading.get_ident()}.part")
+        try:
+            download(str(temp_path))
+            if expected_md5 and file_md5(temp_path) != expected_md5:
+                raise IOError(f"Checksum mismatch downloading {file_name}")
+            os.replace(temp_path, final_path)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO attachment_cache (file_id, version, path, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (file_id, version, str(final_path), final_path.stat().st_size, time.time())
+            )
+            self._evict(conn, keep=(file_id, version))
+        return final_path
+
+    def invalidate(self, file_id: str, keep_version: Optional[str] = None):
+        """Forget cached copies of a file (all versions except `keep_version`)"""
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                "SELECT version, path FROM attachment_cache WHERE file_id=?", (file_id,)
+            ).fetchall()
+            for version, path in rows:
+                if version != keep_version:
+                    self._drop(conn, file_id, version, Path(path))
+
+    def total_size(self) -> int:
+        return self.db.reader().execute(
+            "SELECT COALESCE(SUM(size), 0) FROM attachment_cache"
+        ).fetchone()[0]
+
+    def _evict(self, conn, keep: tuple):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM attachment_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute(
+            "SELECT file_id, version, path, size FROM attachment_cache ORDER BY last_access"
+        ).fetchall()
+        for file_id, version, path, size in rows:
+            if total <= self.max_bytes:
+                break
+            if (file_id, version) == keep:
+                continue
+            self._drop(conn, file_id, version, Path(path))
+            total -= size
+
+    @staticmethod
+    def _drop(conn, file_id: str, version: str, path: Path):
+        conn.execute(
+            "DELETE FROM attachment_cache WHERE file_id=? AND version=?", (file_id, version)
+        )
+        try:
+            path.unlink()
+            path.parent.rmdir()
+        except OSError:
+            pass
+
+
+def file_md5(path, block_size: int = 1024 * 1024) -> str:
+    digest = hashlib.md5()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
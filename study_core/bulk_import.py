@@ -0,0 +1,216 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Collection, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .database import DatabaseManager
+from .upload_manager import UploadManager
+
+DEFAULT_BATCH_SIZE = 500
+WORD_SEPARATORS = re.compile(r"[\s_]+|(?<=\w)-(?=\w)|\.(?=\D)")
+
+
+def walk_files(paths: Iterable[str], extensions: Optional[Collection[str]] = None) -> Iterator[Tuple[str, str]]:
+    """Yield (file_path, base) for every importable file under `paths`.
+
+    Directories are walked lazily, one directory listing at a time, so the
+    walk never holds the whole tree. Hidden files and folders are skipped.
+    `base` is the folder paths are made relative to when deriving tags: the
+    parent of a dropped folder (so the folder's own name becomes a tag) or
+    the folder of a loose file (no tags).
+    """
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            if _wanted(path, extensions):
+                yield path, os.path.dirname(path)
+            continue
+        base = os.path.dirname(path)
+        stack = [path]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as listing:
+                    entries = sorted(listing, key=lambda entry: entry.name)
+            except OSError:
+                continue
+            subdirs = []
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file() and _wanted(entry.name, extensions):
+                    yield entry.path, base
+            stack.extend(reversed(subdirs))
+
+
+def _wanted(name: str, extensions: Optional[Collection[str]]) -> bool:
+    return not extensions or os.path.splitext(name)[1].lower().lstrip(".") in extensions
+
+
+def normalize_tag(name: str) -> str:
+    return "-".join(name.replace(",", " ").lower().split())
+
+
+def derive_material(path: str, base: str) -> Tuple[str, str]:
+    """Title from the file name, tags from the folders between `base` and the file"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    title = " ".join(part for part in WORD_SEPARATORS.split(stem) if part) or os.path.basename(path)
+    title = title[:1].upper() + title[1:]
+    folders = os.path.relpath(os.path.dirname(path), base).split(os.sep)
+    tags = [normalize_tag(folder) for folder in folders if folder not in (".", "")]
+    return title, ", ".join(dict.fromkeys(tag for tag in tags if tag))
+
+
+class BulkImporter:
+    """Import files and folders as materials in batched transactions.
+
+    An import is a job in `import_jobs`. Every batch of materials is inserted
+    in one transaction together with its rows in `imported_files`, so after a
+    crash (or cancel) running the job again skips whatever was committed and
+    carries on. If an UploadManager is given, attachments are queued on it and
+    upload concurrently on its transfer workers. Materials are inserted through
+    `db`, so its on_change listeners see every batch.
+    """
+
+    def __init__(self, db: DatabaseManager, batch_size: int = DEFAULT_BATCH_SIZE,
+                 extensions: Optional[Collection[str]] = None,
+                 upload_manager: Optional[UploadManager] = None,
+                 on_progress: Optional[Callable[[int, int, int], None]] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.extensions = {ext.lower().lstrip(".") for ext in extensions} if extensions else None
+        self.upload_manager = upload_manager
+        self.on_progress = on_progress
+        self.cancelled = threading.Event()
+        self.create_tables()
+
+    def create_tables(self):
+        with self.db.transaction() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                roots TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                imported INTEGER NOT NULL DEFAULT 0,
+                created TEXT NOT NULL
+            )
+            ''')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS imported_files (
+                path TEXT PRIMARY KEY,
+                job_id INTEGER NOT NULL,
+                material_id INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                upload_queued INTEGER NOT NULL DEFAULT 0
+            )
+            ''')
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_imported_files_job ON imported_files(job_id, upload_queued)"
+            )
+
+    def create_job(self, paths: Iterable[str]) -> int:
+        roots = [os.path.abspath(path) for path in paths]
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO import_jobs (roots, created) VALUES (?, ?)",
+                (json.dumps(roots), datetime.now().strftime("%Y-%m-%d %H:%M"))
+            )
+        return cursor.lastrowid
+
+    def unfinished_jobs(self) -> List[Tuple[int, List[str], int]]:
+        """(job_id, roots, files imported so far) of imports that never finished"""
+        rows = self.db.reader().execute(
+            "SELECT id, roots, imported FROM import_jobs WHERE status='running' ORDER BY id"
+        ).fetchall()
+        return [(job_id, json.loads(roots), imported) for job_id, roots, imported in rows]
+
+    def discard(self, job_id: int):
+        """Give up on an unfinished job; what it already imported stays"""
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE import_jobs SET status='abandoned' WHERE id=?", (job_id,))
+
+    def cancel(self):
+        """Stop running imports after their current batch; they can be resumed"""
+        self.cancelled.set()
+
+    def close(self):
+        self.cancel()
+
+    def run(self, job_id: int) -> Tuple[int, int]:
+        """Run (or resume) a job on the calling thread; returns (imported, skipped)"""
+        roots = json.loads(self.db.reader().execute(
+            "SELECT roots FROM import_jobs WHERE id=?", (job_id,)
+        ).fetchone()[0])
+        imported = skipped = 0
+        # Attachments committed just before a crash may not have been queued yet
+        self._queue_uploads(job_id)
+        files = walk_files(roots, self.extensions)
+        while not self.cancelled.is_set():
+            batch = list(islice(files, self.batch_size))
+            if not batch:
+                with self.db.transaction() as conn:
+                    conn.execute("UPDATE import_jobs SET status='done' WHERE id=?", (job_id,))
+                break
+            done = self._already_imported([path for path, _ in batch])
+            fresh = [(path, base) for path, base in batch if path not in done]
+            skipped += len(batch) - len(fresh)
+            if fresh:
+                imported += self._insert_batch(job_id, fresh)
+                self._queue_uploads(job_id)
+            if self.on_progress:
+                self.on_progress(job_id, imported, skipped)
+        return imported, skipped
+
+    def _already_imported(self, paths: List[str]) -> Set[str]:
+        # Files whose material was deleted since are imported again
+        placeholders = ",".join("?" * len(paths))
+        return {row[0] for row in self.db.reader().execute(
+            f"SELECT f.path FROM imported_files f JOIN materials m ON m.id = f.material_id "
+            f"WHERE f.path IN ({placeholders})", paths
+        )}
+
+    def _insert_batch(self, job_id: int, batch: List[Tuple[str, str]]) -> int:
+        materials, files = [], []
+        for path, base in batch:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue  # vanished since the walk
+            title, tags = derive_material(path, base)
+            materials.append((title, "", tags, path))
+            files.append((path, stat.st_size, stat.st_mtime))
+        if not materials:
+            return 0
+        with self.db.transaction() as conn:
+            ids = self.db.insert_materials(materials)
+            conn.executemany(
+                "INSERT OR REPLACE INTO imported_files (path, job_id, material_id, size, mtime) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(path, job_id, material_id, size, mtime)
+                 for material_id, (path, size, mtime) in zip(ids, files)]
+            )
+            conn.execute("UPDATE import_jobs SET imported = imported + ? WHERE id=?",
+                         (len(ids), job_id))
+        return len(ids)
+
+    def _queue_uploads(self, job_id: int):
+        if self.upload_manager is None:
+            return
+        # One transaction, so a crash can't leave uploads queued but not marked (and
+        # queued again on resume)
+        with self.db.transaction() as conn:
+            pending = conn.execute(
+                "SELECT material_id, path FROM imported_files WHERE job_id=? AND upload_queued=0",
+                (job_id,)
+            ).fetchall()
+            if pending:
+                self.upload_manager.enqueue_many(pending)
+                conn.execute(
+                    "UPDATE imported_files SET upload_queued=1 WHERE job_id=? AND upload_queued=0",
+                    (job_id,)
+                )
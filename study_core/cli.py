@@ -0,0 +1,226 @@
+"""Command line interface: python -m study_core <command> ..."""
+import argparse
+import csv
+import json
+import sys
+from typing import Iterator, List, Optional, Tuple
+
+from .attachment_cache import AttachmentCache
+from .bulk_import import BulkImporter, DEFAULT_BATCH_SIZE
+from .database import DatabaseManager, LIST_COLUMNS, MATERIAL_COLUMNS
+from .drive_metadata import MetadataCache
+from .extraction import TextIndexer
+from .search import format_material
+from .upload_manager import UploadManager
+
+
+def iter_materials(db: DatabaseManager, query: str = "",
+                   page_size: int = 500) -> Iterator[Tuple]:
+    """Stream every matching material (all columns) page by page"""
+    rows, cursor = db.page_materials(query, limit=page_size, columns=MATERIAL_COLUMNS)
+    yield from rows
+    while cursor is not None:
+        rows, cursor = db.page_materials(query, after=cursor, limit=page_size,
+                                         columns=MATERIAL_COLUMNS)
+        yield from rows
+
+
+def read_records(path: str) -> Iterator[dict]:
+    """Material records from a JSON array or JSON-lines file ('-' for stdin)"""
+    fh = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        text = fh.read()
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        yield from json.loads(stripped)
+    else:
+        for line in text.splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+def cmd_add(db: DatabaseManager, args) -> int:
+    if args.from_json:
+        items = [
+            (r["title"], r.get("content", ""), r.get("tags", ""), r.get("file_path", ""))
+            for r in read_records(args.from_json)
+        ]
+        print(f"Added {db.add_materials(items)} materials")
+        return 0
+    if not args.title:
+        print("error: a title or --from-json is required", file=sys.stderr)
+        return 2
+    content = args.content or ""
+    if args.content_file:
+        with open(args.content_file, encoding="utf-8") as fh:
+            content = fh.read()
+    material_id = db.add_material(args.title, content, args.tags or "", args.file or "")
+    print(material_id)
+    return 0
+
+
+def cmd_import(db: DatabaseManager, args) -> int:
+    if not args.paths and not args.resume:
+        print("error: give files/folders to import or --resume", file=sys.stderr)
+        return 2
+    uploads = UploadManager(db) if args.upload else None
+    importer = BulkImporter(
+        db, args.batch_size, args.ext, uploads,
+        on_progress=lambda job_id, imported, skipped: print(
+            f"\rimported {imported}, skipped {skipped}", end="", file=sys.stderr, flush=True)
+    )
+    try:
+        jobs = [job_id for job_id, _, _ in importer.unfinished_jobs()] if args.resume else []
+        if args.paths:
+            jobs.append(importer.create_job(args.paths))
+        for job_id in jobs:
+            imported, skipped = importer.run(job_id)
+            print(f"\rImported {imported} materials ({skipped} already imported)", file=sys.stderr)
+        if uploads:
+            print(f"{uploads.pending_count()} attachments queued for upload on the next Drive connect",
+                  file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\nInterrupted; run again with --resume to continue", file=sys.stderr)
+        return 130
+    finally:
+        importer.close()
+        if uploads:
+            uploads.close()
+    return 0
+
+
+def cmd_index(db: DatabaseManager, args) -> int:
+    metadata_cache = MetadataCache(db)
+    attachment_cache = AttachmentCache(db)
+    indexer = TextIndexer(db, metadata_cache, attachment_cache, workers=args.workers)
+    try:
+        print(f"Indexed the text of {indexer.index_pending()} attachments", file=sys.stderr)
+    finally:
+        indexer.close()
+    return 0
+
+
+def cmd_search(db: DatabaseManager, args) -> int:
+    rows, _ = db.page_materials(args.query, limit=args.limit, tags=args.tag or (),
+                                match_any=args.any)
+    if args.json:
+        print(json.dumps([dict(zip(LIST_COLUMNS, row)) for row in rows], indent=2))
+    else:
+        for row in rows:
+            print(f"{row[0]:>6}  {format_material(row)}")
+    return 0
+
+
+def cmd_tags(db: DatabaseManager, args) -> int:
+    tags = db.complete_tags(args.prefix, args.limit) if args.prefix else db.tag_counts(args.limit)
+    for name, count in tags:
+        print(f"{count:>6}  {name}")
+    return 0
+
+
+def cmd_show(db: DatabaseManager, args) -> int:
+    material = db.get_material(args.id)
+    if material is None:
+        print(f"error: no material with id {args.id}", file=sys.stderr)
+        return 1
+    print(json.dumps(dict(zip(MATERIAL_COLUMNS, material)), indent=2))
+    return 0
+
+
+def cmd_delete(db: DatabaseManager, args) -> int:
+    # Through the outbox, so a queued upload is dropped and a Drive copy is trashed
+    # on the next Drive connect
+    UploadManager(db).delete_material(args.id)
+    return 0
+
+
+def cmd_export(db: DatabaseManager, args) -> int:
+    out = sys.stdout if args.output in (None, "-") else open(
+        args.output, "w", encoding="utf-8", newline="")
+    try:
+        count = 0
+        if args.format == "csv":
+            writer = csv.writer(out)
+            writer.writerow(MATERIAL_COLUMNS)
+            for row in iter_materials(db, args.query):
+                writer.writerow(row)
+                count += 1
+        else:
+            # JSON lines keeps memory flat however large the export is
+            for row in iter_materials(db, args.query):
+                out.write(json.dumps(dict(zip(MATERIAL_COLUMNS, row)), ensure_ascii=False) + "\n")
+                count += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Exported {count} materials", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="study_core", description="Study Material Manager CLI")
+    parser.add_argument("--db", default="study_materials.db", help="SQLite database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add one material, or many with --from-json")
+    add.add_argument("title", nargs="?")
+    add.add_argument("--content")
+    add.add_argument("--content-file")
+    add.add_argument("--tags")
+    add.add_argument("--file", help="attachment path or Drive file ID")
+    add.add_argument("--from-json", metavar="PATH",
+                     help="JSON array or JSON lines of {title, content, tags, file_path}")
+    add.set_defaults(handler=cmd_add)
+
+    bulk = commands.add_parser("import", help="import files and folders as materials")
+    bulk.add_argument("paths", nargs="*")
+    bulk.add_argument("--ext", nargs="+", help="only these extensions, e.g. pdf docx")
+    bulk.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    bulk.add_argument("--upload", action="store_true",
+                      help="queue the attachments for upload to Google Drive")
+    bulk.add_argument("--resume", action="store_true", help="finish interrupted imports first")
+    bulk.set_defaults(handler=cmd_import)
+
+    index = commands.add_parser("index", help="extract attachment text for search")
+    index.add_argument("--workers", type=int, help="extraction processes (default: CPU count - 1, max 4)")
+    index.set_defaults(handler=cmd_index)
+
+    search = commands.add_parser("search", help="full-text search")
+    search.add_argument("query", nargs="?", default="")
+    search.add_argument("--limit", type=int, default=50)
+    search.add_argument("--tag", action="append", help="only materials with this exact tag (repeatable)")
+    search.add_argument("--any", action="store_true", help="match any --tag instead of all of them")
+    search.add_argument("--json", action="store_true")
+    search.set_defaults(handler=cmd_search)
+
+    tags = commands.add_parser("tags", help="list tags with their material counts")
+    tags.add_argument("--prefix", help="only tags starting with this (autocomplete)")
+    tags.add_argument("--limit", type=int, default=50)
+    tags.set_defaults(handler=cmd_tags)
+
+    show = commands.add_parser("show", help="print one material")
+    show.add_argument("id", type=int)
+    show.set_defaults(handler=cmd_show)
+
+    delete = commands.add_parser("delete", help="delete one material")
+    delete.add_argument("id", type=int)
+    delete.set_defaults(handler=cmd_delete)
+
+    export = commands.add_parser("export", help="export materials as JSON lines or CSV")
+    export.add_argument("--query", default="")
+    export.add_argument("--format", choices=("jsonl", "csv"), default="jsonl")
+    export.add_argument("--output", "-o")
+    export.set_defaults(handler=cmd_export)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    db = DatabaseManager(args.db)
+    try:
+        return args.handler(db, args)
+    finally:
+        db.close()
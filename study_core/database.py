@@ -0,0 +1,887 @@
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MATERIAL_COLUMNS = ("id", "title", "content", "tags", "file_path", "date_added", "last_modified")
+# Columns needed to draw the list; leaves out the potentially large `content`
+LIST_COLUMNS = ("id", "title", "tags", "file_path", "date_added", "last_modified")
+# Wrap matched terms in attachment_snippet() results
+SNIPPET_START, SNIPPET_END = "\x02", "\x03"
+# Kinds of DatabaseManager.on_change events
+CHANGE_INSERTED, CHANGE_UPDATED, CHANGE_DELETED = "inserted", "updated", "deleted"
+# How material_content.data is encoded: UTF-8 as is, or zlib-compressed UTF-8
+CODEC_PLAIN, CODEC_ZLIB = 0, 1
+COMPRESS_LEVEL = 6
+
+def parse_tags(text: Optional[str]) -> List[str]:
+    """Normalized, de-duplicated tag names from a comma-separated tags value"""
+    names = (" ".join(part.split()).lower() for part in (text or "").split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+def pack_content(text: Optional[str]) -> Optional[Tuple[int, int, bytes]]:
+    """(size, codec, data) to store for a material's content; None when it is empty.
+
+    `size` is the length of the UTF-8 text. Text that zlib doesn't shrink
+    (mostly short notes) is stored as is.
+    """
+    if not text:
+        return None
+    raw = text.encode("utf-8")
+    packed = zlib.compress(raw, COMPRESS_LEVEL)
+    if len(packed) < len(raw):
+        return len(raw), CODEC_ZLIB, packed
+    return len(raw), CODEC_PLAIN, raw
+
+def unpack_content(codec: Optional[int], data: Optional[bytes]) -> Optional[str]:
+    """The text stored by pack_content(); also an SQL function on connect()ed connections"""
+    if data is None:
+        return None
+    if codec == CODEC_ZLIB:
+        data = zlib.decompress(data)
+    return bytes(data).decode("utf-8")
+
+# A material's content, decompressed only for the rows a query returns
+CONTENT_SQL = ("COALESCE((SELECT unpack_content(c.codec, c.data) FROM material_content c "
+               "WHERE c.material_id = m.id), '')")
+
+def _projection(columns: Sequence[str]) -> str:
+    """SELECT list of MATERIAL_COLUMNS from `materials m`"""
+    return ", ".join(CONTENT_SQL if column == "content" else f"m.{column}" for column in columns)
+
+# Applied to every connection; WAL mode itself is persistent and set by DatabaseManager
+PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",    # fsync at checkpoints only; safe in WAL mode
+    "PRAGMA cache_size=-16000",     # 16 MB page cache
+    "PRAGMA mmap_size=268435456",   # read up to 256 MB through the OS page cache
+    "PRAGMA temp_store=MEMORY",
+)
+
+def connect(db_name: str, **kwargs) -> sqlite3.Connection:
+    """Open a tuned connection that may be used from any thread"""
+    conn = sqlite3.connect(db_name, check_same_thread=False, **kwargs)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    # For queries that read content (CONTENT_SQL, the LIKE search). Nothing stored
+    # in the schema calls it, so other SQLite tools can still write to the tables.
+    conn.create_function("unpack_content", 2, unpack_content)
+    return conn
+
+def _create_base_schema(conn: sqlite3.Connection):
+    """The schema as it was before versioning; a no-op on databases from then"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS materials (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT,
+        tags TEXT,
+        file_path TEXT,
+        date_added TEXT,
+        last_modified TEXT
+    )
+    ''')
+    # Text extracted from attachments (see extraction.TextIndexer)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS attachment_text (
+        material_id INTEGER PRIMARY KEY,
+        source_md5 TEXT NOT NULL,
+        text TEXT NOT NULL,
+        extracted_at TEXT NOT NULL
+    )
+    ''')
+
+def _rebuild_materials(conn: sqlite3.Connection, columns: str, copy_sql: str):
+    """Replace materials with a table of `columns`, filled by `copy_sql`.
+
+    SQLite can't change or drop columns in place, so the rows are copied
+    (`copy_sql` inserts into materials_new) into a new table that then takes
+    the old one's name. Row IDs are kept, so the search and tag indexes stay
+    valid. The AUTOINCREMENT sequence is carried over and the indexes are
+    recreated; the triggers dropped with the old table are recreated by
+    create_tables().
+    """
+    conn.execute(f"CREATE TABLE materials_new ({columns})")
+    conn.execute(copy_sql)
+    # Keep AUTOINCREMENT from reusing the IDs of deleted materials
+    sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='materials'").fetchone()
+    conn.execute("DROP TABLE materials")
+    conn.execute("ALTER TABLE materials_new RENAME TO materials")
+    if sequence is not None:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name='materials'")
+        conn.execute(
+            "INSERT INTO sqlite_sequence (name, seq) "
+            "SELECT 'materials', MAX(?, COALESCE(MAX(id), 0)) FROM materials", sequence
+        )
+    # Covers ORDER BY last_modified DESC, id DESC and keyset seeks on it
+    conn.execute("CREATE INDEX idx_materials_last_modified ON materials(last_modified, id)")
+    conn.execute("CREATE INDEX idx_materials_date_added ON materials(date_added, id)")
+    # Attachment lookups (sync, text indexing) only care about rows that have one
+    conn.execute("CREATE INDEX idx_materials_file_path ON materials(file_path) WHERE file_path != ''")
+
+def _integer_timestamps(conn: sqlite3.Connection):
+    """Store date_added/last_modified as Unix epoch seconds and index them.
+
+    SQLite can't change a column's type, so materials is rebuilt with
+    _rebuild_materials().
+    """
+    # The old "%Y-%m-%d %H:%M" strings are local time; 'utc' converts them
+    _rebuild_materials(conn, '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT,
+        tags TEXT,
+        file_path TEXT,
+        date_added INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        last_modified INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    ''', '''
+    INSERT INTO materials_new (id, title, content, tags, file_path, date_added, last_modified)
+    SELECT id, title, content, tags, file_path, COALESCE(added, modified, 0),
+           COALESCE(modified, added, 0)
+    FROM (SELECT *, CAST(strftime('%s', date_added, 'utc') AS INTEGER) AS added,
+                    CAST(strftime('%s', last_modified, 'utc') AS INTEGER) AS modified
+          FROM materials)
+    ''')
+
+def _compressed_content(conn: sqlite3.Connection):
+    """Move `content` out of materials into material_content, compressed.
+
+    Each non-empty content becomes a row holding its original size and its
+    text as encoded by pack_content(). Without the column materials rows are
+    small, so listing and scanning read far fewer pages, and text is only
+    decompressed for the materials that are opened. materials is rebuilt with
+    _rebuild_materials(). The FTS index took its content from the dropped
+    column, so it is dropped too; create_search_index() recreates it and
+    reindexes.
+    """
+    conn.execute('''
+    CREATE TABLE material_content (
+        material_id INTEGER PRIMARY KEY,
+        size INTEGER NOT NULL,
+        codec INTEGER NOT NULL,
+        data BLOB NOT NULL
+    )
+    ''')
+    rows = conn.execute("SELECT id, content FROM materials WHERE content != ''")
+    conn.executemany(
+        "INSERT INTO material_content (material_id, size, codec, data) VALUES (?, ?, ?, ?)",
+        ((material_id,) + pack_content(text) for material_id, text in rows)
+    )
+    conn.execute("DROP TABLE IF EXISTS materials_fts")
+    _rebuild_materials(conn, '''
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        tags TEXT,
+        file_path TEXT,
+        date_added INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+        last_modified INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    ''', '''
+    INSERT INTO materials_new (id, title, tags, file_path, date_added, last_modified)
+    SELECT id, title, tags, file_path, date_added, last_modified FROM materials
+    ''')
+
+def _add_columns(conn: sqlite3.Connection, table: str, columns: Sequence[str]):
+    """ALTER TABLE ADD COLUMN each "name type ..." definition the table doesn't have yet.
+
+    Builds before these steps added some of them when their component
+    created its table, so they may already be there.
+    """
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column in columns:
+        if column.split()[0] not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+
+def _trashed_metadata(conn: sqlite3.Connection):
+    """Record in attachment_metadata whether Drive reports a file as trashed or removed.
+
+    Set by the sync engine (drive_sync.SyncEngine); MetadataCache creates its
+    other tables itself.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS attachment_metadata (
+        file_id TEXT PRIMARY KEY,
+        name TEXT,
+        size INTEGER,
+        mime_type TEXT,
+        md5_checksum TEXT,
+        modified_time TEXT,
+        fetched_at REAL NOT NULL
+    )
+    ''')
+    _add_columns(conn, "attachment_metadata", ["trashed INTEGER NOT NULL DEFAULT 0"])
+
+def _outbox_operations(conn: sqlite3.Connection):
+    """Let the upload queue hold every Drive operation (see upload_manager.UploadManager).
+
+    `op` is 'upload' or 'delete'; `old_file_id` is the Drive file an upload
+    replaces, or the one a delete trashes.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS uploads (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        material_id INTEGER NOT NULL,
+        local_path TEXT NOT NULL,
+        file_name TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime REAL NOT NULL,
+        session_uri TEXT,
+        bytes_sent INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL DEFAULT 'pending',
+        error TEXT
+    )
+    ''')
+    _add_columns(conn, "uploads", ["op TEXT NOT NULL DEFAULT 'upload'", "old_file_id TEXT"])
+
+# Applied in order, each in its own transaction; PRAGMA user_version counts those done.
+# Append new steps, never edit released ones.
+MIGRATIONS = (_create_base_schema, _integer_timestamps, _compressed_content, _trashed_metadata,
+              _outbox_operations)
+SCHEMA_VERSION = len(MIGRATIONS)
+
+class DatabaseManager:
+    """Materials store that the GUI thread and background workers can share.
+
+    All writes go through one writer connection (`conn`), serialized by a
+    lock; `transaction()` groups several writes into one commit. Every thread
+    reads through its own connection (`reader()`), and because the database
+    runs in WAL mode those reads never wait for a write in progress.
+
+    `on_change(kind, ids)` is called after each commit that inserted, updated
+    or deleted materials through this manager, on the committing thread.
+    """
+
+    def __init__(self, db_name: str = 'study_materials.db',
+                 on_change: Optional[Callable[[str, List[int]], None]] = None):
+        self.db_name = db_name
+        self.on_change = on_change
+        # Autocommit mode: the only transactions are the ones transaction() opens
+        self.conn = connect(db_name, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.write_lock = threading.RLock()
+        self.local = threading.local()
+        self.readers: List[sqlite3.Connection] = []
+        self.readers_lock = threading.Lock()
+        self.create_tables()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run writes on the writer connection as one transaction.
+
+        Yields the writer connection. Nested calls on the same thread join the
+        outer transaction; other threads' writes wait until it commits. Change
+        events go out after the outermost commit, with the lock released.
+        """
+        with self.write_lock:
+            depth = getattr(self.local, "depth", 0)
+            if not depth:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.local.changes = []
+                self.local.callbacks = []
+            self.local.depth = depth + 1
+            try:
+                yield self.conn
+            except BaseException:
+                if not depth:
+                    self.conn.rollback()
+                raise
+            else:
+                if not depth:
+                    self.conn.commit()
+            finally:
+                self.local.depth = depth
+        if not depth:
+            changes, self.local.changes = self.local.changes, []
+            callbacks, self.local.callbacks = self.local.callbacks, []
+            if self.on_change is not None:
+                for kind, ids in changes:
+                    self.on_change(kind, ids)
+            for callback in callbacks:
+                callback()
+
+    def _changed(self, kind: str, ids: List[int]):
+        """Record a change to report once the current transaction commits"""
+        if ids:
+            self.local.changes.append((kind, ids))
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Call `callback` once the calling thread's transaction commits, or now outside one.
+
+        For waking threads that read what the transaction wrote: before the
+        commit their readers can't see it yet. Dropped if it rolls back.
+        """
+        if getattr(self.local, "depth", 0):
+            self.local.callbacks.append(callback)
+        else:
+            callback()
+
+    def reader(self) -> sqlite3.Connection:
+        """The calling thread's read connection, opened on first use.
+
+        Inside transaction() this is the writer, so a thread sees its own
+        uncommitted writes.
+        """
+        if getattr(self.local, "depth", 0) or self.db_name == ":memory:":
+            return self.conn
+        conn = getattr(self.local, "reader", None)
+        if conn is None:
+            conn = connect(self.db_name, isolation_level=None)
+            self.local.reader = conn
+            with self.readers_lock:
+                self.readers.append(conn)
+        return conn
+
+    def release_reader(self):
+        """Close the calling thread's read connection (e.g. when a worker exits)"""
+        conn = getattr(self.local, "reader", None)
+        if conn is not None:
+            self.local.reader = None
+            with self.readers_lock:
+                if conn in self.readers:  # close() may have got to it first
+                    self.readers.remove(conn)
+            conn.close()
+
+    def schema_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def migrate(self):
+        """Apply the MIGRATIONS this database hasn't had yet"""
+        if self.schema_version() == SCHEMA_VERSION:
+            return
+        while True:
+            with self.transaction() as conn:
+                # Re-read under the write lock: another process may have migrated meanwhile
+                version = self.schema_version()
+                if version > SCHEMA_VERSION:
+                    raise RuntimeError(
+                        f"{self.db_name} has schema version {version}; this version of "
+                        f"the application supports up to {SCHEMA_VERSION}"
+                    )
+                if version == SCHEMA_VERSION:
+                    return
+                MIGRATIONS[version](conn)
+                conn.execute(f"PRAGMA user_version = {version + 1}")
+
+    def create_tables(self):
+        self.migrate()
+        cursor = self.conn.cursor()
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS materials_attachment_text_ad AFTER DELETE ON materials BEGIN
+            DELETE FROM attachment_text WHERE material_id = old.id;
+        END
+        ''')
+        cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS materials_content_ad AFTER DELETE ON materials BEGIN
+            DELETE FROM material_content WHERE material_id = old.id;
+        END
+        ''')
+        self.create_tag_index()
+        self.fts_enabled = self.create_search_index()
+
+    def create_tag_index(self):
+        """Create the normalized tag tables.
+
+        The `tags` column stays as entered and is what the list shows; the
+        parsed names live in `tags`/`material_tags`, which this class keeps in
+        sync on every write. Each tag carries its material count, maintained
+        by triggers as links are added and removed. Existing databases are
+        backfilled from the `tags` column on first open.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='material_tags'")
+        exists = cursor.fetchone() is not None
+        cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            material_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS material_tags (
+            tag_id INTEGER NOT NULL,
+            material_id INTEGER NOT NULL,
+            PRIMARY KEY (tag_id, material_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_material_tags_material ON material_tags(material_id);
+        CREATE INDEX IF NOT EXISTS idx_tags_material_count ON tags(material_count);
+        CREATE TRIGGER IF NOT EXISTS material_tags_ai AFTER INSERT ON material_tags BEGIN
+            UPDATE tags SET material_count = material_count + 1 WHERE id = new.tag_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS material_tags_ad AFTER DELETE ON material_tags BEGIN
+            UPDATE tags SET material_count = material_count - 1 WHERE id = old.tag_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS materials_tags_ad AFTER DELETE ON materials BEGIN
+            DELETE FROM material_tags WHERE material_id = old.id;
+        END;
+        ''')
+        if not exists:
+            with self.transaction():
+                self._link_tags(cursor.execute("SELECT id, tags FROM materials WHERE tags != ''").fetchall())
+
+    def _link_tags(self, rows: Iterable[Tuple[int, Optional[str]]], replace: bool = False):
+        """Point material_tags at the parsed tags of (material_id, tags) rows; call in transaction()"""
+        links = []
+        for material_id, text in rows:
+            names = parse_tags(text)
+            if replace:
+                current = dict(self.conn.execute(
+                    "SELECT t.name, t.id FROM material_tags mt JOIN tags t ON t.id = mt.tag_id "
+                    "WHERE mt.material_id=?", (material_id,)
+                ).fetchall())
+                removed = [(tag_id, material_id) for name, tag_id in current.items() if name not in names]
+                self.conn.executemany(
+                    "DELETE FROM material_tags WHERE tag_id=? AND material_id=?", removed
+                )
+                names = [name for name in names if name not in current]
+            links.extend((material_id, name) for name in names)
+        if links:
+            self.conn.executemany("INSERT OR IGNORE INTO tags (name) VALUES (?)",
+                                  ((name,) for _, name in links))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO material_tags (tag_id, material_id) "
+                "SELECT id, ? FROM tags WHERE name=?", links
+            )
+
+    def create_search_index(self) -> bool:
+        """Create the FTS5 indexes over materials and attachment text.
+
+        `materials_fts` covers title, tags and content. Content is stored
+        compressed, so the index is contentless and this class writes its
+        rows, with the decompressed text, on every insert, update and delete
+        (like the tag tables). `attachment_fts` covers the text extracted from
+        attachments; it is an external-content table kept in sync by
+        triggers. Databases created before an index existed are backfilled on
+        first open. Returns False if this SQLite build lacks FTS5.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' "
+            "AND name IN ('materials_fts', 'attachment_fts')"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        try:
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS materials_fts USING fts5(
+                title, tags, content,
+                content='',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+            ''')
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS attachment_fts USING fts5(
+                text,
+                content='attachment_text', content_rowid='material_id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+            ''')
+        except sqlite3.OperationalError:
+            return False
+
+        cursor.executescript('''
+        CREATE TRIGGER IF NOT EXISTS attachment_fts_ai AFTER INSERT ON attachment_text BEGIN
+            INSERT INTO attachment_fts(rowid, text) VALUES (new.material_id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS attachment_fts_ad AFTER DELETE ON attachment_text BEGIN
+            INSERT INTO attachment_fts(attachment_fts, rowid, text)
+            VALUES ('delete', old.material_id, old.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS attachment_fts_au AFTER UPDATE ON attachment_text BEGIN
+            INSERT INTO attachment_fts(attachment_fts, rowid, text)
+            VALUES ('delete', old.material_id, old.text);
+            INSERT INTO attachment_fts(rowid, text) VALUES (new.material_id, new.text);
+        END;
+        ''')
+        # Migrate an existing database: index rows added before FTS5
+        if 'materials_fts' not in existing:
+            self.rebuild_search_index()
+        if 'attachment_fts' not in existing:
+            with self.transaction():
+                cursor.execute("INSERT INTO attachment_fts(attachment_fts) VALUES ('rebuild')")
+        return True
+
+    def rebuild_search_index(self):
+        """Reindex every material's title, tags and content.
+
+        Only needed after materials were changed without this class (e.g. with
+        the sqlite3 shell), which leaves their search entries stale.
+        """
+        with self.transaction() as conn:
+            conn.execute("INSERT INTO materials_fts(materials_fts) VALUES ('delete-all')")
+            rows = conn.execute(
+                "SELECT m.id, m.title, m.tags, c.codec, c.data FROM materials m "
+                "LEFT JOIN material_content c ON c.material_id = m.id"
+            )
+            conn.executemany(
+                "INSERT INTO materials_fts(rowid, title, tags, content) VALUES (?, ?, ?, ?)",
+                ((material_id, title, tags, unpack_content(codec, data))
+                 for material_id, title, tags, codec, data in rows)
+            )
+
+    def _indexed_document(self, material_id: int) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """(title, tags, content) as materials_fts has them; call in transaction()"""
+        row = self.conn.execute(
+            "SELECT m.title, m.tags, c.codec, c.data FROM materials m "
+            "LEFT JOIN material_content c ON c.material_id = m.id WHERE m.id=?", (material_id,)
+        ).fetchone()
+        return None if row is None else (row[0], row[1], unpack_content(row[2], row[3]))
+
+    def _unindex(self, material_id: int, document: Tuple[str, Optional[str], Optional[str]]):
+        # A contentless index can only remove the exact values it was given
+        self.conn.execute(
+            "INSERT INTO materials_fts(materials_fts, rowid, title, tags, content) "
+            "VALUES ('delete', ?, ?, ?, ?)", (material_id,) + document
+        )
+
+    @staticmethod
+    def build_fts_query(query: str) -> str:
+        """Turn free text into an FTS5 MATCH expression with prefix matching"""
+        terms = re.findall(r"\w+", query.lower())
+        return " ".join(f'"{term}"*' for term in terms)
+    
+    def add_material(self, title: str, content: str, tags: str, file_path: str) -> int:
+        """Add new material to database and return its ID"""
+        return self.insert_materials([(title, content, tags, file_path)])[0]
+    
+    def add_materials(self, items: Iterable[tuple]) -> int:
+        """Add many rows in one transaction; returns the count.
+
+        Items are (title, content, tags, file_path), optionally followed by
+        explicit date_added and last_modified as Unix timestamps (e.g. when
+        importing).
+        """
+        return len(self.insert_materials(list(items)))
+
+    def insert_materials(self, items: Sequence[tuple]) -> List[int]:
+        """Insert rows and return their IDs in order.
+
+        Takes the same items as add_materials. Called inside transaction(),
+        the rows commit together with the caller's other writes:
+        `with db.transaction() as conn: ids = db.insert_materials(items); ...`
+        """
+        now = int(time.time())
+        with self.transaction() as conn:
+            # The IDs AUTOINCREMENT would allocate, taken explicitly so the content
+            # and search rows can be written in bulk alongside the materials
+            first_id = conn.execute(
+                "SELECT MAX(COALESCE(MAX(id), 0), COALESCE((SELECT seq FROM sqlite_sequence "
+                "WHERE name='materials'), 0)) + 1 FROM materials"
+            ).fetchone()[0]
+            ids = list(range(first_id, first_id + len(items)))
+            self._store_content((material_id, item[1]) for material_id, item in zip(ids, items))
+            conn.executemany(
+                "INSERT INTO materials (id, title, tags, file_path, date_added, last_modified) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                ((material_id, item[0]) + tuple(item[2:]) + ((now, now) if len(item) == 4 else ())
+                 for material_id, item in zip(ids, items))
+            )
+            if self.fts_enabled:
+                conn.executemany(
+                    "INSERT INTO materials_fts(rowid, title, tags, content) VALUES (?, ?, ?, ?)",
+                    ((material_id, item[0], item[2], item[1] or None)
+                     for material_id, item in zip(ids, items))
+                )
+            self._link_tags((material_id, item[2]) for material_id, item in zip(ids, items))
+            self._changed(CHANGE_INSERTED, ids)
+        return ids
+    
+    def update_material(self, material_id: int, title: str, content: str, tags: str, file_path: str):
+        """Update existing material; an unknown ID (e.g. deleted meanwhile) is ignored"""
+        now = int(time.time())
+        with self.transaction() as conn:
+            indexed = self._indexed_document(material_id) if self.fts_enabled else None
+            updated = conn.execute(
+                "UPDATE materials SET title=?, tags=?, file_path=?, last_modified=? WHERE id=?",
+                (title, tags, file_path, now, material_id)
+            ).rowcount
+            if not updated:
+                return
+            self._store_content([(material_id, content)], replace=True)
+            document = (title, tags, content or None)
+            if indexed is not None and indexed != document:
+                self._unindex(material_id, indexed)
+                conn.execute(
+                    "INSERT INTO materials_fts(rowid, title, tags, content) VALUES (?, ?, ?, ?)",
+                    (material_id,) + document
+                )
+            self._link_tags([(material_id, tags)], replace=True)
+            self._changed(CHANGE_UPDATED, [material_id])
+
+    def replace_file_path(self, material_id: int, expected: str, file_path: str) -> bool:
+        """Point a material at `file_path` if its attachment is still `expected`.
+
+        For background work such as a finished upload swapping the local path
+        for the Drive file ID. last_modified is left alone. Returns whether
+        the row changed.
+        """
+        with self.transaction() as conn:
+            changed = conn.execute(
+                "UPDATE materials SET file_path=? WHERE id=? AND file_path=?",
+                (file_path, material_id, expected)
+            ).rowcount > 0
+            if changed:
+                self._changed(CHANGE_UPDATED, [material_id])
+        return changed
+
+    def _store_content(self, rows: Iterable[Tuple[int, Optional[str]]], replace: bool = False):
+        """Write the (material_id, content) rows to material_content; call in transaction().
+
+        With `replace`, existing content is overwritten, and removed when the
+        new content is empty. Unchanged content is left alone (zlib output is
+        deterministic), so saving an unedited material doesn't rewrite it.
+        """
+        packed, cleared = [], []
+        for material_id, text in rows:
+            value = pack_content(text)
+            if value is not None:
+                packed.append((material_id,) + value)
+            elif replace:
+                cleared.append((material_id,))
+        if cleared:
+            self.conn.executemany("DELETE FROM material_content WHERE material_id=?", cleared)
+        if packed:
+            self.conn.executemany(
+                "INSERT INTO material_content (material_id, size, codec, data) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(material_id) DO UPDATE SET size=excluded.size, codec=excluded.codec, "
+                "data=excluded.data WHERE data != excluded.data",
+                packed
+            )
+    
+    def delete_material(self, material_id: int):
+        """Delete material from database"""
+        with self.transaction() as conn:
+            indexed = self._indexed_document(material_id) if self.fts_enabled else None
+            if conn.execute("DELETE FROM materials WHERE id=?", (material_id,)).rowcount:
+                if indexed is not None:
+                    self._unindex(material_id, indexed)
+                self._changed(CHANGE_DELETED, [material_id])
+    
+    def get_material(self, material_id: int,
+                     columns: Tuple[str, ...] = MATERIAL_COLUMNS) -> Optional[Tuple]:
+        """Get single material by ID, restricted to `columns`.
+
+        The content is decompressed only when `columns` includes it.
+        """
+        unknown = set(columns) - set(MATERIAL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown material columns: {', '.join(sorted(unknown))}")
+        cursor = self.reader().cursor()
+        cursor.execute(f"SELECT {_projection(columns)} FROM materials m WHERE m.id=?",
+                       (material_id,))
+        return cursor.fetchone()
+
+    def content_size(self, material_id: int) -> int:
+        """Length in bytes of a material's content (UTF-8), without decompressing it"""
+        row = self.reader().execute(
+            "SELECT size FROM material_content WHERE material_id=?", (material_id,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def _search_clause(self, query: str, tags: Sequence[str] = (),
+                       match_any: bool = False) -> Tuple[str, str, bool, tuple]:
+        """Return the FROM/WHERE part, sort key, ranking flag and parameters.
+
+        Ranked (full-text) results sort ascending by bm25 score, everything
+        else newest first by (last_modified, id). `tags` restricts results to
+        materials with all of those exact tags, or any of them with `match_any`.
+        """
+        source, sort_key, ranked, params = self._text_clause(query)
+        names = parse_tags(",".join(tags))
+        if names:
+            placeholders = ",".join("?" * len(names))
+            having = "" if match_any else f" GROUP BY mt.material_id HAVING COUNT(*) = {len(names)}"
+            source += (f" AND m.id IN (SELECT mt.material_id FROM material_tags mt "
+                       f"JOIN tags t ON t.id = mt.tag_id WHERE t.name IN ({placeholders}){having})")
+            params += tuple(names)
+        return source, sort_key, ranked, params
+
+    def _text_clause(self, query: str) -> Tuple[str, str, bool, tuple]:
+        """The free-text part of _search_clause"""
+        match = self.build_fts_query(query) if self.fts_enabled else ""
+        if match:
+            # bm25 weights: title matches count most, then tags, then content,
+            # then attachment text; a material scores by its best match
+            return (
+                "FROM (SELECT id, MIN(score) AS score FROM ("
+                "SELECT rowid AS id, bm25(materials_fts, 10.0, 5.0, 1.0) AS score "
+                "FROM materials_fts WHERE materials_fts MATCH ? "
+                "UNION ALL SELECT rowid, bm25(attachment_fts, 0.5) "
+                "FROM attachment_fts WHERE attachment_fts MATCH ?"
+                ") GROUP BY id) r JOIN materials m ON m.id = r.id WHERE 1",
+                "r.score",
+                True,
+                (match, match)
+            )
+        if query.strip() and self.fts_enabled:
+            # Only punctuation or operators: there is nothing to search for
+            return "FROM materials m WHERE 0", "m.last_modified", False, ()
+        if query and not self.fts_enabled:
+            query = f"%{query.lower()}%"
+            return (
+                "FROM materials m WHERE (LOWER(m.title) LIKE ? OR LOWER(m.tags) LIKE ? "
+                "OR m.id IN (SELECT material_id FROM material_content "
+                "WHERE LOWER(unpack_content(codec, data)) LIKE ?) OR m.id IN "
+                "(SELECT material_id FROM attachment_text WHERE LOWER(text) LIKE ?))",
+                "m.last_modified",
+                False,
+                (query, query, query, query)
+            )
+        return "FROM materials m WHERE 1", "m.last_modified", False, ()
+
+    def is_ranked(self, query: str) -> bool:
+        """Whether results for `query` are ordered by relevance rather than by date"""
+        return self._text_clause(query)[2]
+
+    @staticmethod
+    def _order_clause(ranked: bool) -> str:
+        if ranked:
+            return "ORDER BY sort_key, sort_id"
+        return "ORDER BY m.last_modified DESC, m.id DESC"
+
+    def search_materials(self, query: str = "", limit: Optional[int] = None,
+                         offset: int = 0, tags: Sequence[str] = (),
+                         match_any: bool = False) -> List[Tuple]:
+        """Search materials by title, tags, content or attachment text, best matches first"""
+        rows, _ = self.page_materials(query, limit=limit, columns=MATERIAL_COLUMNS,
+                                      offset=offset, tags=tags, match_any=match_any)
+        return rows
+
+    def page_materials(self, query: str = "", after: Optional[tuple] = None,
+                       limit: Optional[int] = 200, columns: Tuple[str, ...] = LIST_COLUMNS,
+                       offset: int = 0, tags: Sequence[str] = (),
+                       match_any: bool = False) -> Tuple[List[Tuple], Optional[tuple]]:
+        """Fetch one page of search results using keyset pagination.
+
+        `after` is the cursor returned with the previous page; pages continue
+        from it with an index seek instead of skipping rows. Without a cursor,
+        `offset` positions the page (used when jumping to an arbitrary row).
+        Returns the rows (restricted to `columns`) and the cursor for the
+        next page, or None when there are no more rows.
+        """
+        unknown = set(columns) - set(MATERIAL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown material columns: {', '.join(sorted(unknown))}")
+        source, sort_key, ranked, params = self._search_clause(query, tags, match_any)
+        projection = _projection(columns)
+        select = f"SELECT {projection}, {sort_key} AS sort_key, m.id AS sort_id {source}"
+        if after is not None and ranked:
+            # bm25() is only usable inside the MATCH query, so seek from outside it
+            sql = (f"SELECT * FROM ({select}) WHERE (sort_key, sort_id) > (?, ?) "
+                   f"ORDER BY sort_key, sort_id")
+            params += tuple(after)
+        elif after is not None:
+            sql = (f"{select} AND (m.last_modified, m.id) < (?, ?) "
+                   f"{self._order_clause(ranked)}")
+            params += tuple(after)
+        else:
+            sql = f"{select} {self._order_clause(ranked)}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+            if after is None and offset:
+                sql += " OFFSET ?"
+                params += (offset,)
+        cursor = self.reader().cursor()
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        next_cursor = tuple(rows[-1][-2:]) if limit is not None and len(rows) == limit else None
+        return [row[:-2] for row in rows], next_cursor
+
+    def locate_materials(self, ids: Iterable[int], query: str = "", tags: Sequence[str] = (),
+                         match_any: bool = False,
+                         columns: Tuple[str, ...] = LIST_COLUMNS) -> List[Tuple[int, Tuple]]:
+        """Where materials sit in the results of an unranked search.
+
+        Returns (position, row) for each of `ids` that matches, by position,
+        where position is the row's index in page_materials() order. Lets a
+        list place a changed row without fetching the results again.
+        """
+        source, _, ranked, params = self._search_clause(query, tags, match_any)
+        if ranked:
+            raise ValueError("positions in relevance-ranked results are not tracked")
+        projection = _projection(columns)
+        reader = self.reader()
+        located = []
+        for material_id in ids:
+            row = reader.execute(f"SELECT {projection} {source} AND m.id = ?",
+                                 params + (material_id,)).fetchone()
+            if row is None:
+                continue
+            # Rows are newest first: count the matches that sort after this one
+            position = reader.execute(
+                f"SELECT COUNT(*) {source} AND (m.last_modified, m.id) > "
+                f"(SELECT last_modified, id FROM materials WHERE id = ?)",
+                params + (material_id,)
+            ).fetchone()[0]
+            located.append((position, row))
+        located.sort(key=lambda item: item[0])
+        return located
+
+    def attachment_snippet(self, material_id: int, query: str, tokens: int = 24) -> Optional[str]:
+        """Excerpt of the attachment text around the best match for `query`.
+
+        Matched terms are wrapped in SNIPPET_START/SNIPPET_END; returns None
+        when the attachment text does not match.
+        """
+        match = self.build_fts_query(query) if self.fts_enabled else ""
+        if not match:
+            return None
+        row = self.reader().execute(
+            "SELECT snippet(attachment_fts, 0, ?, ?, '…', ?) FROM attachment_fts "
+            "WHERE attachment_fts MATCH ? AND rowid = ?",
+            (SNIPPET_START, SNIPPET_END, tokens, match, material_id)
+        ).fetchone()
+        return row[0] if row else None
+
+    def count_materials(self, query: str = "", tags: Sequence[str] = (),
+                        match_any: bool = False) -> int:
+        """Count the rows search_materials would return for a query"""
+        source, _, _, params = self._search_clause(query, tags, match_any)
+        cursor = self.reader().cursor()
+        cursor.execute(f"SELECT COUNT(*) {source}", params)
+        return cursor.fetchone()[0]
+    
+    def tag_counts(self, limit: Optional[int] = None,
+                   names: Sequence[str] = ()) -> List[Tuple[str, int]]:
+        """(tag, number of materials) pairs, most used first; optionally only `names`"""
+        sql = "SELECT name, material_count FROM tags WHERE material_count > 0"
+        params: tuple = ()
+        names = parse_tags(",".join(names))
+        if names:
+            sql += f" AND name IN ({','.join('?' * len(names))})"
+            params += tuple(names)
+        sql += " ORDER BY material_count DESC, name"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (limit,)
+        return self.reader().execute(sql, params).fetchall()
+
+    def complete_tags(self, prefix: str, limit: int = 10) -> List[Tuple[str, int]]:
+        """Existing tags starting with `prefix`, most used first, for autocomplete"""
+        prefix = " ".join(prefix.split()).lower()
+        if not prefix:
+            return self.tag_counts(limit)
+        # A range on the unique name index instead of LIKE, which can't use it
+        return self.reader().execute(
+            "SELECT name, material_count FROM tags WHERE name >= ? AND name < ? "
+            "AND material_count > 0 ORDER BY material_count DESC, name LIMIT ?",
+            (prefix, prefix + "\U0010ffff", limit)
+        ).fetchall()
+
+    def get_attachment_refs(self) -> List[str]:
+        """Distinct non-empty file_path values (local paths or Drive file IDs)"""
+        cursor = self.reader().cursor()
+        cursor.execute(
+            "SELECT DISTINCT file_path FROM materials WHERE file_path IS NOT NULL AND file_path != ''"
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+    def close(self):
+        """Close the writer and every thread's read connection"""
+        with self.readers_lock:
+            for conn in self.readers:
+                conn.close()
+            self.readers.clear()
+        with self.write_lock:
+            self.conn.close()
@@ -0,0 +1,194 @@
+import os
+import threading
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from .attachment_cache import file_md5
+from .request_executor import RequestExecutor
+from .upload_manager import FILES_URL, HttpClient, HttpPool
+
+DEFAULT_PART_SIZE = 8 * 1024 * 1024  # 8 MiB per ranged GET
+DEFAULT_CONNECTIONS = 4
+
+
+class DownloadError(IOError):
+    """Raised when Drive refuses a download or the content does not check out"""
+
+
+class RangedDownload:
+    """Download one Drive file over several connections with HTTP Range requests.
+
+    A file of the full size is preallocated and split into parts of
+    `part_size` bytes; each of up to `connections` threads fetches parts over
+    its own keep-alive connection and writes them at their offsets, so parts
+    may complete in any order. The MD5 of the result is checked against
+    `md5` when given. `on_progress(bytes_done, total_bytes)` is called as
+    parts land (serialized); an exception it raises, such as
+    TransferCancelled, stops the download and is re-raised by run().
+
+    Parts are written to a temporary file next to `destination`, which is
+    renamed into place only once the download is complete and checked; on
+    failure it is removed and `destination` is left as it was.
+
+    `size` and `md5` normally come from the file's cached metadata; without
+    a size the first part is fetched alone to learn it from Content-Range.
+    `http` (e.g. a transfer worker's client) carries the calling thread's
+    requests and stays open; extra connections are borrowed from `pool` and
+    returned to it, or opened just for this download without one. With an
+    `executor`, each GET is rate limited and retried on transient errors.
+    See https://developers.google.com/drive/api/guides/manage-downloads
+    """
+
+    def __init__(self, token_provider: Callable[[], str], file_id: str, destination: str,
+                 size: Optional[int] = None, md5: Optional[str] = None,
+                 part_size: int = DEFAULT_PART_SIZE, connections: int = DEFAULT_CONNECTIONS,
+                 files_url: str = FILES_URL,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 http: Optional[HttpClient] = None, pool: Optional[HttpPool] = None,
+                 executor: Optional[RequestExecutor] = None):
+        if part_size <= 0 or connections <= 0:
+            raise ValueError("part_size and connections must be positive")
+        self.token_provider = token_provider
+        self.url = f"{files_url}/{file_id}?alt=media"
+        self.destination = destination
+        directory, name = os.path.split(destination)
+        self.part_path = os.path.join(directory, f".{name}.{threading.get_ident()}.part")
+        self.size = size
+        self.md5 = md5
+        self.part_size = part_size
+        self.connections = connections
+        self.on_progress = on_progress
+        self.http = http
+        self.pool = pool or HttpPool(max_idle=0)
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.failed = threading.Event()
+        self.error: Optional[BaseException] = None
+        self.bytes_done = 0
+
+    def run(self) -> str:
+        """Download the file and return the destination path"""
+        try:
+            self._download()
+            self._finish()
+            os.replace(self.part_path, self.destination)
+        finally:
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+        return self.destination
+
+    def _download(self):
+        http = self.http or self.pool.acquire()
+        try:
+            start = 0
+            if self.size is None:
+                start = self._probe(http)
+                if start < 0:
+                    return  # the server sent the whole file
+            else:
+                self._preallocate(self.size)
+            parts = self._parts(start)
+            workers = [
+                threading.Thread(target=self._worker, args=(parts, self.pool.acquire(), True),
+                                 daemon=True)
+                for _ in range(min(self.connections, len(parts)) - 1)
+            ]
+            for worker in workers:
+                worker.start()
+            self._worker(parts, http, False)  # the calling thread is a connection too
+            for worker in workers:
+                worker.join()
+        finally:
+            if http is not self.http:
+                self.pool.release(http)
+        if self.error is not None:
+            raise self.error
+
+    def _probe(self, http: HttpClient) -> int:
+        """Fetch the first part to learn the size; returns where the rest starts, -1 if done"""
+        status, headers, data = self._get(http, f"bytes=0-{self.part_size - 1}")
+        if status == 416 and headers.get("content-range") == "bytes */0":
+            status, data = 200, b""  # an empty file has no first byte to ask for
+        if status == 200:
+            # Range not honoured: the body is the whole file
+            self.size = len(data)
+            self._preallocate(self.size)
+            self._write(data, 0)
+            return -1
+        total = headers.get("content-range", "").rsplit("/", 1)[-1]
+        if status != 206 or not total.isdigit():
+            raise DownloadError(f"HTTP {status}: {data[:200].decode('utf-8', 'replace')}")
+        self.size = int(total)
+        self._preallocate(self.size)
+        self._write(data, 0)
+        return len(data)
+
+    def _parts(self, start: int) -> List[Tuple[int, int]]:
+        return [(offset, min(offset + self.part_size, self.size) - 1)
+                for offset in range(start, self.size, self.part_size)]
+
+    def _preallocate(self, size: int):
+        with open(self.part_path, "wb") as fh:
+            try:
+                os.posix_fallocate(fh.fileno(), 0, size)
+            except (AttributeError, OSError):
+                fh.truncate(size)  # sparse where fallocate isn't available
+
+    def _worker(self, parts: List[Tuple[int, int]], http: HttpClient, owned: bool):
+        try:
+            with open(self.part_path, "r+b") as fh:
+                for first, last in self._claim(parts):
+                    status, headers, data = self._get(http, f"bytes={first}-{last}")
+                    content_range = headers.get("content-range", "")
+                    if status != 206 or not content_range.startswith(f"bytes {first}-"):
+                        raise DownloadError(
+                            f"HTTP {status} for bytes {first}-{last}: "
+                            f"{data[:200].decode('utf-8', 'replace')}"
+                        )
+                    if len(data) != last - first + 1:
+                        raise DownloadError(
+                            f"Short read for bytes {first}-{last}: {len(data)} bytes")
+                    fh.seek(first)
+                    fh.write(data)
+                    self._progress(len(data))
+        except BaseException as e:
+            http.close()  # a half-read response must not be reused
+            with self.lock:
+                if self.error is None:
+                    self.error = e
+            self.failed.set()
+        finally:
+            if owned:
+                self.pool.release(http)
+
+    def _claim(self, parts: List[Tuple[int, int]]) -> Iterator[Tuple[int, int]]:
+        """Hand out parts in order until none are left or a connection failed"""
+        while not self.failed.is_set():
+            with self.lock:
+                if not parts:
+                    return
+                part = parts.pop(0)
+            yield part
+
+    def _get(self, http: HttpClient, byte_range: str) -> Tuple[int, dict, bytes]:
+        def headers():
+            return {"Authorization": f"Bearer {self.token_provider()}", "Range": byte_range}
+
+        if self.executor is None:
+            return http.request("GET", self.url, headers=headers())
+        return self.executor.request("files.download", http, "GET", self.url, headers=headers)
+
+    def _write(self, data: bytes, offset: int):
+        with open(self.part_path, "r+b") as fh:
+            fh.seek(offset)
+            fh.write(data)
+        self._progress(len(data))
+
+    def _progress(self, count: int):
+        with self.lock:
+            self.bytes_done += count
+            if self.on_progress:
+                self.on_progress(self.bytes_done, self.size)
+
+    def _finish(self):
+        if self.md5 and file_md5(self.part_path) != self.md5:
+            raise DownloadError(f"Checksum mismatch for {os.path.basename(self.destination)}")
@@ -0,0 +1,154 @@
+import os
+import re
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .attachment_cache import file_md5
+from .database import DatabaseManager
+
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+# Drive accepts at most 100 calls per batch request
+BATCH_SIZE = 100
+DRIVE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{10,}")
+
+
+def is_drive_id(file_path: Optional[str]) -> bool:
+    """True if a materials.file_path holds a Drive file ID rather than a local path"""
+    return bool(file_path) and DRIVE_ID_PATTERN.fullmatch(file_path) is not None \
+        and not os.path.exists(file_path)
+
+
+class MetadataCache:
+    """Local store of Drive attachment metadata (name, size, mime type, checksum).
+
+    Rows are written when a file is uploaded and refreshed in batches once
+    they are older than `ttl`, so showing an attachment never waits on the
+    network.
+    """
+
+    def __init__(self, db: DatabaseManager, ttl: float = DEFAULT_TTL):
+        self.db = db
+        self.ttl = ttl
+        self.create_tables()
+
+    def create_tables(self):
+        with self.db.transaction() as conn:
+            # attachment_metadata itself comes from the database's MIGRATIONS
+            # Content hash -> Drive file lookups for upload deduplication
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_attachment_metadata_md5 "
+                "ON attachment_metadata(md5_checksum)"
+            )
+            # Local files already hashed, so unchanged files are not read again
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS local_file_hashes (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                md5 TEXT NOT NULL
+            )
+            ''')
+
+    def get(self, file_id: str) -> Optional[Dict]:
+        """Cached metadata in Drive's field names, or None; never touches the network"""
+        row = self.db.reader().execute(
+            "SELECT file_id, name, size, mime_type, md5_checksum, modified_time, fetched_at, "
+            "trashed FROM attachment_metadata WHERE file_id=?", (file_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        metadata = {
+            "id": row[0], "name": row[1], "mimeType": row[3],
+            "md5Checksum": row[4], "modifiedTime": row[5], "fetched_at": row[6],
+            "trashed": bool(row[7]),
+        }
+        if row[2] is not None:
+            metadata["size"] = str(row[2])
+        return {k: v for k, v in metadata.items() if v is not None}
+
+    def is_fresh(self, metadata: Optional[Dict]) -> bool:
+        return metadata is not None and time.time() - metadata["fetched_at"] < self.ttl
+
+    def put(self, metadata: Dict):
+        self.put_many([metadata])
+
+    def put_many(self, items: Iterable[Dict]):
+        now = time.time()
+        rows = [
+            (m["id"], m.get("name"), int(m["size"]) if m.get("size") is not None else None,
+             m.get("mimeType"), m.get("md5Checksum"), m.get("modifiedTime"), now,
+             int(bool(m.get("trashed"))))
+            for m in items
+        ]
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO attachment_metadata "
+                "(file_id, name, size, mime_type, md5_checksum, modified_time, fetched_at, trashed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def mark_trashed(self, file_id: str):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT INTO attachment_metadata (file_id, fetched_at, trashed) VALUES (?, ?, 1) "
+                "ON CONFLICT(file_id) DO UPDATE SET trashed=1, fetched_at=excluded.fetched_at",
+                (file_id, time.time())
+            )
+
+    def forget(self, file_id: str):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM attachment_metadata WHERE file_id=?", (file_id,))
+
+    def needs_refresh(self, file_ids: Iterable[str]) -> List[str]:
+        """IDs from `file_ids` that are missing or older than the TTL"""
+        file_ids = list(dict.fromkeys(file_ids))
+        cutoff = time.time() - self.ttl
+        fresh = set()
+        reader = self.db.reader()
+        for start in range(0, len(file_ids), 500):
+            chunk = file_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            fresh.update(row[0] for row in reader.execute(
+                f"SELECT file_id FROM attachment_metadata "
+                f"WHERE fetched_at >= ? AND file_id IN ({placeholders})",
+                [cutoff] + chunk
+            ))
+        return [file_id for file_id in file_ids if file_id not in fresh]
+
+    def refresh(self, file_ids: Iterable[str],
+                fetch_batch: Callable[[List[str]], Dict[str, Dict]]) -> Dict[str, Dict]:
+        """Fetch missing or stale entries `BATCH_SIZE` IDs per call and store them"""
+        stale = self.needs_refresh(file_ids)
+        fetched: Dict[str, Dict] = {}
+        for start in range(0, len(stale), BATCH_SIZE):
+            results = fetch_batch(stale[start:start + BATCH_SIZE])
+            self.put_many(results.values())
+            fetched.update(results)
+        return fetched
+
+    def find_by_checksum(self, md5: str, size: int) -> Optional[str]:
+        """ID of a known Drive file with exactly this content, if any"""
+        row = self.db.reader().execute(
+            "SELECT file_id FROM attachment_metadata "
+            "WHERE md5_checksum=? AND size=? AND trashed=0 "
+            "ORDER BY fetched_at DESC LIMIT 1", (md5, size)
+        ).fetchone()
+        return row[0] if row else None
+
+    def local_md5(self, path: str) -> str:
+        """MD5 of a local file, hashed in fixed-size blocks and memoized by size/mtime"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        row = self.db.reader().execute(
+            "SELECT md5 FROM local_file_hashes WHERE path=? AND size=? AND mtime=?",
+            (path, stat.st_size, stat.st_mtime)
+        ).fetchone()
+        if row:
+            return row[0]
+        md5 = file_md5(path)
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO local_file_hashes (path, size, mtime, md5) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime, md5)
+            )
+        return md5
@@ -0,0 +1,431 @@
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from datetime import datetime, timezone
+import googleapiclient
+import google.auth.credentials
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import DISCOVERY_URI, build, build_from_document
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+from .transfer_scheduler import TransferScheduler, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+from .request_executor import RequestExecutor
+from .upload_manager import HttpClient, HttpPool
+from .attachment_cache import drive_version
+from .download import DEFAULT_CONNECTIONS, DEFAULT_PART_SIZE, RangedDownload
+
+# If modifying these scopes, delete the file token.pickle.
+SCOPES = ['https://www.googleapis.com/auth/drive.file']
+TOKEN_FILE = 'token.pickle'
+# Folder ID and discovery document from earlier sessions, so connecting needs no round trips
+STATE_FILE = 'drive_state.json'
+REFRESH_MARGIN = 300  # refresh the access token this many seconds before it expires
+REFRESH_RETRY = 60
+FOLDER_NAME = "StudyMaterialManager"
+FILE_METADATA_FIELDS = 'id, name, mimeType, size, md5Checksum, modifiedTime'
+CHANGES_FIELDS = ('nextPageToken, newStartPageToken, changes(changeType, fileId, removed, '
+                  'file(id, name, mimeType, size, md5Checksum, modifiedTime, trashed))')
+TRANSFER_WORKERS = 4
+
+
+class SharedCredentials(google.auth.credentials.Credentials):
+    """Credentials that take their token from DriveService.
+
+    googleapiclient refreshes a service's credentials by itself when they
+    expire or a request gets a 401. Service objects are given these instead
+    of the shared Credentials, so every refresh happens under the service's
+    token lock. `token_source(stale_token)` returns (token, expiry).
+    """
+
+    def __init__(self, token_source):
+        super().__init__()
+        self.token_source = token_source
+
+    def refresh(self, request):
+        self.token, self.expiry = self.token_source(self.token)
+
+
+class DriveWorkerClient:
+    """Per-thread Drive clients; googleapiclient service objects are not thread-safe"""
+
+    def __init__(self, creds, discovery=None):
+        self.creds = creds
+        self.discovery = discovery
+        self._service = None
+        self.http = HttpClient()
+
+    @property
+    def service(self):
+        if self._service is None:
+            if self.discovery:
+                self._service = build_from_document(self.discovery, credentials=self.creds)
+            else:
+                self._service = build('drive', 'v3', credentials=self.creds, cache_discovery=False)
+        return self._service
+
+
+class DriveService:
+    """Google Drive access for the app.
+
+    Connecting normally makes no network calls: the token comes from
+    token.pickle and is refreshed on a background timer (an expired one is
+    refreshed in the background too), and the discovery document and folder
+    ID are reused from STATE_FILE when they belong to the same account and
+    client library version. The cached folder is checked in the background;
+    if it was deleted a new one is found or created and `on_folder_changed`
+    is called with its ID.
+
+    If a refresh is refused (the grant was revoked or has expired) the saved
+    token is deleted, every later token request raises, and `on_disconnected`
+    is called once with the error, on the thread that tried to refresh.
+    """
+
+    def __init__(self, credentials_file='credentials.json', transfer_workers=TRANSFER_WORKERS,
+                 download_connections=DEFAULT_CONNECTIONS, download_part_size=DEFAULT_PART_SIZE,
+                 executor=None, on_folder_changed=None, on_disconnected=None):
+        self.credentials_file = credentials_file
+        self.on_folder_changed = on_folder_changed
+        self.on_disconnected = on_disconnected
+        self.download_connections = download_connections
+        self.download_part_size = download_part_size
+        # Every Drive call goes through one executor: shared rate limit, retries and stats
+        self.executor = executor or RequestExecutor()
+        # Spare connections for parallel downloads, kept alive between files
+        self.http_pool = HttpPool(max_idle=transfer_workers * download_connections)
+        self.token_lock = threading.Lock()
+        self.refresh_timer = None
+        self.closed = False
+        self.disconnected = None
+        self.creds = self._get_credentials()
+        self.account = self._account_key(self.creds)
+        self.state = self._load_state()
+        self.discovery = self._discovery_document()
+        self.service = build_from_document(self.discovery,
+                                           credentials=SharedCredentials(self._current_token))
+        self.scheduler = TransferScheduler(self.new_worker_client, transfer_workers)
+        self.folder_id = self._cached_folder_id()
+        if self.folder_id is None:
+            self.folder_id = self._get_or_create_folder()
+            self._remember_folder(self.folder_id)
+        else:
+            self.scheduler.submit('metadata', 'folder check',
+                                  lambda client, transfer: self._verify_folder(client.service),
+                                  PRIORITY_BACKGROUND)
+        self._schedule_refresh()
+
+    def new_worker_client(self):
+        return DriveWorkerClient(SharedCredentials(self._current_token), self.discovery)
+
+    def _get_credentials(self):
+        creds = None
+        if os.path.exists(TOKEN_FILE):
+            with open(TOKEN_FILE, 'rb') as token:
+                creds = pickle.load(token)
+
+        if creds and creds.refresh_token:
+            # Even an expired token is usable: _schedule_refresh() renews it in the background,
+            # and if that is refused the service reports itself disconnected
+            return creds
+        if not creds or not creds.valid:
+            # Only needed for the one-time browser consent
+            from google_auth_oauthlib.flow import InstalledAppFlow
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, SCOPES)
+            creds = flow.run_local_server(port=0)
+            self._save_token(creds)
+        return creds
+
+    @staticmethod
+    def _save_token(creds):
+        temp_path = f'{TOKEN_FILE}.tmp'
+        with open(temp_path, 'wb') as token:
+            pickle.dump(creds, token)
+        os.replace(temp_path, TOKEN_FILE)
+
+    @staticmethod
+    def _account_key(creds):
+        """Identifies the signed-in account, so cached state of another one is ignored"""
+        identity = f'{getattr(creds, "client_id", "")}:{getattr(creds, "refresh_token", "")}'
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:16]
+
+    def _load_state(self):
+        try:
+            with open(STATE_FILE, encoding='utf-8') as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return {}
+        return state if isinstance(state, dict) else {}
+
+    def _save_state(self):
+        temp_path = f'{STATE_FILE}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as fh:
+            json.dump(self.state, fh)
+        os.replace(temp_path, STATE_FILE)
+
+    def _discovery_document(self):
+        """The Drive v3 discovery document, cached for this version of the client library"""
+        cached = self.state.get('discovery')
+        if (isinstance(cached, dict) and cached.get('client_version') == googleapiclient.__version__
+                and isinstance(cached.get('document'), dict)
+                and cached['document'].get('name') == 'drive'
+                and cached['document'].get('version') == 'v3'):
+            return cached['document']
+        # Recent client versions ship the document; older ones fetch it once here
+        get_static_doc = getattr(discovery_cache, 'get_static_doc', None)
+        content = get_static_doc('drive', 'v3') if get_static_doc else None
+        if content is None:
+            http = self.http_pool.acquire()
+            try:
+                status, _, content = self.executor.request(
+                    'discovery', http, 'GET', DISCOVERY_URI.format(api='drive', apiVersion='v3'))
+            finally:
+                self.http_pool.release(http)
+            if status != 200:
+                raise RuntimeError(f'Fetching the Drive discovery document failed: HTTP {status}')
+        document = json.loads(content)
+        self.state['discovery'] = {'client_version': googleapiclient.__version__,
+                                   'document': document}
+        self._save_state()
+        return document
+
+    def _cached_folder_id(self):
+        folder = self.state.get('folder')
+        if (isinstance(folder, dict) and folder.get('account') == self.account
+                and folder.get('name') == FOLDER_NAME and folder.get('id')):
+            return folder['id']
+        return None
+
+    def _remember_folder(self, folder_id):
+        self.state['folder'] = {'account': self.account, 'name': FOLDER_NAME, 'id': folder_id}
+        self._save_state()
+
+    def _verify_folder(self, service):
+        """Replace the cached folder if it was deleted or trashed since it was cached"""
+        try:
+            folder = self.executor.call('files.get', service.files().get(
+                fileId=self.folder_id, fields='id, trashed').execute)
+            if not folder.get('trashed'):
+                return self.folder_id
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+        self.folder_id = self._get_or_create_folder(service)
+        self._remember_folder(self.folder_id)
+        if self.on_folder_changed:
+            self.on_folder_changed(self.folder_id)
+        return self.folder_id
+
+    def _schedule_refresh(self, delay=None):
+        """Refresh the access token on a timer, REFRESH_MARGIN seconds before it expires"""
+        if self.closed or not self.creds.refresh_token:
+            return
+        if delay is None:
+            if self.creds.expiry is None:
+                if self.creds.valid:
+                    return  # a token without an expiry never needs refreshing
+                delay = 0
+            else:
+                # google-auth keeps expiry as a naive UTC datetime
+                now = datetime.now(timezone.utc).replace(tzinfo=None)
+                delay = max(0, (self.creds.expiry - now).total_seconds() - REFRESH_MARGIN)
+        self.refresh_timer = threading.Timer(delay, self._refresh_token)
+        self.refresh_timer.daemon = True
+        self.refresh_timer.start()
+
+    def _refresh_token(self):
+        try:
+            with self.token_lock:
+                self._refresh_locked()
+        except Exception:
+            if self.disconnected is None:
+                # Offline or a transient error; get_access_token() still refreshes on demand
+                self._schedule_refresh(REFRESH_RETRY)
+            return
+        self._schedule_refresh()
+
+    def _refresh_locked(self):
+        """Refresh the shared credentials; the caller holds token_lock"""
+        if self.disconnected is not None:
+            raise self.disconnected
+        try:
+            self.creds.refresh(Request())
+        except RefreshError as e:
+            if getattr(e, 'retryable', False):
+                raise
+            # Retrying can't help: forget the token so the next connect asks for consent
+            self.disconnected = e
+            try:
+                os.remove(TOKEN_FILE)
+            except OSError:
+                pass
+            if self.on_disconnected:
+                self.on_disconnected(e)
+            raise
+        self._save_token(self.creds)
+
+    def _current_token(self, stale_token=None):
+        """(token, expiry), refreshed first if expired or if `stale_token` is still current"""
+        with self.token_lock:
+            if not self.creds.valid or (stale_token and self.creds.token == stale_token):
+                self._refresh_locked()
+            return self.creds.token, self.creds.expiry
+
+    def _get_or_create_folder(self, service=None):
+        """Check if 'StudyMaterialManager' folder exists and return its ID, or create it."""
+        service = service or self.service
+        response = self.executor.call('files.list', service.files().list(
+            q=f"name='{FOLDER_NAME}' and mimeType='application/vnd.google-apps.folder' and trashed=false",
+            spaces='drive',
+            fields='files(id, name)'
+        ).execute)
+        
+        if response.get('files'):
+            return response.get('files')[0].get('id')
+        else:
+            file_metadata = {
+                'name': FOLDER_NAME,
+                'mimeType': 'application/vnd.google-apps.folder'
+            }
+            folder = self.executor.call(
+                'files.create', service.files().create(body=file_metadata, fields='id').execute)
+            return folder.get('id')
+
+    def upload_file(self, file_path, file_name, service=None):
+        file_metadata = {
+            'name': file_name,
+            'parents': [self.folder_id]
+        }
+        media = MediaFileUpload(file_path, mimetype='application/octet-stream')
+        file = self.executor.call('files.create', (service or self.service).files().create(
+            body=file_metadata, media_body=media, fields='id').execute)
+        return file.get('id')
+
+    def download_file(self, file_id, destination_path, client=None, transfer=None,
+                      size=None, md5=None):
+        """Download over parallel ranged GETs, reporting progress to `transfer` if given"""
+        download = RangedDownload(
+            self.get_access_token, file_id, destination_path,
+            size=int(size) if size is not None else None, md5=md5,
+            part_size=self.download_part_size, connections=self.download_connections,
+            on_progress=transfer.update if transfer else None,
+            http=client.http if client else None, pool=self.http_pool, executor=self.executor
+        )
+        return download.run()
+
+    def submit_upload(self, file_path, file_name, priority=PRIORITY_BACKGROUND,
+                      on_progress=None, on_done=None):
+        """Queue an upload on the transfer pool; the result is the new file ID"""
+        return self.scheduler.submit(
+            'upload', file_name,
+            lambda client, transfer: self.upload_file(file_path, file_name, client.service),
+            priority, on_progress, on_done
+        )
+
+    def submit_download(self, file_id, destination_path, priority=PRIORITY_INTERACTIVE,
+                        on_progress=None, on_done=None):
+        """Queue a download on the transfer pool; defaults to jumping ahead of uploads"""
+        return self.scheduler.submit(
+            'download', os.path.basename(destination_path),
+            lambda client, transfer: self.download_file(
+                file_id, destination_path, client, transfer),
+            priority, on_progress, on_done
+        )
+
+    def submit_open(self, file_id, cache, priority=PRIORITY_INTERACTIVE,
+                    on_progress=None, on_done=None, metadata_cache=None):
+        """Resolve a Drive file to a local path through the attachment cache.
+
+        The current version comes from `metadata_cache` while it is fresh and is
+        looked up on Drive otherwise; a cached copy of that version is returned
+        without downloading. The result is the local path.
+        """
+        def work(client, transfer):
+            metadata = metadata_cache.get(file_id) if metadata_cache else None
+            if not (metadata_cache and metadata_cache.is_fresh(metadata)):
+                metadata = self.get_file_metadata(file_id, client.service)
+                if metadata_cache:
+                    metadata_cache.put(metadata)
+            # The cache verifies the checksum, so the download doesn't hash the file too
+            return cache.fetch(
+                file_id, drive_version(metadata), metadata.get('name') or file_id,
+                lambda temp_path: self.download_file(file_id, temp_path, client, transfer,
+                                                     size=metadata.get('size')),
+                expected_md5=metadata.get('md5Checksum')
+            )
+        return self.scheduler.submit('download', file_id, work, priority, on_progress, on_done)
+
+    def transfer_stats(self):
+        return self.scheduler.stats()
+
+    def request_stats(self):
+        """Per-endpoint call counts, retries and latency from the request executor"""
+        return self.executor.stats()
+
+    def close(self):
+        self.closed = True
+        if self.refresh_timer is not None:
+            self.refresh_timer.cancel()
+        self.scheduler.shutdown()
+        self.http_pool.close()
+
+    def get_access_token(self):
+        """Return a valid OAuth access token for raw HTTP calls, refreshing if needed"""
+        return self._current_token()[0]
+
+    def get_file_metadata(self, file_id, service=None):
+        return self.executor.call('files.get', (service or self.service).files().get(
+            fileId=file_id, fields=FILE_METADATA_FIELDS).execute)
+
+    def get_files_metadata(self, file_ids, service=None):
+        """Fetch metadata for many files in one batch HTTP request; returns {id: metadata}"""
+        service = service or self.service
+        results = {}
+
+        def callback(request_id, response, exception):
+            # Missing or inaccessible files are left out of the result
+            if exception is None:
+                results[request_id] = response
+
+        batch = service.new_batch_http_request(callback=callback)
+        for file_id in file_ids:
+            batch.add(service.files().get(fileId=file_id, fields=FILE_METADATA_FIELDS),
+                      request_id=file_id)
+        self.executor.call('files.batchGet', batch.execute)
+        return results
+
+    def submit_metadata_refresh(self, file_ids, metadata_cache, priority=PRIORITY_BACKGROUND,
+                                on_done=None):
+        """Fill in missing or stale cached metadata for `file_ids` using batch requests"""
+        return self.scheduler.submit(
+            'metadata', f'{len(file_ids)} files',
+            lambda client, transfer: metadata_cache.refresh(
+                file_ids, lambda batch: self.get_files_metadata(batch, client.service)),
+            priority, on_done=on_done
+        )
+
+    def get_start_page_token(self, service=None):
+        response = self.executor.call(
+            'changes.getStartPageToken',
+            (service or self.service).changes().getStartPageToken().execute)
+        return response.get('startPageToken')
+
+    def list_changes(self, page_token, service=None):
+        """One page of the Changes feed starting at `page_token`"""
+        return self.executor.call('changes.list', (service or self.service).changes().list(
+            pageToken=page_token,
+            spaces='drive',
+            pageSize=1000,
+            includeRemoved=True,
+            fields=CHANGES_FIELDS
+        ).execute)
+
+    def get_file_name(self, file_id):
+        file_metadata = self.executor.call(
+            'files.get', self.service.files().get(fileId=file_id, fields='name').execute)
+        return file_metadata.get('name')
@@ -0,0 +1,139 @@
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .attachment_cache import AttachmentCache, drive_version
+from .database import DatabaseManager
+from .drive_metadata import MetadataCache
+
+DEFAULT_SYNC_INTERVAL = 5 * 60  # seconds
+PAGE_TOKEN_KEY = "changes_page_token"
+
+
+class SyncEngine:
+    """Incremental Drive sync driven by the Changes API.
+
+    The `startPageToken` is stored in the `sync_state` table; each sync pulls
+    only the changes since that token, updates cached attachment metadata
+    (renames, new content, trashing) and drops cached downloads whose content
+    changed. `get_start_token()` and `list_changes(token)` wrap the Drive
+    calls, so a recorded or fake feed can be swapped in.
+    """
+
+    def __init__(self, db: DatabaseManager, metadata_cache: MetadataCache,
+                 attachment_cache: Optional[AttachmentCache],
+                 get_start_token: Callable[[], str],
+                 list_changes: Callable[[str], Dict],
+                 interval: float = DEFAULT_SYNC_INTERVAL,
+                 on_changes: Optional[Callable[[List[str]], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        self.metadata_cache = metadata_cache
+        self.attachment_cache = attachment_cache
+        self.get_start_token = get_start_token
+        self.list_changes = list_changes
+        self.interval = interval
+        self.on_changes = on_changes
+        self.on_error = on_error
+        self.db = db
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.create_tables()
+
+    def create_tables(self):
+        with self.db.transaction() as conn:
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            ''')
+
+    @property
+    def page_token(self) -> Optional[str]:
+        row = self.db.reader().execute(
+            "SELECT value FROM sync_state WHERE key=?", (PAGE_TOKEN_KEY,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _save_token(self, token: str):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)",
+                (PAGE_TOKEN_KEY, token)
+            )
+
+    def sync_once(self) -> List[str]:
+        """Apply all changes since the stored token; returns the changed file IDs.
+
+        The first run only records the current token: metadata for existing
+        attachments is filled by the batch metadata refresh instead.
+        """
+        token = self.page_token
+        if token is None:
+            self._save_token(self.get_start_token())
+            return []
+
+        changed: List[str] = []
+        while token:
+            response = self.list_changes(token)
+            for change in response.get("changes", []):
+                file_id = self._apply(change)
+                if file_id:
+                    changed.append(file_id)
+            if response.get("newStartPageToken"):
+                # End of the feed; this is where the next sync starts
+                self._save_token(response["newStartPageToken"])
+                break
+            token = response.get("nextPageToken")
+            if token:
+                # Persist per page so an interrupted sync does not replay it
+                self._save_token(token)
+        return changed
+
+    def _apply(self, change: Dict) -> Optional[str]:
+        file_id = change.get("fileId") or change.get("file", {}).get("id")
+        if not file_id or change.get("changeType", "file") != "file":
+            return None
+        resource = change.get("file") or {}
+        if resource.get("mimeType") == "application/vnd.google-apps.folder":
+            return None
+
+        if change.get("removed") or resource.get("trashed"):
+            self.metadata_cache.mark_trashed(file_id)
+            if self.attachment_cache:
+                self.attachment_cache.invalidate(file_id)
+            return file_id
+
+        resource = dict(resource, id=file_id)
+        self.metadata_cache.put(resource)
+        if self.attachment_cache:
+            # Keep only the copy matching the file's current content
+            self.attachment_cache.invalidate(file_id, keep_version=drive_version(resource))
+        return file_id
+
+    def start(self):
+        """Sync now and then every `interval` seconds on a background thread"""
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        try:
+            while not self.stopped.is_set():
+                try:
+                    changed = self.sync_once()
+                    if changed and self.on_changes:
+                        self.on_changes(changed)
+                except Exception as e:
+                    if self.on_error:
+                        self.on_error(e)
+                self.stopped.wait(self.interval)
+        finally:
+            self.db.release_reader()
@@ -0,0 +1,238 @@
+import concurrent.futures
+import multiprocessing
+import os
+import sqlite3
+import threading
+import zipfile
+from datetime import datetime
+from typing import Callable, List, Optional, Set, Tuple
+from xml.etree import ElementTree
+
+from .attachment_cache import AttachmentCache, drive_version
+from .database import DatabaseManager
+from .drive_metadata import MetadataCache, is_drive_id
+
+try:
+    import pypdf
+except ImportError:  # PDF attachments are simply not indexed without it
+    pypdf = None
+
+MAX_TEXT_CHARS = 1_000_000
+# Worker processes are shut down after this long without a scan and respawned
+# by the next one
+POOL_IDLE_SECONDS = 60.0
+TEXT_EXTENSIONS = {"txt", "md", "markdown", "rst", "tex", "csv", "tsv", "org"}
+DOCX_TEXT = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t"
+DOCX_PARAGRAPH = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p"
+
+
+def supported_extensions() -> Set[str]:
+    return TEXT_EXTENSIONS | {"docx"} | ({"pdf"} if pypdf else set())
+
+
+def extract_text(path: str, name: Optional[str] = None) -> str:
+    """Plain text of a TXT/Markdown, DOCX or PDF file; '' for other types.
+
+    `name` decides the type when `path` has no meaningful extension (cached
+    Drive downloads). Runs in worker processes, so it must stay a module-level
+    function.
+    """
+    extension = os.path.splitext(name or path)[1].lower().lstrip(".")
+    if extension in TEXT_EXTENSIONS:
+        with open(path, encoding="utf-8", errors="replace") as fh:
+            return fh.read(MAX_TEXT_CHARS)
+    if extension == "docx":
+        return _docx_text(path)
+    if extension == "pdf" and pypdf is not None:
+        return _pdf_text(path)
+    return ""
+
+
+def _docx_text(path: str) -> str:
+    with zipfile.ZipFile(path) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs, size = [], 0
+    for paragraph in root.iter(DOCX_PARAGRAPH):
+        text = "".join(node.text or "" for node in paragraph.iter(DOCX_TEXT))
+        paragraphs.append(text)
+        size += len(text) + 1
+        if size >= MAX_TEXT_CHARS:
+            break
+    return "\n".join(paragraphs)[:MAX_TEXT_CHARS]
+
+
+def _pdf_text(path: str) -> str:
+    pages, size = [], 0
+    for page in pypdf.PdfReader(path).pages:
+        text = page.extract_text() or ""
+        pages.append(text)
+        size += len(text) + 1
+        if size >= MAX_TEXT_CHARS:
+            break
+    return "\n".join(pages)[:MAX_TEXT_CHARS]
+
+
+def _extract_or_empty(path: str, name: str) -> str:
+    # A corrupt or encrypted file is recorded as empty so it isn't retried until it changes
+    try:
+        return extract_text(path, name)
+    except Exception:
+        return ""
+
+
+class TextIndexer:
+    """Extract text from attachments in a process pool and index it for search.
+
+    Local attachments and Drive attachments that are in the download cache
+    are considered. Each material's text is stored in `attachment_text` with
+    the MD5 of the file it came from; a scan only extracts files whose hash
+    changed, so re-scanning is cheap. Hashes of local files are memoized by
+    the MetadataCache, Drive files use the checksum Drive reports.
+    """
+
+    def __init__(self, db: DatabaseManager, metadata_cache: MetadataCache,
+                 attachment_cache: Optional[AttachmentCache] = None,
+                 workers: Optional[int] = None, batch_size: int = 50,
+                 on_indexed: Optional[Callable[[int], None]] = None):
+        self.metadata_cache = metadata_cache
+        self.attachment_cache = attachment_cache
+        self.workers = workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.batch_size = batch_size
+        self.on_indexed = on_indexed
+        self.db = db
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def start(self):
+        """Index in the background now and whenever request_scan() is called"""
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self.wakeup.set()
+
+    def request_scan(self):
+        self.wakeup.set()
+
+    def stop(self):
+        self.running = False
+        self.stopping.set()
+        self.wakeup.set()
+        self._shutdown_pool(wait=False, cancel_futures=True)
+
+    def close(self):
+        self.stop()
+
+    def _run(self):
+        try:
+            while self.running:
+                self.wakeup.clear()
+                try:
+                    indexed = self.index_pending()
+                except sqlite3.ProgrammingError:
+                    return  # the database was closed while indexing
+                if indexed and self.on_indexed:
+                    self.on_indexed(indexed)
+                if self.pool is not None and not self.wakeup.wait(POOL_IDLE_SECONDS):
+                    self._shutdown_pool()
+                self.wakeup.wait()
+        finally:
+            self.db.release_reader()
+
+    def _shutdown_pool(self, **kwargs):
+        pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(**kwargs)
+
+    def pending(self) -> List[Tuple[int, str, str, str]]:
+        """(material_id, path, name, md5) of attachments whose text is missing or stale.
+
+        Text that no longer matches the material's attachment (removed, replaced,
+        missing, trashed or of a type that isn't indexed) is deleted, so search
+        never matches a file the material doesn't have.
+        """
+        extensions = supported_extensions()
+        rows = self.db.reader().execute(
+            "SELECT m.id, m.file_path, t.source_md5 FROM materials m "
+            "JOIN attachment_text t ON t.material_id = m.id "
+            "WHERE m.file_path IS NULL OR m.file_path = '' "
+            "UNION ALL "
+            "SELECT m.id, m.file_path, t.source_md5 FROM materials m "
+            "LEFT JOIN attachment_text t ON t.material_id = m.id "
+            "WHERE m.file_path IS NOT NULL AND m.file_path != ''"
+        ).fetchall()
+
+        pending, stale = [], []
+        for material_id, file_path, indexed_md5 in rows:
+            md5 = None  # of the current attachment, if it can be indexed
+            if not file_path:
+                pass
+            elif is_drive_id(file_path):
+                metadata = self.metadata_cache.get(file_path)
+                name = (metadata.get("name") or "") if metadata else ""
+                if metadata and not metadata.get("trashed") and self._extension(name) in extensions:
+                    md5 = metadata.get("md5Checksum")
+                if md5 and md5 != indexed_md5 and self.attachment_cache is not None:
+                    cached = self.attachment_cache.lookup(file_path, drive_version(metadata))
+                    if cached is not None:
+                        pending.append((material_id, str(cached), name, md5))
+            elif self._extension(file_path) in extensions:
+                try:
+                    md5 = self.metadata_cache.local_md5(file_path)
+                except OSError:
+                    pass  # attachment missing on this machine
+                else:
+                    if md5 != indexed_md5:
+                        pending.append((material_id, file_path, os.path.basename(file_path), md5))
+            if indexed_md5 is not None and md5 != indexed_md5:
+                stale.append((material_id,))
+        if stale:
+            with self.db.transaction() as conn:
+                conn.executemany("DELETE FROM attachment_text WHERE material_id=?", stale)
+        return pending
+
+    @staticmethod
+    def _extension(name: str) -> str:
+        return os.path.splitext(name)[1].lower().lstrip(".")
+
+    def index_pending(self) -> int:
+        """Extract and store text for every pending attachment; returns how many"""
+        pending = self.pending()
+        if not pending:
+            return 0
+        pool = self.pool
+        if pool is None:
+            # Spawned, not forked: the parent runs Tk and SQLite threads
+            pool = self.pool = concurrent.futures.ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        futures = {
+            pool.submit(_extract_or_empty, path, name): (material_id, md5)
+            for material_id, path, name, md5 in pending
+        }
+        batch, indexed = [], 0
+        for future in concurrent.futures.as_completed(futures):
+            if self.stopping.is_set():
+                break
+            material_id, md5 = futures[future]
+            batch.append((material_id, md5, future.result()))
+            if len(batch) >= self.batch_size:
+                indexed += self._store(batch)
+                batch = []
+        return indexed + (self._store(batch) if batch else 0)
+
+    def _store(self, batch: List[Tuple[int, str, str]]) -> int:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        with self.db.transaction() as conn:
+            # An upsert (not REPLACE) so the update trigger keeps attachment_fts in sync
+            conn.executemany(
+                "INSERT INTO attachment_text (material_id, source_md5, text, extracted_at) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM materials WHERE id = ?) "
+                "ON CONFLICT(material_id) DO UPDATE SET source_md5=excluded.source_md5, "
+                "text=excluded.text, extracted_at=excluded.extracted_at",
+                [(material_id, md5, text, now, material_id) for material_id, md5, text in batch]
+            )
+        return len(batch)
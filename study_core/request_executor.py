@@ -0,0 +1,203 @@
+import email.utils
+import http.client
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Transient responses: rate limiting and server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Drive also reports quota exhaustion as 403 with one of these reasons
+RATE_LIMIT_REASONS = (b"rateLimitExceeded", b"userRateLimitExceeded")
+DEFAULT_RATE = 10.0  # requests per second, well under Drive's per-user quota
+DEFAULT_BURST = 20
+DEFAULT_ATTEMPTS = 6
+BASE_DELAY = 0.5
+MAX_DELAY = 32.0
+LATENCY_SAMPLES = 256  # per endpoint, for the percentiles in stats()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def is_retryable_status(status: int, body: bytes = b"") -> bool:
+    return status in RETRY_STATUSES or (
+        status == 403 and any(reason in body for reason in RATE_LIMIT_REASONS)
+    )
+
+
+class RetryableError(Exception):
+    """A transient failure; raised inside RequestExecutor.call() to have it retried"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def classify(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """(retryable, Retry-After seconds) for an exception raised by a Drive call"""
+    if isinstance(error, RetryableError):
+        return True, error.retry_after
+    resp = getattr(error, "resp", None)
+    if resp is not None and hasattr(resp, "status"):
+        # googleapiclient.errors.HttpError; resp is an httplib2 response (a dict of headers)
+        return (is_retryable_status(resp.status, getattr(error, "content", b"") or b""),
+                parse_retry_after(resp.get("retry-after")))
+    status = getattr(error, "status", None)
+    if isinstance(status, int):
+        # UploadError and friends
+        return (is_retryable_status(status, str(error).encode("utf-8", "replace")),
+                getattr(error, "retry_after", None))
+    return isinstance(error, (ConnectionError, TimeoutError, http.client.HTTPException)), None
+
+
+class TokenBucket:
+    """Thread-safe rate limiter: `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST):
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+        self.rate = rate
+        self.capacity = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self) -> float:
+        """Take a token, sleeping until it is due; returns the seconds waited"""
+        with self.lock:
+            self._refill(time.monotonic())
+            # Tokens may go negative: each caller reserves its slot and waits for it
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        """Hold everyone back for `seconds` (e.g. after Drive sent Retry-After)"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class RequestExecutor:
+    """Run Drive requests with a shared rate limit, retries and per-endpoint stats.
+
+    Each attempt first takes a token from the TokenBucket, so one executor
+    shared by every thread keeps the whole app under the quota. Transient
+    failures (429, 5xx, Drive's 403 rate-limit errors, dropped connections)
+    are retried up to `attempts` times in total with full-jitter exponential
+    backoff. A Retry-After header sets the minimum wait and pauses the bucket
+    for every other caller too, since the quota is per user.
+    """
+
+    def __init__(self, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 attempts: int = DEFAULT_ATTEMPTS, base_delay: float = BASE_DELAY,
+                 max_delay: float = MAX_DELAY, sleep: Callable[[float], None] = time.sleep):
+        self.bucket = TokenBucket(rate, burst)
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.lock = threading.Lock()
+        self.endpoints: Dict[str, dict] = {}
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number `attempt` (0-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, endpoint: str, fn: Callable[[], Any]) -> Any:
+        """Return fn(), retrying it while it raises transient errors"""
+        start = time.perf_counter()
+        retries = 0
+        throttled = 0.0
+        failed = True
+        try:
+            for attempt in itertools.count():
+                throttled += self.bucket.acquire()
+                try:
+                    result = fn()
+                    failed = False
+                    return result
+                except Exception as e:
+                    retryable, retry_after = classify(e)
+                    if not retryable or attempt + 1 >= self.attempts:
+                        raise
+                if retry_after:
+                    # The next acquire() waits out Retry-After, here and in other threads
+                    self.bucket.pause(retry_after)
+                retries += 1
+                self.sleep(self.backoff(attempt))
+        finally:
+            self._record(endpoint, time.perf_counter() - start, retries, throttled, failed)
+
+    def request(self, endpoint: str, client, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Callable[[], Dict[str, str]]] = None
+                ) -> Tuple[int, Dict[str, str], bytes]:
+        """client.request() (an HttpClient) with retries on transient statuses.
+
+        `headers` is a callable so each attempt gets a fresh access token.
+        Once the attempts are used up the last response is returned as is.
+        """
+        remaining = [self.attempts]
+
+        def attempt():
+            remaining[0] -= 1
+            response = client.request(method, url, body, headers() if headers else None)
+            status, response_headers, data = response
+            if remaining[0] > 0 and is_retryable_status(status, data):
+                raise RetryableError(f"HTTP {status}",
+                                     parse_retry_after(response_headers.get("retry-after")))
+            return response
+
+        return self.call(endpoint, attempt)
+
+    def _record(self, endpoint: str, elapsed: float, retries: int, throttled: float, failed: bool):
+        with self.lock:
+            entry = self.endpoints.get(endpoint)
+            if entry is None:
+                entry = self.endpoints[endpoint] = {
+                    "calls": 0, "retries": 0, "errors": 0, "throttled_s": 0.0,
+                    "latencies": deque(maxlen=LATENCY_SAMPLES),
+                }
+            entry["calls"] += 1
+            entry["retries"] += retries
+            entry["errors"] += failed
+            entry["throttled_s"] += throttled
+            entry["latencies"].append(elapsed)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per endpoint: calls, retries, errors, time spent rate-limited and latency percentiles"""
+        with self.lock:
+            result = {}
+            for endpoint, entry in self.endpoints.items():
+                latencies = sorted(entry["latencies"])
+                result[endpoint] = {
+                    "calls": entry["calls"],
+                    "retries": entry["retries"],
+                    "errors": entry["errors"],
+                    "throttled_s": entry["throttled_s"],
+                    "p50_ms": latencies[len(latencies) // 2] * 1000,
+                    "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+                    "max_ms": latencies[-1] * 1000,
+                }
+            return result
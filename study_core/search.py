@@ -0,0 +1,252 @@
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .database import DatabaseManager, SNIPPET_END, SNIPPET_START
+
+# What the materials list keeps per row (see MaterialRow)
+ROW_COLUMNS = ("id", "title", "tags", "file_path", "last_modified")
+
+class SearchWorker:
+    """Run searches on a background thread with its own read connection.
+
+    Only the most recent query matters: submitting a new one interrupts the
+    query in flight, and results of superseded queries are dropped.
+    """
+
+    def __init__(self, db: DatabaseManager, on_results: Callable[[int, str, int, Tuple[List[Tuple], Optional[tuple]]], None],
+                 page_size: int = 200):
+        self.db = db
+        self.on_results = on_results
+        self.page_size = page_size
+        self.generation = 0
+        self.pending: Optional[Tuple[str, Tuple[str, ...], bool]] = None
+        self.cond = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, query: str, tags: Sequence[str] = (), match_any: bool = False) -> int:
+        """Queue a query, superseding any earlier one; returns its generation"""
+        with self.cond:
+            self.generation += 1
+            self.pending = (query, tuple(tags), match_any)
+            self.cond.notify()
+            return self.generation
+
+    def is_current(self, generation: int) -> bool:
+        return generation == self.generation
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.generation += 1
+            self.cond.notify()
+
+    def _run(self):
+        # SQLite polls this during long queries; non-zero aborts the statement
+        active = [0]
+        self.db.reader().set_progress_handler(lambda: active[0] != self.generation, 1000)
+        try:
+            while True:
+                with self.cond:
+                    while self.running and self.pending is None:
+                        self.cond.wait()
+                    if not self.running:
+                        return
+                    (query, tags, match_any), self.pending = self.pending, None
+                    active[0] = self.generation
+                try:
+                    total = self.db.count_materials(query, tags, match_any)
+                    first_page = self.db.page_materials(query, limit=self.page_size,
+                                                        columns=ROW_COLUMNS, tags=tags,
+                                                        match_any=match_any)
+                except sqlite3.OperationalError:
+                    continue  # interrupted by a newer query
+                if self.is_current(active[0]):
+                    self.on_results(active[0], query, total, first_page)
+        finally:
+            self.db.release_reader()
+
+class MaterialRow:
+    """One row of the materials list: the ROW_COLUMNS of a material.
+
+    Slotted, with repeated tag strings interned, since a list keeps
+    thousands of these.
+    """
+    __slots__ = ("id", "title", "tags", "file_path", "modified")
+
+    def __init__(self, material_id: int, title: str, tags: Optional[str],
+                 file_path: Optional[str], modified: int):
+        self.id = material_id
+        self.title = title
+        self.tags = sys.intern(tags) if tags else ""
+        self.file_path = file_path or ""
+        self.modified = modified
+
+class LabelCache:
+    """Memo of list display strings by material ID.
+
+    Shared by successive MaterialPagers, so a refresh only formats rows that
+    changed. A label is reused while the row's last_modified is unchanged;
+    call invalidate() when a material is edited or deleted. The least
+    recently used labels are evicted past `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self.labels: "OrderedDict[int, Tuple[int, str]]" = OrderedDict()
+
+    def label(self, row: MaterialRow) -> str:
+        entry = self.labels.get(row.id)
+        if entry is not None and entry[0] == row.modified:
+            self.labels.move_to_end(row.id)
+            return entry[1]
+        text = format_label(row.title, row.tags, row.modified)
+        self.labels[row.id] = (row.modified, text)
+        self.labels.move_to_end(row.id)
+        if len(self.labels) > self.max_entries:
+            self.labels.popitem(last=False)
+        return text
+
+    def invalidate(self, material_id: int):
+        self.labels.pop(material_id, None)
+
+class MaterialPager:
+    """Sequence view over search results that loads rows a page at a time.
+
+    Rows are MaterialRow objects. Consecutive pages are fetched with keyset
+    cursors; only a jump into the middle of the list falls back to an
+    OFFSET query. A bounded number of pages are kept, and display strings
+    come from a LabelCache that is filled the first time a row is drawn.
+    `first_page`, if given, is a page_materials() result over ROW_COLUMNS.
+    After a material changes, splice() patches the loaded pages in place.
+    """
+
+    def __init__(self, db: DatabaseManager, query: str = "", total: Optional[int] = None,
+                 first_page: Optional[Tuple[List[Tuple], Optional[tuple]]] = None,
+                 page_size: int = 200, max_pages: int = 20, tags: Sequence[str] = (),
+                 match_any: bool = False, labels: Optional[LabelCache] = None):
+        self.db = db
+        self.query = query
+        self.filters = {"tags": tuple(tags), "match_any": match_any}
+        self.ranked = db.is_ranked(query)
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.total = db.count_materials(query, **self.filters) if total is None else total
+        self.pages: "OrderedDict[int, List[MaterialRow]]" = OrderedDict()
+        self.labels = labels if labels is not None else LabelCache()
+        self.cursors: Dict[int, Optional[tuple]] = {}
+        if first_page is not None:
+            self._store(0, *first_page)
+
+    def __len__(self) -> int:
+        return self.total
+
+    def __getitem__(self, index: int) -> MaterialRow:
+        if not 0 <= index < self.total:
+            raise IndexError(index)
+        page, slot = divmod(index, self.page_size)
+        return self._page(page)[slot]
+
+    def display(self, index: int) -> str:
+        """Formatted list line for a row"""
+        page, slot = divmod(index, self.page_size)
+        return self.labels.label(self._page(page)[slot])
+
+    def find(self, material_id: int) -> Optional[int]:
+        """Index of a material among the loaded rows, or None"""
+        for page, rows in self.pages.items():
+            for slot, row in enumerate(rows):
+                if row.id == material_id:
+                    return page * self.page_size + slot
+        return None
+
+    def splice(self, removed: Optional[int] = None, inserted: Optional[int] = None,
+               row: Optional[Tuple] = None):
+        """Patch the loaded pages for one change instead of fetching them again.
+
+        Drops the row at index `removed`, then puts `row` (ROW_COLUMNS) at
+        index `inserted` of the resulting order. Pages left with a gap are
+        dropped and fetched again when next drawn.
+        """
+        known = {page * self.page_size + slot: item
+                 for page, rows in self.pages.items() for slot, item in enumerate(rows)}
+        if removed is not None:
+            known = {index - 1 if index > removed else index: item
+                     for index, item in known.items() if index != removed}
+            self.total -= 1
+        if inserted is not None:
+            known = {index + 1 if index >= inserted else index: item for index, item in known.items()}
+            known[inserted] = MaterialRow(*row)
+            self.total += 1
+
+        pages, self.pages = self.pages, OrderedDict()
+        cursors, self.cursors = self.cursors, {}
+        for page, old_rows in pages.items():
+            start = page * self.page_size
+            rows = [known.get(index) for index in range(start, min(start + self.page_size, self.total))]
+            if not rows or None in rows:
+                continue
+            self.pages[page] = rows
+            if len(rows) < self.page_size:
+                self.cursors[page] = None  # last page
+            elif len(rows) == len(old_rows) and all(a is b for a, b in zip(rows, old_rows)):
+                self.cursors[page] = cursors.get(page)
+            elif not self.ranked:
+                self.cursors[page] = (rows[-1].modified, rows[-1].id)
+            # A relevance cursor holds the bm25 score, which rows don't keep:
+            # the next page is fetched by offset instead
+
+    def _page(self, page: int) -> List[MaterialRow]:
+        if page in self.pages:
+            self.pages.move_to_end(page)
+            return self.pages[page]
+        after = self.cursors.get(page - 1)
+        if after is not None:
+            rows, cursor = self.db.page_materials(self.query, after=after, limit=self.page_size,
+                                                  columns=ROW_COLUMNS, **self.filters)
+        else:
+            rows, cursor = self.db.page_materials(self.query, limit=self.page_size,
+                                                  offset=page * self.page_size,
+                                                  columns=ROW_COLUMNS, **self.filters)
+        return self._store(page, rows, cursor)
+
+    def _store(self, page: int, rows: List[Tuple], cursor: Optional[tuple]) -> List[MaterialRow]:
+        self.pages[page] = [MaterialRow(*row) for row in rows]
+        self.cursors[page] = cursor
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return self.pages[page]
+
+def highlight_segments(snippet: str) -> List[Tuple[str, bool]]:
+    """Split an attachment_snippet() result into (text, is_match) pieces"""
+    segments = []
+    for index, piece in enumerate(snippet.split(SNIPPET_START)):
+        matched, _, rest = piece.partition(SNIPPET_END) if index else ("", "", piece)
+        if matched:
+            segments.append((matched, True))
+        if rest:
+            segments.append((rest, False))
+    return segments
+
+@lru_cache(maxsize=4096)
+def format_timestamp(timestamp: int, fmt: str = "%Y-%m-%d %H:%M") -> str:
+    """Local-time display string for a stored Unix timestamp.
+
+    Memoized: materials added or imported together share a timestamp.
+    """
+    return time.strftime(fmt, time.localtime(timestamp))
+
+def format_label(title: str, tags: str, modified: int) -> str:
+    """List line for a material: Title — [Tags] (Modified Date)"""
+    tags = f" — [{tags}]" if tags else ""
+    return f"{title}{tags} {format_timestamp(modified, '(%m/%d/%Y)')}"
+
+def format_material(item: Tuple) -> str:
+    """Format a LIST_COLUMNS row: Title — [Tags] (Modified Date)"""
+    return format_label(item[1], item[2], item[5])
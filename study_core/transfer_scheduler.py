@@ -0,0 +1,206 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+# Lower runs first; interactive requests (e.g. "Open File") jump the queue
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+# Per-second byte counts kept for the recent throughput in stats()
+THROUGHPUT_SECONDS = 60
+
+
+class TransferCancelled(Exception):
+    """Raised inside a transfer when it has been cancelled"""
+
+
+class Transfer:
+    """Handle for one scheduled upload or download"""
+
+    def __init__(self, transfer_id: int, kind: str, name: str, priority: int,
+                 work: Callable[[Any, "Transfer"], Any],
+                 on_progress: Optional[Callable[["Transfer"], None]] = None,
+                 on_done: Optional[Callable[["Transfer"], None]] = None):
+        self.id = transfer_id
+        self.kind = kind
+        self.name = name
+        self.priority = priority
+        self.work = work
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.bytes_done = 0
+        self.total_bytes = 0
+        self.status = "queued"  # queued, running, done, failed, cancelled
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+        self._scheduler: Optional["TransferScheduler"] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Request cancellation; queued transfers never start, running ones stop at the next chunk"""
+        self._cancelled.set()
+
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise TransferCancelled(self.name)
+
+    def update(self, bytes_done: int, total_bytes: Optional[int] = None,
+               check_cancelled: bool = True):
+        """Report progress from inside `work`; raises TransferCancelled if cancelled"""
+        if total_bytes is not None:
+            self.total_bytes = total_bytes
+        delta = bytes_done - self.bytes_done
+        self.bytes_done = bytes_done
+        if self._scheduler and delta > 0:
+            self._scheduler._count_bytes(delta)
+        if self.on_progress:
+            self.on_progress(self)
+        if check_cancelled:
+            self.check_cancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """Block until finished and return the result (or raise the error)"""
+        if not self._finished.wait(timeout):
+            raise TimeoutError(self.name)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class TransferScheduler:
+    """Bounded pool of transfer workers fed from a priority queue.
+
+    Drive client objects are not thread-safe, so every worker builds its own
+    client with `client_factory` on first use and keeps it for its lifetime.
+    """
+
+    def __init__(self, client_factory: Callable[[], Any], workers: int = 4):
+        self.client_factory = client_factory
+        self.workers = workers
+        self.queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self.transfers: Dict[int, Transfer] = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.threads: List[threading.Thread] = []
+        self.running = True
+        self.created_at = time.monotonic()
+        self.bytes_total = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        # [second, bytes] buckets for recent throughput; old ones fall off the end
+        self.samples: Deque[list] = deque(maxlen=THROUGHPUT_SECONDS)
+
+    def submit(self, kind: str, name: str, work: Callable[[Any, Transfer], Any],
+               priority: int = PRIORITY_BACKGROUND,
+               on_progress: Optional[Callable[[Transfer], None]] = None,
+               on_done: Optional[Callable[[Transfer], None]] = None) -> Transfer:
+        """Schedule `work(client, transfer)` and return its handle"""
+        if not self.running:
+            raise RuntimeError("Transfer scheduler is shut down")
+        transfer = Transfer(next(self.ids), kind, name, priority, work, on_progress, on_done)
+        transfer._scheduler = self
+        with self.lock:
+            self.transfers[transfer.id] = transfer
+            if len(self.threads) < self.workers:
+                thread = threading.Thread(target=self._worker, daemon=True)
+                self.threads.append(thread)
+                thread.start()
+        self.queue.put((priority, transfer.id, transfer))
+        return transfer
+
+    def cancel(self, transfer_id: int) -> bool:
+        transfer = self.transfers.get(transfer_id)
+        if transfer is None:
+            return False
+        transfer.cancel()
+        return True
+
+    def active(self) -> List[Transfer]:
+        with self.lock:
+            return [t for t in self.transfers.values() if t.status in ("queued", "running")]
+
+    def stats(self, window: float = 5.0) -> Dict[str, float]:
+        """Aggregate counters and throughput (overall and over the last `window` seconds).
+
+        `window` is capped at THROUGHPUT_SECONDS.
+        """
+        now = time.monotonic()
+        with self.lock:
+            recent = sum(n for second, n in self.samples if now - second <= window)
+            statuses = [t.status for t in self.transfers.values()]
+            return {
+                "queued": statuses.count("queued"),
+                "running": statuses.count("running"),
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "bytes_total": self.bytes_total,
+                "throughput_bps": self.bytes_total / max(now - self.created_at, 1e-6),
+                "recent_throughput_bps": recent / window,
+            }
+
+    def shutdown(self, cancel_pending: bool = True):
+        self.running = False
+        if cancel_pending:
+            for transfer in self.active():
+                transfer.cancel()
+        for _ in self.threads:
+            self.queue.put((float("inf"), 0, None))
+
+    def _count_bytes(self, n: int):
+        second = int(time.monotonic())
+        with self.lock:
+            self.bytes_total += n
+            if self.samples and self.samples[-1][0] == second:
+                self.samples[-1][1] += n
+            else:
+                self.samples.append([second, n])
+
+    def _worker(self):
+        client = None
+        while True:
+            _, _, transfer = self.queue.get()
+            if transfer is None:
+                return
+            if transfer.cancelled:
+                self._finish(transfer, "cancelled")
+                continue
+            transfer.status = "running"
+            transfer.started_at = time.monotonic()
+            try:
+                if client is None:
+                    client = self.client_factory()
+                transfer.result = transfer.work(client, transfer)
+                self._finish(transfer, "done")
+            except TransferCancelled:
+                self._finish(transfer, "cancelled")
+            except Exception as e:
+                transfer.error = e
+                self._finish(transfer, "failed")
+
+    def _finish(self, transfer: Transfer, status: str):
+        transfer.status = status
+        transfer.finished_at = time.monotonic()
+        if status == "cancelled" and transfer.error is None:
+            transfer.error = TransferCancelled(transfer.name)
+        with self.lock:
+            self.transfers.pop(transfer.id, None)
+            if status == "done":
+                self.completed += 1
+            elif status == "failed":
+                self.failed += 1
+            else:
+                self.cancelled += 1
+        transfer._finished.set()
+        if transfer.on_done:
+            transfer.on_done(transfer)
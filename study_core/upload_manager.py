@@ -0,0 +1,692 @@
+import http.client
+import json
+import mimetypes
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .database import DatabaseManager
+from .drive_metadata import MetadataCache, is_drive_id
+from .request_executor import RequestExecutor, classify, parse_retry_after
+from .transfer_scheduler import PRIORITY_BACKGROUND, Transfer, TransferCancelled, TransferScheduler
+
+UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3/files"
+FILES_URL = "https://www.googleapis.com/drive/v3/files"
+# Drive requires chunk sizes to be a multiple of 256 KiB (except the last chunk)
+CHUNK_GRANULARITY = 256 * 1024
+DEFAULT_CHUNK_SIZE = 32 * CHUNK_GRANULARITY  # 8 MiB
+# Returned with the finished upload so the metadata cache needs no extra call
+UPLOAD_RESPONSE_FIELDS = "id,name,mimeType,size,md5Checksum,modifiedTime"
+# Operations in the outbox
+OP_UPLOAD = "upload"
+OP_DELETE = "delete"
+DRAIN_BATCH = 50  # operations handed to the transfer pool per pass
+OFFLINE_RETRY = 30.0  # seconds before draining again after Drive was unreachable
+# Sync state of a material's attachment, for display
+SYNC_NONE = ""
+SYNC_LOCAL = "local"
+SYNC_QUEUED = "queued"
+SYNC_UPLOADING = "uploading"
+SYNC_FAILED = "failed"
+SYNC_SYNCED = "synced"
+
+
+def sync_state(file_path: Optional[str], queued: Optional[str] = None) -> str:
+    """Where a material's attachment stands; `queued` is its UploadManager.sync_states() entry"""
+    if not file_path:
+        return SYNC_NONE
+    if is_drive_id(file_path):
+        return SYNC_SYNCED
+    return queued or SYNC_LOCAL
+
+
+class UploadError(Exception):
+    """Raised when Drive rejects an upload request"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+class SessionExpired(UploadError):
+    """The resumable session URI is no longer valid and must be restarted"""
+
+
+class HttpClient:
+    """Minimal keep-alive HTTP client, one connection per scheme/host"""
+
+    def __init__(self, timeout: float = 60):
+        self.timeout = timeout
+        self.connections: Dict[Tuple[str, str], http.client.HTTPConnection] = {}
+
+    def request(self, method: str, url: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        for attempt in range(2):
+            conn = self.connections.get(key)
+            if conn is None:
+                conn_class = (http.client.HTTPSConnection if parts.scheme == "https"
+                              else http.client.HTTPConnection)
+                conn = conn_class(parts.netloc, timeout=self.timeout)
+                self.connections[key] = conn
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+                return response.status, {k.lower(): v for k, v in response.getheaders()}, data
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # Stale keep-alive connection; reconnect once
+                conn.close()
+                self.connections.pop(key, None)
+                if attempt:
+                    raise
+            except BaseException:
+                # E.g. a read timeout: the connection is stuck mid-request and can't be reused
+                conn.close()
+                self.connections.pop(key, None)
+                raise
+
+    def close(self):
+        for conn in self.connections.values():
+            conn.close()
+        self.connections.clear()
+
+
+class HttpPool:
+    """Idle HttpClients kept for reuse, so short-lived helpers keep their connections warm"""
+
+    def __init__(self, max_idle: int = 8, timeout: float = 60):
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.idle: List[HttpClient] = []
+        self.lock = threading.Lock()
+
+    def acquire(self) -> HttpClient:
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return HttpClient(self.timeout)
+
+    def release(self, client: HttpClient):
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(client)
+                return
+        client.close()
+
+    def close(self):
+        with self.lock:
+            idle, self.idle = self.idle, []
+        for client in idle:
+            client.close()
+
+
+class ResumableUpload:
+    """Drive resumable upload protocol for a single local file.
+
+    With an `executor`, requests are rate limited and transient failures are
+    retried; a failed chunk is resent from the offset the session reports.
+    See https://developers.google.com/drive/api/guides/manage-uploads#resumable
+    """
+
+    def __init__(self, http: HttpClient, token_provider: Callable[[], str], file_path: str,
+                 metadata: dict, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 session_uri: Optional[str] = None, upload_url: str = UPLOAD_URL,
+                 executor: Optional[RequestExecutor] = None):
+        if chunk_size <= 0 or chunk_size % CHUNK_GRANULARITY:
+            raise ValueError(f"chunk_size must be a positive multiple of {CHUNK_GRANULARITY}")
+        self.http = http
+        self.token_provider = token_provider
+        self.file_path = file_path
+        self.metadata = metadata
+        self.chunk_size = chunk_size
+        self.session_uri = session_uri
+        self.upload_url = upload_url
+        self.executor = executor
+        self.size = os.path.getsize(file_path)
+        self.mime_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+
+    def _headers(self, **extra: str) -> Dict[str, str]:
+        headers = {"Authorization": f"Bearer {self.token_provider()}"}
+        headers.update(extra)
+        return headers
+
+    def _request(self, endpoint: str, method: str, url: str, body: bytes,
+                 headers: Callable[[], Dict[str, str]],
+                 retry: bool = True) -> Tuple[int, Dict[str, str], bytes]:
+        if self.executor is None or not retry:
+            return self.http.request(method, url, body, headers())
+        return self.executor.request(endpoint, self.http, method, url, body, headers)
+
+    def start(self) -> str:
+        """Open a new upload session and return its URI"""
+        body = json.dumps(self.metadata).encode("utf-8")
+        status, headers, data = self._request(
+            "upload.start", "POST",
+            f"{self.upload_url}?uploadType=resumable&fields={UPLOAD_RESPONSE_FIELDS}", body,
+            lambda: self._headers(**{
+                "Content-Type": "application/json; charset=UTF-8",
+                "X-Upload-Content-Type": self.mime_type,
+                "X-Upload-Content-Length": str(self.size),
+            })
+        )
+        if status != 200 or "location" not in headers:
+            raise UploadError(status, data.decode("utf-8", "replace"))
+        self.session_uri = headers["location"]
+        return self.session_uri
+
+    def query_offset(self, retry: bool = True) -> Tuple[int, Optional[dict]]:
+        """Ask Drive how much of the session it has; returns (offset, file resource)"""
+        status, headers, data = self._request(
+            "upload.status", "PUT", self.session_uri, b"",
+            lambda: self._headers(**{"Content-Range": f"bytes */{self.size}",
+                                     "Content-Length": "0"}),
+            retry
+        )
+        return self._handle_response(status, headers, data)
+
+    def send_chunk(self, offset: int) -> Tuple[int, Optional[dict]]:
+        """Upload the chunk starting at `offset`; returns (next offset, file resource)"""
+        with open(self.file_path, "rb") as fh:
+            fh.seek(offset)
+            chunk = fh.read(self.chunk_size)
+        if self.size:
+            content_range = f"bytes {offset}-{offset + len(chunk) - 1}/{self.size}"
+        else:
+            content_range = "bytes */0"
+        status, headers, data = self.http.request(
+            "PUT", self.session_uri, chunk,
+            self._headers(**{"Content-Range": content_range, "Content-Length": str(len(chunk))})
+        )
+        return self._handle_response(status, headers, data)
+
+    def _send(self, offset: int) -> Tuple[int, Optional[dict]]:
+        """send_chunk() with retries; after a failure the offset is re-read from the session"""
+        if self.executor is None:
+            return self.send_chunk(offset)
+        resync = False
+
+        def attempt():
+            nonlocal offset, resync
+            if resync:
+                offset, resource = self.query_offset(retry=False)
+                if resource:
+                    return -1, resource
+            resync = True
+            return self.send_chunk(offset)
+
+        return self.executor.call("upload.chunk", attempt)
+
+    @staticmethod
+    def _handle_response(status: int, headers: Dict[str, str],
+                         data: bytes) -> Tuple[int, Optional[dict]]:
+        if status in (200, 201):
+            return -1, json.loads(data.decode("utf-8"))
+        if status == 308:
+            # "Range: bytes=0-N" means N+1 bytes are stored; no header means none
+            received = headers.get("range")
+            return (int(received.rsplit("-", 1)[1]) + 1 if received else 0), None
+        if status in (404, 410):
+            raise SessionExpired(status, data.decode("utf-8", "replace"))
+        raise UploadError(status, data.decode("utf-8", "replace"),
+                          parse_retry_after(headers.get("retry-after")))
+
+    def run(self, offset: int = 0,
+            on_chunk: Optional[Callable[[int, Optional[str]], None]] = None) -> dict:
+        """Upload the rest of the file from `offset` and return the Drive file resource.
+
+        `on_chunk(offset, session_uri)` is called after each acknowledged chunk
+        so the caller can persist progress.
+        """
+        if self.session_uri is None:
+            self.start()
+            offset = 0
+        else:
+            offset, resource = self.query_offset()
+            if resource:
+                return resource
+        if on_chunk:
+            on_chunk(offset, self.session_uri)
+        while True:
+            offset, resource = self._send(offset)
+            if resource:
+                return resource
+            if on_chunk:
+                on_chunk(offset, self.session_uri)
+
+
+class UploadManager:
+    """Outbox of Drive attachment operations, persisted in SQLite and drained in the background.
+
+    Operations are written the moment a material is saved or deleted, whether
+    or not Drive is connected, and are sent once start() is called:
+
+    - upload: a material is saved with its local path right away; when the
+      upload finishes the row's file_path is swapped for the Drive file ID.
+      Session URIs and byte offsets are stored, so a restart resumes uploads
+      where they stopped instead of starting from zero.
+    - replace: an upload with `old_file_id`, the Drive file the material
+      pointed to before. It is trashed once the new file is in place.
+    - delete: the Drive file of a deleted material (or removed attachment) is
+      moved to the Drive trash.
+
+    Operations coalesce: a newer attachment replaces a queued upload for the
+    same material, deleting a material drops its queued upload, and a file is
+    only trashed if no material refers to it any more. The queue is drained
+    DRAIN_BATCH operations at a time; uploads run concurrently on a
+    TransferScheduler (each worker's client must expose an `http` attribute,
+    an HttpClient) and the trash requests of a batch share one transfer. When
+    Drive can't be reached, operations stay queued and the drain is retried
+    after OFFLINE_RETRY seconds.
+    """
+
+    def __init__(self, db: DatabaseManager, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 upload_url: str = UPLOAD_URL, files_url: str = FILES_URL,
+                 on_progress: Optional[Callable[[int, str, int, int], None]] = None,
+                 on_complete: Optional[Callable[[int, str], None]] = None,
+                 on_error: Optional[Callable[[int, str, Exception], None]] = None,
+                 on_queue_changed: Optional[Callable[[], None]] = None,
+                 metadata_cache: Optional[MetadataCache] = None):
+        self.chunk_size = chunk_size
+        self.metadata_cache = metadata_cache
+        self.upload_url = upload_url
+        self.files_url = files_url
+        self.on_progress = on_progress
+        self.on_complete = on_complete
+        self.on_error = on_error
+        self.on_queue_changed = on_queue_changed
+        self.db = db
+        # Guards in_flight; taken inside db.transaction(), never around it
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.token_provider: Optional[Callable[[], str]] = None
+        self.folder_id: Optional[str] = None
+        self.scheduler: Optional[TransferScheduler] = None
+        self.executor: Optional[RequestExecutor] = None
+        self.in_flight: Dict[int, Tuple[int, Transfer]] = {}  # op id -> (material id, transfer)
+        self.offline_until = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        self.create_tables()
+
+    def create_tables(self):
+        # The uploads table itself comes from the database's MIGRATIONS
+        with self.db.transaction() as conn:
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_uploads_material ON uploads(material_id)"
+            )
+
+    def enqueue(self, material_id: int, local_path: str, file_name: Optional[str] = None,
+                old_file_id: Optional[str] = None) -> int:
+        """Queue a local file for upload and return the operation ID.
+
+        `old_file_id` is the Drive file the attachment replaces; it is trashed
+        after the upload. Re-queueing an unchanged file that is already queued
+        is a no-op.
+        """
+        stat = os.stat(local_path)
+        with self.db.transaction() as conn:
+            queued = conn.execute(
+                "SELECT id FROM uploads WHERE material_id=? AND local_path=? AND size=? AND mtime=? "
+                "AND op=?",
+                (material_id, local_path, stat.st_size, stat.st_mtime, OP_UPLOAD)
+            ).fetchone()
+            if queued:
+                # Same file already queued; keep its session and progress
+                return queued[0]
+            # A newer attachment for the same material replaces a queued one, and
+            # still replaces the Drive file that one was going to replace
+            old_file_id = self._drop_queued_upload(conn, material_id) or old_file_id
+            cursor = conn.execute(
+                "INSERT INTO uploads (material_id, local_path, file_name, size, mtime, op, old_file_id) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (material_id, local_path, file_name or os.path.basename(local_path),
+                 stat.st_size, stat.st_mtime, OP_UPLOAD, old_file_id)
+            )
+        self._queue_changed()
+        return cursor.lastrowid
+
+    def enqueue_many(self, items: Iterable[Tuple[int, str]]) -> int:
+        """Queue (material_id, local_path) uploads for new materials in one transaction.
+
+        Returns how many were queued; files that no longer exist are skipped.
+        """
+        rows = []
+        for material_id, local_path in items:
+            try:
+                stat = os.stat(local_path)
+            except OSError:
+                continue
+            rows.append((material_id, local_path, os.path.basename(local_path),
+                         stat.st_size, stat.st_mtime))
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "INSERT INTO uploads (material_id, local_path, file_name, size, mtime) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+        self._queue_changed()
+        return len(rows)
+
+    def enqueue_delete(self, material_id: int, file_id: Optional[str] = None) -> Optional[int]:
+        """Drop a material's queued upload and queue its Drive file for the trash.
+
+        For a deleted material or a removed attachment. `file_id` is the
+        material's Drive file, if it had one; a queued replace brings its own.
+        Returns the operation ID, or None if nothing is left to do on Drive.
+        """
+        with self.db.transaction() as conn:
+            file_id = self._drop_queued_upload(conn, material_id) or file_id
+            operation_id = self._queue_trash(conn, material_id, file_id) if file_id else None
+        self._queue_changed()
+        return operation_id
+
+    def delete_material(self, material_id: int):
+        """Delete a material and queue its Drive operations (see enqueue_delete).
+
+        The row is deleted first, so by the time the trash request runs no
+        material refers to the file any more.
+        """
+        with self.db.transaction():
+            material = self.db.get_material(material_id, columns=("file_path",))
+            self.db.delete_material(material_id)
+        file_path = material[0] if material else ""
+        self.enqueue_delete(material_id, file_path if is_drive_id(file_path) else None)
+
+    def _drop_queued_upload(self, conn, material_id: int) -> Optional[str]:
+        """Remove (and cancel) a material's queued upload; returns the file it would replace"""
+        row = conn.execute(
+            "SELECT old_file_id FROM uploads WHERE material_id=? AND op=? AND old_file_id IS NOT NULL",
+            (material_id, OP_UPLOAD)
+        ).fetchone()
+        conn.execute("DELETE FROM uploads WHERE material_id=? AND op=?",
+                     (material_id, OP_UPLOAD))
+        with self.lock:
+            for owner, transfer in self.in_flight.values():
+                if owner == material_id and transfer.kind == "upload":
+                    transfer.cancel()
+        return row[0] if row else None
+
+    @staticmethod
+    def _queue_trash(conn, material_id: int, file_id: str) -> int:
+        queued = conn.execute(
+            "SELECT id FROM uploads WHERE op=? AND old_file_id=? AND status='pending'",
+            (OP_DELETE, file_id)
+        ).fetchone()
+        if queued:
+            return queued[0]
+        return conn.execute(
+            "INSERT INTO uploads (material_id, local_path, file_name, size, mtime, op, old_file_id) "
+            "VALUES (?, '', ?, 0, 0, ?, ?)",
+            (material_id, file_id, OP_DELETE, file_id)
+        ).lastrowid
+
+    def cancel(self, material_id: int):
+        """Drop every queued or running operation for a material"""
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM uploads WHERE material_id=?", (material_id,))
+        with self.lock:
+            for owner, transfer in self.in_flight.values():
+                if owner == material_id:
+                    transfer.cancel()
+        self._queue_changed()
+
+    def pending_count(self) -> int:
+        return self.db.reader().execute(
+            "SELECT COUNT(*) FROM uploads WHERE status='pending'"
+        ).fetchone()[0]
+
+    def sync_states(self) -> Dict[int, str]:
+        """Material ID -> SYNC_QUEUED / SYNC_UPLOADING / SYNC_FAILED for queued uploads"""
+        rows = self.db.reader().execute(
+            "SELECT id, material_id, status FROM uploads WHERE op=?", (OP_UPLOAD,)
+        ).fetchall()
+        with self.lock:
+            uploading = set(self.in_flight)
+        return {
+            material_id: (SYNC_FAILED if status == "failed"
+                          else SYNC_UPLOADING if operation_id in uploading else SYNC_QUEUED)
+            for operation_id, material_id, status in rows
+        }
+
+    def start(self, token_provider: Callable[[], str], folder_id: str,
+              scheduler: TransferScheduler, executor: Optional[RequestExecutor] = None):
+        """Begin draining the queue, retrying operations that failed earlier"""
+        self.token_provider = token_provider
+        self.folder_id = folder_id
+        self.scheduler = scheduler
+        self.executor = executor
+        self.offline_until = 0.0
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE uploads SET status='pending', error=NULL WHERE status='failed'")
+        if self.thread is None or not self.thread.is_alive():
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+        self._queue_changed()
+
+    def stop(self):
+        self.running = False
+        with self.lock:
+            for _, transfer in self.in_flight.values():
+                transfer.cancel()
+        self.wakeup.set()
+
+    def close(self):
+        self.stop()
+
+    def _queue_changed(self):
+        # Inside a caller's transaction the drain could not see the new rows yet
+        self.db.after_commit(self._notify)
+
+    def _notify(self):
+        self.wakeup.set()
+        if self.on_queue_changed:
+            self.on_queue_changed()
+
+    def _ready_jobs(self) -> List[tuple]:
+        """The next batch of pending operations that aren't already running"""
+        with self.lock:
+            in_flight = set(self.in_flight)
+        rows = self.db.reader().execute(
+            "SELECT id, material_id, local_path, file_name, size, mtime, session_uri, bytes_sent, "
+            "op, old_file_id FROM uploads WHERE status='pending' ORDER BY id LIMIT ?",
+            (DRAIN_BATCH + len(in_flight),)
+        ).fetchall()
+        return [row for row in rows if row[0] not in in_flight][:DRAIN_BATCH]
+
+    def _run(self):
+        """Hand pending operations to the scheduler in batches as they appear"""
+        try:
+            while self.running:
+                self.wakeup.clear()
+                wait = self.offline_until - time.monotonic()
+                if wait > 0:
+                    self.wakeup.wait(wait)
+                    continue
+                jobs = self._ready_jobs()
+                for job in jobs:
+                    if job[8] == OP_UPLOAD:
+                        self._dispatch(job)
+                trash = [job for job in jobs if job[8] == OP_DELETE]
+                if trash:
+                    self._dispatch_trash(trash)
+                self.wakeup.wait()
+        finally:
+            self.db.release_reader()
+
+    def _dispatch(self, job: tuple):
+        upload_id, material_id, file_name = job[0], job[1], job[3]
+
+        def on_done(transfer: Transfer):
+            with self.lock:
+                self.in_flight.pop(upload_id, None)
+            self._queue_changed()
+
+        with self.lock:
+            transfer = self.scheduler.submit(
+                "upload", file_name,
+                lambda client, transfer: self._upload(client.http, job, transfer),
+                PRIORITY_BACKGROUND, on_done=on_done
+            )
+            self.in_flight[upload_id] = (material_id, transfer)
+
+    def _dispatch_trash(self, jobs: List[tuple]):
+        def on_done(transfer: Transfer):
+            with self.lock:
+                for job in jobs:
+                    self.in_flight.pop(job[0], None)
+            self._queue_changed()
+
+        with self.lock:
+            transfer = self.scheduler.submit(
+                "delete", f"{len(jobs)} files",
+                lambda client, transfer: self._trash(client.http, jobs),
+                PRIORITY_BACKGROUND, on_done=on_done
+            )
+            for job in jobs:
+                self.in_flight[job[0]] = (job[1], transfer)
+
+    def _trash(self, http: HttpClient, jobs: List[tuple]) -> int:
+        """Move the Drive files of a batch of delete operations to the trash"""
+        trashed = 0
+        for operation_id, file_id in ((job[0], job[9]) for job in jobs):
+            # Still an attachment somewhere (e.g. linked by checksum): keep it
+            in_use = self.db.reader().execute(
+                "SELECT 1 FROM materials WHERE file_path=? LIMIT 1", (file_id,)
+            ).fetchone()
+            if not in_use:
+                try:
+                    status, headers, data = self._request(
+                        http, "files.trash", "PATCH", f"{self.files_url}/{file_id}?fields=id",
+                        json.dumps({"trashed": True}).encode("utf-8"),
+                        {"Content-Type": "application/json; charset=UTF-8"}
+                    )
+                except Exception as e:
+                    self._went_offline(e)
+                    raise
+                if status not in (200, 404):  # 404: already gone
+                    error = UploadError(status, data.decode("utf-8", "replace"),
+                                        parse_retry_after(headers.get("retry-after")))
+                    if not self._went_offline(error):
+                        self._fail(operation_id, error)
+                    continue
+                trashed += 1
+                if self.metadata_cache:
+                    self.metadata_cache.mark_trashed(file_id)
+            with self.db.transaction() as conn:
+                conn.execute("DELETE FROM uploads WHERE id=?", (operation_id,))
+        return trashed
+
+    def _request(self, http: HttpClient, endpoint: str, method: str, url: str, body: bytes,
+                 headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        def all_headers():
+            return {"Authorization": f"Bearer {self.token_provider()}", **headers}
+
+        if self.executor is None:
+            return http.request(method, url, body, all_headers())
+        return self.executor.request(endpoint, http, method, url, body, all_headers)
+
+    def _went_offline(self, error: Exception) -> bool:
+        """Hold the drain back if `error` means Drive is unreachable right now"""
+        if not classify(error)[0]:
+            return False
+        self.offline_until = time.monotonic() + OFFLINE_RETRY
+        return True
+
+    def _fail(self, operation_id: int, error: Exception):
+        with self.db.transaction() as conn:
+            conn.execute(
+                "UPDATE uploads SET status='failed', error=? WHERE id=?", (str(error), operation_id)
+            )
+
+    def _upload(self, http: HttpClient, job: tuple, transfer: Transfer):
+        (upload_id, material_id, local_path, file_name, size, mtime, session_uri, sent,
+         _, old_file_id) = job
+        try:
+            stat = os.stat(local_path)
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                # File changed since the session was opened; start over
+                session_uri, sent = None, 0
+                self._save_progress(upload_id, None, 0, stat.st_size, stat.st_mtime)
+
+            md5 = None
+            if self.metadata_cache and session_uri is None:
+                # Identical content already on Drive is linked instead of uploaded
+                md5 = self.metadata_cache.local_md5(local_path)
+                existing = self.metadata_cache.find_by_checksum(md5, stat.st_size)
+                if existing:
+                    self._finish(upload_id, material_id, local_path, existing, old_file_id,
+                                 uploaded=False)
+                    return existing
+
+            upload = ResumableUpload(
+                http, self.token_provider, local_path,
+                {"name": file_name, "parents": [self.folder_id]},
+                chunk_size=self.chunk_size, session_uri=session_uri,
+                upload_url=self.upload_url, executor=self.executor
+            )
+
+            def on_chunk(offset: int, uri: Optional[str]):
+                self._save_progress(upload_id, uri, offset)
+                if self.on_progress:
+                    self.on_progress(material_id, file_name, offset, upload.size)
+                transfer.update(offset, upload.size)
+
+            try:
+                resource = upload.run(sent, on_chunk)
+            except SessionExpired:
+                upload.session_uri = None
+                resource = upload.run(0, on_chunk)
+            file_id = resource["id"]
+            if self.metadata_cache:
+                resource.setdefault("size", upload.size)
+                if md5:
+                    resource.setdefault("md5Checksum", md5)
+                self.metadata_cache.put(resource)
+
+            transfer.update(upload.size, upload.size, check_cancelled=False)
+            self._finish(upload_id, material_id, local_path, file_id, old_file_id)
+            return file_id
+        except TransferCancelled:
+            # Cancelled uploads stay queued unless cancel() removed them
+            raise
+        except Exception as e:
+            if self._went_offline(e):
+                raise  # stays queued for when Drive is reachable again
+            self._fail(upload_id, e)
+            if self.on_error:
+                self.on_error(material_id, file_name, e)
+            raise
+
+    def _finish(self, upload_id: int, material_id: int, local_path: str, file_id: str,
+                old_file_id: Optional[str] = None, uploaded: bool = True):
+        with self.db.transaction() as conn:
+            # Leave the row alone if the attachment was changed meanwhile
+            attached = self.db.replace_file_path(material_id, local_path, file_id)
+            conn.execute("DELETE FROM uploads WHERE id=?", (upload_id,))
+            if not attached and uploaded:
+                # The attachment changed during the upload, so nothing refers to the new file
+                self._queue_trash(conn, material_id, file_id)
+            elif attached and old_file_id and old_file_id != file_id:
+                self._queue_trash(conn, material_id, old_file_id)
+        if attached and self.on_complete:
+            self.on_complete(material_id, file_id)
+
+    def _save_progress(self, upload_id: int, session_uri: Optional[str], offset: int,
+                       size: Optional[int] = None, mtime: Optional[float] = None):
+        with self.db.transaction() as conn:
+            if size is None:
+                conn.execute(
+                    "UPDATE uploads SET session_uri=?, bytes_sent=? WHERE id=?",
+                    (session_uri, offset, upload_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE uploads SET session_uri=?, bytes_sent=?, size=?, mtime=? WHERE id=?",
+                    (session_uri, offset, size, mtime, upload_id)
+                )
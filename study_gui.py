@@ -0,0 +1,1339 @@
+import customtkinter as ctk
+import tkinter as tk
+import json
+import os
+import sys
+import time
+import webbrowser
+from tkinter import filedialog, messagebox
+from typing import Callable, Dict, List, Tuple, Optional, TYPE_CHECKING
+from tkinterdnd2 import TkinterDnD, DND_FILES
+from study_core import (
+    AttachmentCache, BulkImporter, DatabaseManager, LabelCache, MaterialPager, MaterialRow,
+    MetadataCache, SearchWorker, SyncEngine, TextIndexer, UploadManager, CHANGE_DELETED,
+    CHANGE_INSERTED, PRIORITY_INTERACTIVE, ROW_COLUMNS, SYNC_FAILED, SYNC_LOCAL, SYNC_QUEUED,
+    SYNC_SYNCED, SYNC_UPLOADING, format_timestamp, highlight_segments, is_drive_id, parse_tags,
+    sync_state
+)
+import threading
+
+if TYPE_CHECKING:
+    # The Google client libraries take hundreds of milliseconds to import, so
+    # drive_service is only loaded when the user connects to Drive
+    from study_core.drive_service import DriveService
+
+# === Theme Setup ===
+ctk.set_appearance_mode("dark")
+ctk.set_default_color_theme("blue")
+
+# Custom colors
+COLORS = {
+    "primary": "#1a73e8",
+    "primary_hover": "#1557b0",
+    "success": "#34a853",
+    "success_hover": "#2d9249",
+    "warning": "#fbbc05",
+    "warning_hover": "#e0a800",
+    "danger": "#ea4335",
+    "danger_hover": "#d33426",
+    "info": "#4285f4",
+    "info_hover": "#3367d6",
+    "secondary": "#5f6368",
+    "secondary_hover": "#4a4d50",
+    "bg_dark": "#202124",
+    "bg_light": "#292a2d",
+    "text_primary": "#ffffff",
+    "text_secondary": "#9aa0a6"
+}
+
+# Set SMM_STARTUP_TRACE=1 to log startup milestones to stderr as JSON lines,
+# or SMM_STARTUP_TRACE=exit to also quit once the first page is on screen.
+# Milestones count from SMM_LAUNCHED_AT (epoch seconds, set by the launcher
+# so interpreter start and imports are included), else from here.
+STARTUP_TRACE = os.environ.get("SMM_STARTUP_TRACE", "")
+STARTED_AT = float(os.environ.get("SMM_LAUNCHED_AT") or time.time())
+first_page_pending = True
+
+def trace_startup(milestone: str):
+    if STARTUP_TRACE:
+        elapsed_ms = (time.time() - STARTED_AT) * 1000
+        print(json.dumps({"milestone": milestone, "ms": round(elapsed_ms, 2)}), file=sys.stderr, flush=True)
+
+trace_startup("imports")
+
+# The database and the services on top of it are opened after the first
+# paint, see open_database()
+db: Optional[DatabaseManager] = None
+attachment_cache: Optional[AttachmentCache] = None
+metadata_cache: Optional[MetadataCache] = None
+upload_manager: Optional[UploadManager] = None
+search_worker: Optional[SearchWorker] = None
+bulk_importer: Optional[BulkImporter] = None
+text_indexer: Optional[TextIndexer] = None
+drive_service: Optional["DriveService"] = None
+sync_engine: Optional[SyncEngine] = None
+# The result set the list shows, and its labels by material ID (kept across
+# refreshes so only changed rows are reformatted)
+materials: Optional[MaterialPager] = None
+row_labels = LabelCache()
+# Queued Drive operations by material ID (see UploadManager.sync_states), for the list
+queued_sync: Dict[int, str] = {}
+sync_refresh_pending = False
+
+def connect_to_drive():
+    def auth_flow():
+        global drive_service, sync_engine
+        try:
+            from study_core.drive_service import DriveService
+            # Normally instant: token, discovery document and folder ID come from earlier sessions
+            drive_service = DriveService(on_folder_changed=on_drive_folder_changed,
+                                         on_disconnected=on_drive_disconnected)
+            upload_manager.start(drive_service.get_access_token, drive_service.folder_id,
+                                 drive_service.scheduler, drive_service.executor)
+            drive_ids = [ref for ref in db.get_attachment_refs() if is_drive_id(ref)]
+            if drive_ids:
+                drive_service.submit_metadata_refresh(drive_ids, metadata_cache)
+
+            # The sync thread gets its own client; service objects aren't thread-safe
+            sync_client = drive_service.new_worker_client()
+            sync_engine = SyncEngine(
+                db, metadata_cache, attachment_cache,
+                lambda: drive_service.get_start_page_token(sync_client.service),
+                lambda token: drive_service.list_changes(token, sync_client.service),
+                on_changes=on_drive_changes
+            )
+            sync_engine.start()
+            if drive_service.disconnected is not None:
+                raise drive_service.disconnected
+            status_var.set("Google Drive connected successfully.")
+            drive_button.configure(text="Drive Connected", fg_color=COLORS["success"], hover_color=COLORS["success_hover"])
+        except Exception as e:
+            messagebox.showerror("Google Drive Error", f"Failed to connect to Google Drive: {e}")
+            status_var.set("Google Drive connection failed.")
+            drive_button.configure(text="Connect to Drive", fg_color=COLORS["info"], hover_color=COLORS["info_hover"])
+        finally:
+            db.release_reader()
+
+    status_var.set("Connecting to Google Drive...")
+    threading.Thread(target=auth_flow, daemon=True).start()
+
+def on_drive_folder_changed(folder_id: str):
+    # The cached app folder was gone from Drive; uploads go to its replacement
+    upload_manager.folder_id = folder_id
+
+def on_drive_disconnected(error: Exception):
+    # The saved sign-in was refused; connecting again asks for consent
+    def disconnect():
+        global drive_service, sync_engine
+        if drive_service is None:
+            return
+        upload_manager.stop()
+        if sync_engine:
+            sync_engine.close()
+            sync_engine = None
+        drive_service.close()
+        drive_service = None
+        status_var.set(f"Google Drive disconnected: {error}. Connect again to sign in.")
+        drive_button.configure(text="Connect to Drive", fg_color=COLORS["info"], hover_color=COLORS["info_hover"])
+    root.after(0, disconnect)
+
+def on_drive_changes(file_ids: List[str]):
+    root.after(0, lambda: status_var.set(f"Synced {len(file_ids)} change(s) from Google Drive."))
+
+def on_upload_progress(material_id: int, file_name: str, sent: int, total: int):
+    percent = int(sent * 100 / total) if total else 100
+    root.after(0, lambda: status_var.set(f"Uploading {file_name} to Google Drive... {percent}%"))
+
+def on_upload_complete(material_id: int, file_id: str):
+    # The row itself is patched by the change event for its new file_path
+    root.after(0, lambda: status_var.set("File uploaded to Google Drive successfully."))
+
+def on_upload_error(material_id: int, file_name: str, error: Exception):
+    root.after(0, lambda: status_var.set(f"Upload of {file_name} failed: {error}. It will be retried on next connect."))
+
+def on_outbox_changed():
+    """Called from any thread when Drive operations are queued, started or finished"""
+    global sync_refresh_pending
+    if not sync_refresh_pending:
+        # One refresh per Tk iteration, however many operations changed
+        sync_refresh_pending = True
+        root.after(0, refresh_sync_states)
+
+def refresh_sync_states():
+    global queued_sync, sync_refresh_pending
+    sync_refresh_pending = False
+    queued_sync = upload_manager.sync_states()
+    listbox.redraw()
+
+def row_sync_state(row: MaterialRow) -> str:
+    return sync_state(row.file_path, queued_sync.get(row.id))
+
+def open_database():
+    """Open the database and the services that share it"""
+    global db, attachment_cache, metadata_cache, upload_manager, search_worker, bulk_importer, text_indexer
+    db = DatabaseManager(on_change=on_materials_changed)
+    attachment_cache = AttachmentCache(db)
+    metadata_cache = MetadataCache(db)
+    upload_manager = UploadManager(
+        db,
+        on_progress=on_upload_progress,
+        on_complete=on_upload_complete,
+        on_error=on_upload_error,
+        on_queue_changed=on_outbox_changed,
+        metadata_cache=metadata_cache
+    )
+    search_worker = SearchWorker(db, on_search_results)
+    # Imported attachments are queued right away and upload once Drive is connected
+    bulk_importer = BulkImporter(db, upload_manager=upload_manager,
+                                 on_progress=on_import_progress)
+    # Makes the text of attachments searchable; rescanned after saves, imports and downloads
+    text_indexer = TextIndexer(db, metadata_cache, attachment_cache,
+                               on_indexed=on_attachments_indexed)
+    text_indexer.start()
+    # Operations queued in earlier sessions show in the list right away
+    on_outbox_changed()
+
+def on_attachments_indexed(count: int):
+    root.after(0, lambda: status_var.set(f"Indexed the text of {count} attachment(s) for search."))
+
+def handle_bulk_drop(event):
+    """Import files and folders dropped on the materials list"""
+    paths = [path for path in root.tk.splitlist(event.data) if os.path.exists(path)]
+    if paths and messagebox.askyesno("Import", f"Import {len(paths)} dropped item(s) as materials?"):
+        start_import(bulk_importer.create_job(paths))
+
+def resume_imports():
+    """Offer to finish imports that were interrupted by a crash or quit"""
+    for job_id, roots, imported in bulk_importer.unfinished_jobs():
+        if messagebox.askyesno(
+            "Resume Import",
+            f"Importing {', '.join(roots)} stopped after {imported} files. Resume it?"
+        ):
+            start_import(job_id)
+        else:
+            bulk_importer.discard(job_id)
+
+def start_import(job_id: int):
+    def run():
+        try:
+            imported, skipped = bulk_importer.run(job_id)
+        except Exception as e:
+            root.after(0, lambda error=e: status_var.set(f"Import failed: {error}. It can be resumed on next start."))
+            return
+        finally:
+            db.release_reader()
+        root.after(0, lambda: finish_import(imported, skipped))
+
+    status_var.set("Importing...")
+    threading.Thread(target=run, daemon=True).start()
+
+def on_import_progress(job_id: int, imported: int, skipped: int):
+    root.after(0, lambda: status_var.set(f"Importing... {imported} added, {skipped} already imported"))
+
+def finish_import(imported: int, skipped: int):
+    # Each committed batch already reached the list through on_materials_changed
+    status_var.set(f"Imported {imported} materials ({skipped} already imported).")
+    text_indexer.request_scan()
+
+# === Functions ===
+def add_material(material_id: int = None):
+    """Add or edit material with a modal dialog"""
+    is_edit = material_id is not None
+    material = db.get_material(material_id) if is_edit else None
+    
+    def save():
+        title = entry_title.get().strip()
+        content = text_content.get("1.0", "end").strip()
+        tags = entry_tags.get().strip()
+        file_path = entry_file.get().strip()
+        
+        if not title:
+            messagebox.showwarning("Missing", "Title is required.", parent=top)
+            return
+            
+        try:
+            # Save with the local path now; the upload swaps in the Drive ID later
+            if is_edit:
+                saved_id = material_id
+                db.update_material(saved_id, title, content, tags, file_path)
+            else:
+                saved_id = db.add_material(title, content, tags, file_path)
+
+            # Drive operations are queued whether or not Drive is connected and
+            # run once it is. Attachments already on Drive hold a file ID and are
+            # skipped here; re-queueing an unchanged local file is a no-op, and
+            # content that is already on Drive gets linked instead of uploaded again
+            old_path = material[4] if is_edit else ""
+            old_file_id = old_path if is_drive_id(old_path) and old_path != file_path else None
+            if file_path and os.path.exists(file_path):
+                upload_manager.enqueue(saved_id, file_path, old_file_id=old_file_id)
+                if drive_service:
+                    status_var.set(f"Syncing {os.path.basename(file_path)} to Google Drive in the background...")
+                else:
+                    status_var.set(f"{os.path.basename(file_path)} will be synced when Google Drive is connected.")
+            elif old_path != file_path:
+                # Attachment removed: a queued upload of it is dropped and its
+                # Drive copy goes to the Drive trash
+                upload_manager.enqueue_delete(saved_id, old_file_id)
+
+            if file_path:
+                text_indexer.request_scan()
+
+            if is_edit:
+                messagebox.showinfo("Success", "Material updated successfully!", parent=top)
+            else:
+                messagebox.showinfo("Success", "Material added successfully!", parent=top)
+            
+            # The list picks the change up from the database's change event
+            top.destroy()
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred: {str(e)}", parent=top)
+
+    def choose_file():
+        filepath = filedialog.askopenfilename(
+            title="Select File",
+            filetypes=[
+                ("All Files", "*.* "),
+                ("PDFs", "*.pdf"),
+                ("Documents", "*.docx *.txt"),
+                ("Images", "*.png *.jpg *.jpeg"),
+                ("Videos", "*.mp4 *.avi *.mov")
+            ]
+        )
+        if filepath:
+            entry_file.delete(0, "end")
+            entry_file.insert(0, filepath)
+            update_file_preview(filepath)
+
+    def clear_file():
+        entry_file.delete(0, "end")
+        file_preview.configure(text="No file selected", image=None)
+
+    def update_file_preview(filepath: str):
+        """Update the file preview with appropriate icon"""
+        if not filepath:
+            file_preview.configure(text="No file selected", image=None)
+            return
+            
+        filename = os.path.basename(filepath)
+        file_preview.configure(text=filename)
+        
+    def handle_drop(event):
+        """Handle files dropped on the drop target"""
+        filepath = event.data.strip()
+        
+        if filepath.startswith('{') and filepath.endswith('}'):
+            filepath = filepath[1:-1]
+        
+        if '\n' in filepath:
+            filepath = filepath.split('\n')[0]
+        
+        if os.path.isfile(filepath):
+            entry_file.delete(0, "end")
+            entry_file.insert(0, filepath)
+            update_file_preview(filepath)
+            status_var.set(f"File added: {os.path.basename(filepath)}")
+        else:
+            messagebox.showerror("Error", "Dropped item is not a valid file", parent=top)
+
+    top = ctk.CTkToplevel(root)
+    top.title("Edit Material" if is_edit else "Add Material")
+    top.geometry("700x800")
+    top.grab_set()
+    top.configure(fg_color=COLORS["bg_dark"])
+
+    # Main content frame
+    content_frame = ctk.CTkFrame(top, fg_color=COLORS["bg_light"], corner_radius=10)
+    content_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+    # Title
+    ctk.CTkLabel(
+        content_frame, 
+        text="Title*:", 
+        font=root.header_font,
+        text_color=COLORS["text_primary"]
+    ).pack(pady=(20, 5))
+    
+    entry_title = ctk.CTkEntry(
+        content_frame, 
+        width=600,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["bg_dark"],
+        border_color=COLORS["primary"],
+        text_color=COLORS["text_primary"]
+    )
+    entry_title.pack()
+    if is_edit and material:
+        entry_title.insert(0, material[1])
+
+    # Tags
+    ctk.CTkLabel(
+        content_frame, 
+        text="Tags (comma-separated):", 
+        font=root.header_font,
+        text_color=COLORS["text_primary"]
+    ).pack(pady=(20, 5))
+    
+    entry_tags = ctk.CTkEntry(
+        content_frame, 
+        width=600,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["bg_dark"],
+        border_color=COLORS["primary"],
+        text_color=COLORS["text_primary"]
+    )
+    entry_tags.pack()
+    if is_edit and material:
+        entry_tags.insert(0, material[3] if material[3] else "")
+
+    # Suggestions for the tag being typed, from the tag index
+    tag_suggestions = ctk.CTkFrame(content_frame, fg_color="transparent", height=30)
+    tag_suggestions.pack(pady=(5, 0))
+
+    def complete_tag(name: str):
+        entered = entry_tags.get().split(",")[:-1]
+        entry_tags.delete(0, "end")
+        entry_tags.insert(0, ", ".join([part.strip() for part in entered] + [name]) + ", ")
+        suggest_tags()
+
+    def suggest_tags(event=None):
+        for button in tag_suggestions.winfo_children():
+            button.destroy()
+        parts = entry_tags.get().split(",")
+        prefix = parts[-1].strip()
+        if not prefix:
+            return
+        entered = set(parse_tags(",".join(parts[:-1])))
+        for name, count in db.complete_tags(prefix, TAG_SUGGESTIONS + len(entered)):
+            if name in entered:
+                continue
+            ctk.CTkButton(
+                tag_suggestions,
+                text=f"{name} ({count})",
+                command=lambda name=name: complete_tag(name),
+                width=60,
+                height=26,
+                corner_radius=13,
+                fg_color=COLORS["secondary"],
+                hover_color=COLORS["secondary_hover"],
+                font=root.small_font
+            ).pack(side="left", padx=3)
+            if len(tag_suggestions.winfo_children()) >= TAG_SUGGESTIONS:
+                break
+
+    entry_tags.bind("<KeyRelease>", suggest_tags)
+
+    # Content
+    ctk.CTkLabel(
+        content_frame, 
+        text="Content:", 
+        font=root.header_font,
+        text_color=COLORS["text_primary"]
+    ).pack(pady=(20, 5))
+    
+    text_content = ctk.CTkTextbox(
+        content_frame, 
+        width=600, 
+        height=200,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["bg_dark"],
+        border_color=COLORS["primary"],
+        text_color=COLORS["text_primary"]
+    )
+    text_content.pack()
+    if is_edit and material:
+        text_content.insert("1.0", material[2] if material[2] else "")
+
+    # File Attachment Section
+    ctk.CTkLabel(
+        content_frame, 
+        text="Attach File:", 
+        font=root.header_font,
+        text_color=COLORS["text_primary"]
+    ).pack(pady=(20, 5))
+    
+    # Drop target frame
+    drop_frame = ctk.CTkFrame(
+        content_frame, 
+        width=600, 
+        height=100, 
+        fg_color=COLORS["bg_dark"],
+        corner_radius=8,
+        border_width=2,
+        border_color=COLORS["primary"]
+    )
+    drop_frame.pack(pady=(0, 10))
+    
+    # File preview label
+    file_preview = ctk.CTkLabel(
+        drop_frame,
+        text="Drag & drop file here or click 'Browse'",
+        font=root.text_font,
+        text_color=COLORS["text_secondary"],
+        compound="top",
+        justify="center"
+    )
+    file_preview.pack(expand=True, fill="both", padx=10, pady=10)
+    
+    # Make the frame a drop target
+    drop_frame.drop_target_register(DND_FILES)
+    drop_frame.dnd_bind('<<Drop>>', handle_drop)
+    
+    # File entry and buttons
+    file_control_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+    file_control_frame.pack(fill="x", padx=10)
+    
+    entry_file = ctk.CTkEntry(
+        file_control_frame, 
+        width=450,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["bg_dark"],
+        border_color=COLORS["primary"],
+        text_color=COLORS["text_primary"]
+    )
+    entry_file.pack(side="left", padx=(0, 5))
+    if is_edit and material and material[4]:
+        entry_file.insert(0, material[4])
+        update_file_preview(material[4])
+    
+    ctk.CTkButton(
+        file_control_frame,
+        text="Browse",
+        width=100,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["info"],
+        hover_color=COLORS["info_hover"],
+        command=choose_file
+    ).pack(side="left", padx=(0, 5))
+    
+    ctk.CTkButton(
+        file_control_frame,
+        text="Clear",
+        width=100,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["secondary"],
+        hover_color=COLORS["secondary_hover"],
+        command=clear_file
+    ).pack(side="left")
+
+    # Buttons
+    btn_frame = ctk.CTkFrame(content_frame, fg_color="transparent")
+    btn_frame.pack(pady=20)
+    
+    ctk.CTkButton(
+        btn_frame, 
+        text="Save", 
+        command=save,
+        width=120,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["success"] if not is_edit else COLORS["primary"],
+        hover_color=COLORS["success_hover"] if not is_edit else COLORS["primary_hover"]
+    ).pack(side="left", padx=10)
+    
+    ctk.CTkButton(
+        btn_frame, 
+        text="Cancel", 
+        command=top.destroy,
+        width=120,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["secondary"],
+        hover_color=COLORS["secondary_hover"]
+    ).pack(side="left", padx=10)
+
+def view_material():
+    """View material details in a formatted dialog"""
+    selected = listbox.curselection()
+    if not selected:
+        messagebox.showwarning("No Selection", "Please select a material first.", parent=root)
+        return
+        
+    # The list only holds LIST_COLUMNS rows; load full details on demand
+    material = db.get_material(materials[selected[0]].id)
+    if material is None:
+        messagebox.showwarning("Not Found", "This material no longer exists.", parent=root)
+        refresh_list(search_var.get().strip())
+        return
+    
+    # Create detailed view window
+    view_window = ctk.CTkToplevel(root)
+    view_window.title(f"View: {material[1]}")
+    view_window.geometry("800x700")
+    view_window.configure(fg_color=COLORS["bg_dark"])
+    
+    # Main frame with scrollbar
+    main_frame = ctk.CTkFrame(view_window, fg_color=COLORS["bg_light"], corner_radius=10)
+    main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+    
+    # Scrollable canvas
+    canvas = tk.Canvas(main_frame, bg=COLORS["bg_light"], highlightthickness=0)
+    scrollbar = ctk.CTkScrollbar(main_frame, orientation="vertical", command=canvas.yview, button_color=COLORS["primary"])
+    scrollable_frame = ctk.CTkFrame(canvas, fg_color=COLORS["bg_light"])
+    
+    scrollable_frame.bind(
+        "<Configure>",
+        lambda e: canvas.configure(
+            scrollregion=canvas.bbox("all")
+        )
+    )
+    
+    canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
+    canvas.configure(yscrollcommand=scrollbar.set)
+    
+    canvas.pack(side="left", fill="both", expand=True, padx=10, pady=10)
+    scrollbar.pack(side="right", fill="y", pady=10)
+    
+    # Display material details
+    details = [
+        ("Title", material[1]),
+        ("Tags", material[3] if material[3] else "None"),
+        ("Date Added", format_timestamp(material[5])),
+        ("Last Modified", format_timestamp(material[6])),
+        ("Content", material[2] if material[2] else "No content")
+    ]
+    
+    for label, value in details:
+        frame = ctk.CTkFrame(scrollable_frame, fg_color="transparent")
+        frame.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            frame, 
+            text=f"{label}:", 
+            font=root.header_font,
+            text_color=COLORS["text_primary"]
+        ).pack(side="left", anchor="w")
+        
+        if label == "Content":
+            content_text = ctk.CTkTextbox(
+                frame, 
+                width=700, 
+                height=200, 
+                wrap="word",
+                font=root.text_font,
+                corner_radius=8,
+                fg_color=COLORS["bg_dark"],
+                border_color=COLORS["primary"],
+                text_color=COLORS["text_primary"]
+            )
+            content_text.pack(fill="x", pady=(10, 0))
+            content_text.insert("1.0", value)
+            content_text.configure(state="disabled")
+        else:
+            ctk.CTkLabel(
+                frame, 
+                text=value, 
+                wraplength=700, 
+                justify="left",
+                font=root.text_font,
+                text_color=COLORS["text_secondary"]
+            ).pack(side="left", padx=10, anchor="w")
+    
+    # File attachment section
+    if material[4]:
+        file_frame = ctk.CTkFrame(scrollable_frame, fg_color=COLORS["bg_dark"], corner_radius=8)
+        file_frame.pack(fill="x", padx=20, pady=10)
+        
+        ctk.CTkLabel(
+            file_frame, 
+            text="Attached File:", 
+            font=root.header_font,
+            text_color=COLORS["text_primary"]
+        ).pack(anchor="w", padx=15, pady=(15, 5))
+        
+        # Names come from the local metadata cache; never block on Drive here
+        file_name = os.path.basename(material[4])
+        metadata = None
+        if is_drive_id(material[4]):
+            metadata = metadata_cache.get(material[4])
+            if metadata:
+                file_name = metadata.get("name", file_name)
+            elif drive_service:
+                file_name = "Loading..."
+
+        file_btn = ctk.CTkButton(
+            file_frame,
+            text=f"📄 {file_name}",
+            command=lambda: open_attachment(material[4]),
+            fg_color="transparent",
+            hover_color=COLORS["bg_light"],
+            anchor="w",
+            text_color=COLORS["info"],
+            font=root.text_font,
+            height=35
+        )
+        file_btn.pack(fill="x", padx=15, pady=(0, 5))
+
+        if drive_service and is_drive_id(material[4]) and \
+                not metadata_cache.is_fresh(metadata_cache.get(material[4])):
+            def show_name(transfer):
+                metadata = metadata_cache.get(material[4])
+                if metadata and file_btn.winfo_exists():
+                    file_btn.configure(text=f"📄 {metadata.get('name', file_name)}")
+
+            drive_service.submit_metadata_refresh(
+                [material[4]], metadata_cache, priority=PRIORITY_INTERACTIVE,
+                on_done=lambda transfer: root.after(0, lambda: show_name(transfer))
+            )
+        
+        if metadata and metadata.get("trashed"):
+            ctk.CTkLabel(
+                file_frame, 
+                text="⚠️ File was removed from Google Drive", 
+                text_color=COLORS["danger"],
+                font=root.small_font
+            ).pack(anchor="w", padx=15, pady=(0, 15))
+        elif not drive_service and not os.path.exists(material[4]):
+            ctk.CTkLabel(
+                file_frame, 
+                text="⚠️ File not found at specified path", 
+                text_color=COLORS["danger"],
+                font=root.small_font
+            ).pack(anchor="w", padx=15, pady=(0, 15))
+
+        # Where the current search matched inside the attachment
+        snippet = db.attachment_snippet(material[0], search_var.get().strip())
+        if snippet:
+            ctk.CTkLabel(
+                file_frame,
+                text="Matched in attachment:",
+                font=root.small_font,
+                text_color=COLORS["text_secondary"]
+            ).pack(anchor="w", padx=15)
+            snippet_text = ctk.CTkTextbox(
+                file_frame,
+                height=80,
+                wrap="word",
+                font=root.text_font,
+                corner_radius=8,
+                fg_color=COLORS["bg_light"],
+                text_color=COLORS["text_primary"]
+            )
+            snippet_text.pack(fill="x", padx=15, pady=(5, 15))
+            snippet_text.tag_config("match", background=COLORS["warning"], foreground=COLORS["bg_dark"])
+            for text, matched in highlight_segments(snippet):
+                snippet_text.insert("end", text, "match" if matched else ())
+            snippet_text.configure(state="disabled")
+    
+    # Action buttons
+    action_frame = ctk.CTkFrame(scrollable_frame, fg_color="transparent")
+    action_frame.pack(fill="x", padx=20, pady=20)
+    
+    ctk.CTkButton(
+        action_frame,
+        text="Edit",
+        command=lambda: [view_window.destroy(), add_material(material[0])],
+        width=120,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color="#4a90e2",
+        hover_color= "#357abd"
+    ).pack(side="left", padx=5)
+    
+    ctk.CTkButton(
+        action_frame,
+        text="Delete",
+        command=lambda: confirm_delete(material[0], view_window),
+        width=120,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["danger"],
+        hover_color=COLORS["danger_hover"]
+    ).pack(side="left", padx=5)
+    
+    ctk.CTkButton(
+        action_frame,
+        text="Close",
+        command=view_window.destroy,
+        width=120,
+        height=35,
+        font=root.text_font,
+        corner_radius=8,
+        fg_color=COLORS["secondary"],
+        hover_color=COLORS["secondary_hover"]
+    ).pack(side="right", padx=5)
+
+def open_attachment(file_path: str = None):
+    """Open attached file with default application"""
+    if file_path is None:
+        selected = listbox.curselection()
+        if not selected:
+            messagebox.showwarning("No Selection", "Please select a material first.", parent=root)
+            return
+        file_path = materials[selected[0]].file_path
+    
+    if not file_path:
+        messagebox.showwarning("No Attachment", "This material has no file attachment.", parent=root)
+        return
+
+    # Check if it's a local file path first
+    if os.path.exists(file_path):
+        try:
+            webbrowser.open(file_path)
+            return
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not open file: {str(e)}", parent=root)
+            return
+
+    if drive_service:
+        status_var.set("Opening file from Google Drive...")
+
+        def on_progress(transfer):
+            if transfer.total_bytes:
+                percent = int(transfer.bytes_done * 100 / transfer.total_bytes)
+                root.after(0, lambda: status_var.set(f"Downloading file... {percent}%"))
+
+        def on_done(transfer):
+            root.after(0, lambda: finish_download(transfer))
+
+        # Interactive priority: runs ahead of queued background uploads
+        drive_service.submit_open(file_path, attachment_cache,
+                                  on_progress=on_progress, on_done=on_done,
+                                  metadata_cache=metadata_cache)
+    else:
+        messagebox.showwarning("File Not Found", 
+                             f"The file was not found at:\n{file_path}\n\n"
+                             "It may have been moved or deleted, or Google Drive is not connected.", 
+                             parent=root)
+
+def finish_download(transfer):
+    """Open a finished download on the Tk thread"""
+    if transfer.status == "done":
+        webbrowser.open(str(transfer.result))
+        status_var.set("File opened successfully.")
+        text_indexer.request_scan()  # the cached copy can now be indexed
+    elif transfer.status == "cancelled":
+        status_var.set("Download cancelled.")
+    else:
+        messagebox.showerror("Error", f"Could not open file from Google Drive: {transfer.error}", parent=root)
+        status_var.set("Error opening file from Google Drive.")
+
+def confirm_delete(material_id: int, parent_window=None):
+    """Confirm before deleting material"""
+    parent = parent_window if parent_window else root
+    if messagebox.askyesno(
+        "Confirm Delete",
+        "Are you sure you want to delete this material?\nThis action cannot be undone.",
+        parent=parent
+    ):
+        # Also drops a queued upload, or queues the Drive copy for the Drive trash
+        upload_manager.delete_material(material_id)
+        if parent_window:
+            parent_window.destroy()
+        messagebox.showinfo("Deleted", "Material deleted successfully.", parent=root)
+
+SEARCH_DEBOUNCE_MS = 250
+search_job: Optional[str] = None
+
+def search_materials(event=None):
+    """Search materials with optional event parameter for binding.
+
+    Keystrokes are debounced; the query itself runs on the search worker.
+    """
+    global search_job
+    if search_job is not None:
+        root.after_cancel(search_job)
+    search_job = root.after(SEARCH_DEBOUNCE_MS, run_search)
+
+def run_search():
+    global search_job
+    search_job = None
+    search_worker.submit(search_var.get().strip(), selected_tags, tag_match_any.get())
+
+def on_search_results(generation: int, query: str, total: int, first_page: Tuple[List[Tuple], Optional[tuple]]):
+    """Called on the worker thread; hand the results to the Tk thread"""
+    root.after(0, lambda: show_search_results(generation, query, total, first_page))
+
+def show_search_results(generation: int, query: str, total: int, first_page: Tuple[List[Tuple], Optional[tuple]]):
+    if search_worker.is_current(generation):
+        show_materials(MaterialPager(db, query, total, first_page, tags=selected_tags,
+                                     match_any=tag_match_any.get(), labels=row_labels), query,
+                       keep_view=generation == keep_view_generation)
+        if first_page_pending:
+            on_first_page()
+
+def on_first_page():
+    global first_page_pending
+    first_page_pending = False
+    refresh_tag_panel()
+    if STARTUP_TRACE:
+        root.update_idletasks()
+        trace_startup("first_page")
+        if STARTUP_TRACE == "exit":
+            shutdown()
+
+# Search generation whose results keep the list's scroll position and selection
+keep_view_generation: Optional[int] = None
+
+def refresh_list(query: str = "", keep_view: bool = False):
+    """Refresh the materials list with optional search query.
+
+    The query runs on the search worker like any search, superseding one in
+    flight; the list is replaced when its results arrive.
+    """
+    global keep_view_generation
+    generation = search_worker.submit(query, selected_tags, tag_match_any.get())
+    keep_view_generation = generation if keep_view else None
+    schedule_tag_panel_refresh()
+
+# Changes to more materials than this re-run the query instead of patching the
+# list row by row (a bulk import commits hundreds per batch)
+MAX_PATCHED_CHANGES = 50
+
+def on_materials_changed(kind: str, ids: List[int]):
+    """DatabaseManager change event; may arrive on any thread"""
+    root.after(0, lambda: apply_material_changes(kind, ids))
+
+def apply_material_changes(kind: str, ids: List[int]):
+    """Patch the list for added, edited or deleted materials without re-running the query.
+
+    Edited rows move to where they now sort (the top, when browsing by date)
+    and deleted rows drop out, keeping the scroll position and selection.
+    Relevance-ranked results can't place a row without re-ranking, so they
+    are fetched again instead, as is a list that never loaded a changed row
+    or a change to more than MAX_PATCHED_CHANGES materials.
+    """
+    for material_id in ids:
+        row_labels.invalidate(material_id)
+    schedule_tag_panel_refresh()
+    if materials is None:
+        return
+    selected_id = get_selected_id()
+    if len(ids) > MAX_PATCHED_CHANGES or (kind != CHANGE_DELETED and materials.ranked):
+        refresh_list(materials.query, keep_view=True)
+        return
+    for material_id in ids:
+        index = materials.find(material_id)
+        if index is not None:
+            materials.splice(removed=index)
+            listbox.rows_spliced(removed=index)
+        elif kind != CHANGE_INSERTED:
+            refresh_list(materials.query, keep_view=True)  # position unknown
+            return
+    selected = materials.find(selected_id) if selected_id is not None else None
+    if kind != CHANGE_DELETED:
+        # In position order, so each insert leaves the earlier ones in place
+        for position, row in db.locate_materials(ids, materials.query, columns=ROW_COLUMNS,
+                                                 **materials.filters):
+            materials.splice(inserted=position, row=row)
+            listbox.rows_spliced(inserted=position)
+            if row[0] == selected_id:
+                selected = position
+            elif selected is not None and selected >= position:
+                selected += 1
+    listbox.select(selected)
+
+TAG_PANEL_LIMIT = 50
+TAG_SUGGESTIONS = 6
+selected_tags: List[str] = []
+tag_panel_refresh_pending = False
+
+def toggle_tag(name: str):
+    """Add or remove a tag from the list filter"""
+    if name in selected_tags:
+        selected_tags.remove(name)
+    else:
+        selected_tags.append(name)
+    refresh_tag_panel()
+    run_search()
+
+def schedule_tag_panel_refresh():
+    """Redraw the tag panel once per Tk iteration, however many changes ask for it"""
+    global tag_panel_refresh_pending
+    if not tag_panel_refresh_pending:
+        tag_panel_refresh_pending = True
+        root.after(0, refresh_tag_panel)
+
+def refresh_tag_panel():
+    """Redraw the tag facets from the per-tag counts the database maintains"""
+    global tag_panel_refresh_pending
+    tag_panel_refresh_pending = False
+    for button in tag_panel.winfo_children():
+        button.destroy()
+    # Selected tags stay listed (first) even when they are not among the most used
+    facets = db.tag_counts(names=selected_tags) if selected_tags else []
+    facets += [facet for facet in db.tag_counts(TAG_PANEL_LIMIT) if facet[0] not in selected_tags]
+    for name, count in facets:
+        selected = name in selected_tags
+        ctk.CTkButton(
+            tag_panel,
+            text=f"{name}  ({count})",
+            command=lambda name=name: toggle_tag(name),
+            anchor="w",
+            height=28,
+            corner_radius=6,
+            fg_color=COLORS["primary"] if selected else "transparent",
+            hover_color=COLORS["primary_hover"] if selected else COLORS["bg_light"],
+            text_color=COLORS["text_primary"],
+            font=root.small_font
+        ).pack(fill="x", pady=1)
+
+def show_materials(results: MaterialPager, query: str = "", keep_view: bool = False):
+    """Point the list view at a new result set"""
+    global materials
+    materials = results
+    listbox.set_rows(
+        results,
+        "No materials found" if query or selected_tags else "No materials available",
+        keep_view
+    )
+
+def on_closing():
+    """Handle window closing event"""
+    if messagebox.askokcancel("Quit", "Do you want to quit?"):
+        shutdown()
+
+def shutdown():
+    """Stop the background workers, close the database and the window"""
+    search_worker.stop()
+    text_indexer.close()
+    bulk_importer.close()
+    upload_manager.close()
+    if sync_engine:
+        sync_engine.close()
+    if drive_service:
+        drive_service.close()
+    db.close()
+    root.destroy()
+
+# === GUI ===
+class App(ctk.CTk, TkinterDnD.DnDWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.TkdndVersion = TkinterDnD._require(self)
+        
+        # Configure custom theme
+        self.configure(fg_color=COLORS["bg_dark"])
+        
+        # Configure fonts
+        self.title_font = ("Segoe UI", 16, "bold")
+        self.header_font = ("Segoe UI", 14, "bold")
+        self.text_font = ("Segoe UI", 12)
+        self.small_font = ("Segoe UI", 11)
+
+# How each attachment sync state is shown at the right of a list row
+SYNC_LABELS = {
+    SYNC_LOCAL: ("local only", COLORS["text_secondary"]),
+    SYNC_QUEUED: ("⏳ queued", COLORS["text_secondary"]),
+    SYNC_UPLOADING: ("⇡ uploading", COLORS["info"]),
+    SYNC_FAILED: ("⚠ sync failed", COLORS["danger"]),
+    SYNC_SYNCED: ("☁ on Drive", COLORS["success"]),
+}
+
+class MaterialListView(tk.Canvas):
+    """Virtualized replacement for tk.Listbox.
+
+    Rows come from a MaterialPager and only the rows inside the viewport are
+    formatted and drawn, so the cost of a redraw does not depend on the
+    number of materials. Exposes the small part of the Listbox API the app
+    uses (curselection, yview, bind). `sync_state(row)` names the Drive sync
+    state shown at the right of each row.
+    """
+
+    def __init__(self, master, font, row_height: int = 26, yscrollcommand=None,
+                 sync_state: Optional[Callable[[MaterialRow], str]] = None, small_font=None,
+                 **kwargs):
+        super().__init__(master, highlightthickness=0, borderwidth=0, **kwargs)
+        self.font = font
+        self.small_font = small_font or font
+        self.row_height = row_height
+        self.yscrollcommand = yscrollcommand
+        self.sync_state = sync_state
+        self.rows: Optional[MaterialPager] = None
+        self.empty_text = ""
+        self.top = 0
+        self.selected: Optional[int] = None
+
+        self.bind("<Configure>", lambda e: self.redraw())
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<MouseWheel>", lambda e: self.yview_scroll(-1 if e.delta > 0 else 1, "units"))
+        self.bind("<Button-4>", lambda e: self.yview_scroll(-1, "units"))
+        self.bind("<Button-5>", lambda e: self.yview_scroll(1, "units"))
+        self.bind("<Up>", lambda e: self._move_selection(-1))
+        self.bind("<Down>", lambda e: self._move_selection(1))
+
+    def set_rows(self, rows: MaterialPager, empty_text: str = "", keep_view: bool = False):
+        """Show a new result set; `keep_view` keeps the scroll offset and selected material"""
+        selected_id = None
+        if keep_view and self.rows and self.selected is not None and self.selected < len(self.rows):
+            selected_id = self.rows[self.selected].id
+        self.rows = rows
+        self.empty_text = empty_text
+        self.top = max(0, min(self.top, len(rows) - self.visible_count())) if keep_view else 0
+        self.selected = rows.find(selected_id) if selected_id is not None else None
+        self.redraw()
+
+    def rows_spliced(self, removed: Optional[int] = None, inserted: Optional[int] = None):
+        """Keep the viewport on the same rows after MaterialPager.splice(); select() redraws"""
+        if removed is not None:
+            if removed < self.top:
+                self.top -= 1
+            if self.selected == removed:
+                self.selected = None
+            elif self.selected is not None and self.selected > removed:
+                self.selected -= 1
+        if inserted is not None:
+            if inserted < self.top:
+                self.top += 1
+            if self.selected is not None and self.selected >= inserted:
+                self.selected += 1
+        self.top = max(0, min(self.top, len(self.rows) - self.visible_count()))
+
+    def select(self, index: Optional[int]):
+        self.selected = index
+        self.redraw()
+
+    def visible_count(self) -> int:
+        return max(1, self.winfo_height() // self.row_height)
+
+    def curselection(self) -> Tuple:
+        return (self.selected,) if self.selected is not None else ()
+
+    def yview(self, *args):
+        """Scrollbar protocol: ('moveto', fraction) or ('scroll', n, what)"""
+        if not args or not self.rows:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            self.yview_scroll(int(args[1]), args[2])
+
+    def yview_scroll(self, number: int, what: str):
+        step = self.visible_count() if what == "pages" else 1
+        self._scroll_to(self.top + number * step)
+
+    def _scroll_to(self, top: int):
+        total = len(self.rows) if self.rows else 0
+        top = max(0, min(top, total - self.visible_count()))
+        if top != self.top:
+            self.top = top
+            self.redraw()
+
+    def _on_click(self, event):
+        self.focus_set()
+        index = self.top + event.y // self.row_height
+        if self.rows and index < len(self.rows):
+            self.selected = index
+            self.redraw()
+
+    def _move_selection(self, delta: int):
+        if not self.rows:
+            return
+        index = 0 if self.selected is None else self.selected + delta
+        self.selected = max(0, min(index, len(self.rows) - 1))
+        if self.selected < self.top:
+            self._scroll_to(self.selected)
+        elif self.selected >= self.top + self.visible_count():
+            self._scroll_to(self.selected - self.visible_count() + 1)
+        self.redraw()
+
+    def redraw(self):
+        self.delete("all")
+        total = len(self.rows) if self.rows else 0
+        width = self.winfo_width()
+        if not total:
+            self.create_text(8, self.row_height // 2, text=self.empty_text, anchor="w",
+                             font=self.font, fill=COLORS["text_primary"])
+            if self.yscrollcommand:
+                self.yscrollcommand(0.0, 1.0)
+            return
+
+        end = min(total, self.top + self.visible_count() + 1)
+        for index in range(self.top, end):
+            y = (index - self.top) * self.row_height
+            if index == self.selected:
+                self.create_rectangle(0, y, width, y + self.row_height,
+                                      fill=COLORS["primary"], width=0)
+            self.create_text(8, y + self.row_height // 2, text=self.rows.display(index),
+                             anchor="w", font=self.font, fill=COLORS["text_primary"])
+            state = self.sync_state(self.rows[index]) if self.sync_state else ""
+            if state:
+                text, color = SYNC_LABELS[state]
+                self.create_text(width - 8, y + self.row_height // 2, text=text, anchor="e",
+                                 font=self.small_font, fill=color)
+        if self.yscrollcommand:
+            self.yscrollcommand(self.top / total, min(1.0, end / total))
+
+# Nothing is built at import time: the window only exists once main() runs
+def main():
+    """Build the window and run the Tk main loop (see StudyMaterialManager.py)"""
+    global root, search_var, listbox, tag_match_any, tag_panel, get_selected_id, drive_button, status_var
+
+    # Use our custom class that inherits from both CTk and DnDWrapper
+    root = App()
+    root.title("📚 Study Material Manager")
+    root.geometry("1000x800")  # Slightly larger window
+
+    # Configure grid
+    root.grid_columnconfigure(0, weight=1)
+    root.grid_rowconfigure(1, weight=1)
+
+    # Search Bar
+    search_frame = ctk.CTkFrame(root, height=60, fg_color=COLORS["bg_light"], corner_radius=10)
+    search_frame.grid(row=0, column=0, sticky="ew", padx=15, pady=15)
+    search_frame.grid_columnconfigure(1, weight=1)
+
+    ctk.CTkLabel(
+        search_frame, 
+        text="🔍 Search:", 
+        font=root.header_font,
+        text_color=COLORS["text_primary"]
+    ).grid(row=0, column=0, padx=(15, 10), pady=15)
+
+    search_var = ctk.StringVar()
+    search_entry = ctk.CTkEntry(
+        search_frame,
+        textvariable=search_var,
+        placeholder_text="Search by title or tags...",
+        font=root.text_font,
+        height=35,
+        corner_radius=8,
+        fg_color=COLORS["bg_dark"],
+        border_color=COLORS["primary"],
+        text_color=COLORS["text_primary"]
+    )
+    search_entry.grid(row=0, column=1, sticky="ew", padx=(0, 15), pady=15)
+    search_entry.bind("<KeyRelease>", lambda e: search_materials())
+
+    # Main content area
+    main_frame = ctk.CTkFrame(root, fg_color=COLORS["bg_light"], corner_radius=10)
+    main_frame.grid(row=1, column=0, sticky="nsew", padx=15, pady=(0, 15))
+    main_frame.grid_columnconfigure(0, weight=1)
+    main_frame.grid_rowconfigure(0, weight=1)
+
+    # Listbox with scrollbar
+    list_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+    list_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+    list_frame.grid_columnconfigure(0, weight=1)
+    list_frame.grid_rowconfigure(0, weight=1)
+
+    scrollbar = ctk.CTkScrollbar(list_frame, orientation="vertical", button_color=COLORS["primary"])
+    scrollbar.grid(row=0, column=1, sticky="ns")
+
+    listbox = MaterialListView(
+        list_frame,
+        font=root.text_font,
+        bg=COLORS["bg_dark"],
+        yscrollcommand=scrollbar.set,
+        sync_state=row_sync_state,
+        small_font=root.small_font
+    )
+    listbox.grid(row=0, column=0, sticky="nsew")
+    scrollbar.configure(command=listbox.yview)
+
+    # Tag facets; clicking a tag filters the list to it
+    tag_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+    tag_frame.grid(row=0, column=1, sticky="ns", padx=(0, 10), pady=10)
+    tag_frame.grid_rowconfigure(2, weight=1)
+
+    ctk.CTkLabel(
+        tag_frame,
+        text="🏷️ Tags",
+        font=root.header_font,
+        text_color=COLORS["text_primary"]
+    ).grid(row=0, column=0, sticky="w")
+
+    tag_match_any = ctk.BooleanVar(value=False)
+    ctk.CTkSwitch(
+        tag_frame,
+        text="Match any selected tag",
+        variable=tag_match_any,
+        command=run_search,
+        font=root.small_font,
+        progress_color=COLORS["primary"]
+    ).grid(row=1, column=0, sticky="w", pady=5)
+
+    tag_panel = ctk.CTkScrollableFrame(tag_frame, width=200, fg_color=COLORS["bg_dark"], corner_radius=8)
+    tag_panel.grid(row=2, column=0, sticky="ns")
+
+    # Bind double click to view material
+    listbox.bind("<Double-Button-1>", lambda e: view_material())
+
+    # Files and folders dropped on the list are bulk imported
+    listbox.drop_target_register(DND_FILES)
+    listbox.dnd_bind('<<Drop>>', handle_bulk_drop)
+
+    # Action buttons
+    btn_frame = ctk.CTkFrame(root, fg_color=COLORS["bg_light"], corner_radius=10)
+    btn_frame.grid(row=2, column=0, sticky="ew", padx=15, pady=(0, 15))
+
+    def get_selected_id() -> Optional[int]:
+        """Get ID of currently selected material"""
+        selected = listbox.curselection()
+        return materials[selected[0]].id if selected else None
+
+    button_configs = [
+        ("➕ Add", add_material, COLORS["success"], COLORS["success_hover"]),
+        ("👁️ View", view_material, COLORS["primary"], COLORS["primary_hover"]),
+        ("📂 Open File", open_attachment, COLORS["info"], COLORS["info_hover"]),
+        ("✏️ Edit", lambda: add_material(get_selected_id()), "#4a90e2", "#357abd"),
+        ("🗑️ Delete", lambda: confirm_delete(get_selected_id()), COLORS["danger"], COLORS["danger_hover"]),
+        ("🔄 Refresh", lambda: refresh_list(), COLORS["secondary"], COLORS["secondary_hover"])
+    ]
+
+    for i, (text, command, color, hover_color) in enumerate(button_configs):
+        ctk.CTkButton(
+            btn_frame,
+            text=text,
+            command=command,
+            fg_color=color,
+            hover_color=hover_color,
+            width=120,
+            height=35,
+            corner_radius=8,
+            font=root.text_font
+        ).grid(row=0, column=i, padx=8, pady=8)
+
+    drive_button = ctk.CTkButton(
+        btn_frame,
+        text="Connect to Drive",
+        command=connect_to_drive,
+        fg_color=COLORS["info"],
+        hover_color=COLORS["info_hover"],
+        width=150,
+        height=35,
+        corner_radius=8,
+        font=root.text_font
+    )
+    drive_button.grid(row=0, column=len(button_configs), padx=8, pady=8)
+
+    # Status bar
+    status_frame = ctk.CTkFrame(root, height=40, fg_color=COLORS["bg_light"], corner_radius=10)
+    status_frame.grid(row=3, column=0, sticky="ew", padx=15, pady=(0, 15))
+    status_var = ctk.StringVar(value="Ready")
+    ctk.CTkLabel(
+        status_frame, 
+        textvariable=status_var, 
+        anchor="w",
+        font=root.small_font,
+        text_color=COLORS["text_secondary"]
+    ).pack(fill="x", padx=15)
+
+    listbox.set_rows([], "Loading materials...")
+
+    # Run the application
+    root.protocol("WM_DELETE_WINDOW", on_closing)
+
+    # Paint the window before the database is opened; the first page is then
+    # loaded on the search worker like any other query
+    root.update()
+    trace_startup("first_paint")
+    open_database()
+    search_worker.submit("")
+    root.after_idle(resume_imports)
+    root.mainloop()
@@ -0,0 +1,17 @@
+import pytest
+
+from benchmarks.fake_drive import FakeDriveServer
+from study_core import DatabaseManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = DatabaseManager(str(tmp_path / "materials.db"))
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def drive_server():
+    with FakeDriveServer() as server:
+        yield server
@@ -0,0 +1,16 @@
+"""Shared state of the stand-in Google client libraries in this directory.
+
+The `google` and `googleapiclient` packages here imitate just the parts
+drive_service uses, without any network access. Every call that would hit
+the network is recorded in CALLS; FOLDER (the app folder on "Drive", or None
+once deleted) and AUTH control the answers.
+"""
+CALLS = []
+FOLDER = {"id": "folder-1"}
+AUTH = {"revoked": False}
+
+
+def reset():
+    CALLS.clear()
+    FOLDER["id"] = "folder-1"
+    AUTH["revoked"] = False
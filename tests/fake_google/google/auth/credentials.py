@@ -0,0 +1,17 @@
+import datetime
+
+
+class Credentials:
+    def __init__(self):
+        self.token = None
+        self.expiry = None
+
+    @property
+    def valid(self):
+        return self.token is not None and (
+            self.expiry is None or self.expiry > datetime.datetime.utcnow())
+
+    def before_request(self, request, method, url, headers):
+        if not self.valid:
+            self.refresh(request)
+        headers["authorization"] = f"Bearer {self.token}"
@@ -0,0 +1,4 @@
+class RefreshError(Exception):
+    def __init__(self, *args, retryable=False):
+        super().__init__(*args)
+        self.retryable = retryable
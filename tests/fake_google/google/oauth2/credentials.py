@@ -0,0 +1,29 @@
+import datetime
+import itertools
+
+from fake_state import AUTH, CALLS
+from google.auth.exceptions import RefreshError
+
+TOKENS = itertools.count(2)
+
+
+class Credentials:
+    """A signed-in user's token; refresh() hands out token-2, token-3, ..."""
+
+    def __init__(self, expired=False):
+        self.client_id = "client"
+        self.refresh_token = "refresh"
+        self.token = "token-1"
+        self.expiry = datetime.datetime.utcnow() + datetime.timedelta(
+            seconds=-10 if expired else 3600)
+
+    @property
+    def valid(self):
+        return self.expiry > datetime.datetime.utcnow()
+
+    def refresh(self, request):
+        CALLS.append("refresh")
+        if AUTH["revoked"]:
+            raise RefreshError("invalid_grant: Token has been expired or revoked.")
+        self.token = f"token-{next(TOKENS)}"
+        self.expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=3600)
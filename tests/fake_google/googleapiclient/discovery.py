@@ -0,0 +1,55 @@
+from fake_state import CALLS, FOLDER
+from googleapiclient.errors import HttpError
+
+DISCOVERY_URI = "https://www.googleapis.com/discovery/v1/apis/{api}/{apiVersion}/rest"
+NEW_FOLDER_ID = "folder-2"
+
+
+class Response(dict):
+    def __init__(self, status):
+        super().__init__()
+        self.status = status
+
+
+class Request:
+    def __init__(self, name, result):
+        self.name = name
+        self.result = result
+
+    def execute(self):
+        CALLS.append(self.name)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+class Files:
+    def list(self, **kwargs):
+        return Request("files.list", {"files": [{"id": FOLDER["id"]}] if FOLDER["id"] else []})
+
+    def create(self, **kwargs):
+        FOLDER["id"] = NEW_FOLDER_ID
+        return Request("files.create", {"id": NEW_FOLDER_ID})
+
+    def get(self, fileId, fields):
+        if fileId == FOLDER["id"]:
+            return Request("files.get", {"id": fileId})
+        return Request("files.get", HttpError(Response(404)))
+
+
+class Service:
+    def __init__(self, document, credentials):
+        self.document = document
+        self.credentials = credentials
+
+    def files(self):
+        return Files()
+
+
+def build(name, version, credentials=None, cache_discovery=True):
+    CALLS.append("discovery")
+    return Service({"name": name, "version": version}, credentials)
+
+
+def build_from_document(document, credentials=None):
+    return Service(document, credentials)
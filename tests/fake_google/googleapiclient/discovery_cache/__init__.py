@@ -0,0 +1,8 @@
+import json
+
+from fake_state import CALLS
+
+
+def get_static_doc(name, version):
+    CALLS.append("static_doc")
+    return json.dumps({"name": name, "version": version, "revision": "1"})
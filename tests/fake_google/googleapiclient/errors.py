@@ -0,0 +1,5 @@
+class HttpError(Exception):
+    def __init__(self, resp, content=b""):
+        super().__init__(f"HTTP {resp.status}")
+        self.resp = resp
+        self.content = content
@@ -0,0 +1,4 @@
+class MediaFileUpload:
+    def __init__(self, filename, mimetype=None):
+        self.filename = filename
+        self.mimetype = mimetype
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from study_core import BulkImporter, UploadManager
+from study_core.bulk_import import derive_material
+
+
+@pytest.fixture
+def course(tmp_path):
+    """CS101/Week 3/... with three files and a hidden one that is never imported"""
+    week = tmp_path / "CS101" / "Week 3"
+    week.mkdir(parents=True)
+    for name in ("lecture_notes.pdf", "problem-set.docx", "reading list.txt", ".DS_Store"):
+        (week / name).write_bytes(name.encode())
+    return tmp_path / "CS101"
+
+
+@pytest.fixture
+def uploads(db):
+    manager = UploadManager(db)
+    yield manager
+    manager.close()
+
+
+def queued(db):
+    return db.reader().execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
+
+
+def test_titles_and_tags_come_from_the_path():
+    path = os.path.join("courses", "CS101", "Week 3", "lecture_notes.pdf")
+    assert derive_material(path, "courses") == ("Lecture notes", "cs101, week-3")
+    assert derive_material(os.path.join("courses", "x.pdf"), "courses") == ("X", "")
+
+
+def test_resumed_job_skips_what_was_imported(db, course, uploads):
+    importer = BulkImporter(db, batch_size=2, upload_manager=uploads)
+    job = importer.create_job([str(course)])
+    assert importer.run(job) == (3, 0)
+    assert queued(db) == 3
+
+    (course / "Week 3" / "late.pdf").write_bytes(b"late")
+    assert importer.run(job) == (1, 3)
+    assert queued(db) == 4
+    assert sorted(row[0] for row in db.reader().execute("SELECT title FROM materials")) == [
+        "Late", "Lecture notes", "Problem set", "Reading list"]
+
+
+def test_failed_queueing_queues_nothing(db, course, uploads, monkeypatch):
+    importer = BulkImporter(db, upload_manager=uploads)
+    job = importer.create_job([str(course)])
+
+    def crash():
+        raise RuntimeError("crashed")
+
+    monkeypatch.setattr(uploads, "_queue_changed", crash)
+    with pytest.raises(RuntimeError):
+        importer.run(job)
+    # The uploads rolled back with upload_queued, so resuming queues each file once
+    assert queued(db) == 0
+    monkeypatch.undo()
+    assert importer.run(job) == (0, 3)
+    assert queued(db) == 3
+
+
+def test_drain_woken_only_after_commit(db, uploads, tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_bytes(b"a")
+    with db.transaction():
+        uploads.enqueue_many([(1, str(path))])
+        assert not uploads.wakeup.is_set()
+    assert uploads.wakeup.is_set()
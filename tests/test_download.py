@@ -0,0 +1,95 @@
+import hashlib
+import os
+import re
+
+import pytest
+
+from study_core import DownloadError, RangedDownload
+
+PART_SIZE = 64 * 1024
+DATA = os.urandom(PART_SIZE * 5 + 123)
+
+
+class ScriptedHttp:
+    """Answers ranged GETs for DATA; `mangle(first, last, data)` can corrupt a response"""
+
+    def __init__(self, mangle=None):
+        self.mangle = mangle
+
+    def request(self, method, url, body=None, headers=None):
+        first, last = map(int, re.fullmatch(r"bytes=(\d+)-(\d+)", headers["Range"]).groups())
+        last = min(last, len(DATA) - 1)
+        response = (206, {"content-range": f"bytes {first}-{last}/{len(DATA)}"},
+                    DATA[first:last + 1])
+        return self.mangle(first, last, response) if self.mangle else response
+
+    def close(self):
+        pass
+
+
+def leftovers(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".part")]
+
+
+@pytest.mark.parametrize("known_size", [True, False])
+def test_parallel_parts_reassemble(drive_server, tmp_path, known_size):
+    resource = drive_server.state.add_file("lecture.pdf", DATA)
+    progress = []
+    destination = str(tmp_path / "lecture.pdf")
+    RangedDownload(lambda: "token", resource["id"], destination,
+                   size=len(DATA) if known_size else None, md5=resource["md5Checksum"],
+                   part_size=PART_SIZE, connections=3, files_url=drive_server.files_url,
+                   on_progress=lambda done, total: progress.append((done, total))).run()
+    with open(destination, "rb") as fh:
+        assert fh.read() == DATA
+    assert progress[-1] == (len(DATA), len(DATA))
+    assert not leftovers(tmp_path)
+
+
+def test_empty_file(drive_server, tmp_path):
+    resource = drive_server.state.add_file("empty.txt", b"")
+    destination = str(tmp_path / "empty.txt")
+    RangedDownload(lambda: "token", resource["id"], destination,
+                   files_url=drive_server.files_url).run()
+    assert os.path.getsize(destination) == 0
+
+
+def wrong_range(first, last, response):
+    if first:
+        return 206, {"content-range": f"bytes 0-{last - first}/{len(DATA)}"}, response[2]
+    return response
+
+
+def short_read(first, last, response):
+    return response[:2] + (response[2][:-1],) if first else response
+
+
+def refused(first, last, response):
+    return (403, {}, b"forbidden") if first else response
+
+
+@pytest.mark.parametrize("mangle, message", [
+    (wrong_range, "HTTP 206 for bytes"),
+    (short_read, "Short read"),
+    (refused, "HTTP 403"),
+])
+def test_bad_part_fails_and_keeps_destination(tmp_path, mangle, message):
+    destination = tmp_path / "notes.txt"
+    destination.write_bytes(b"previous version")
+    download = RangedDownload(lambda: "token", "file-id", str(destination), size=len(DATA),
+                              part_size=PART_SIZE, connections=1, http=ScriptedHttp(mangle))
+    with pytest.raises(DownloadError, match=message):
+        download.run()
+    assert destination.read_bytes() == b"previous version"
+    assert not leftovers(tmp_path)
+
+
+def test_checksum_mismatch(tmp_path):
+    destination = tmp_path / "notes.txt"
+    download = RangedDownload(lambda: "token", "file-id", str(destination), size=len(DATA),
+                              md5=hashlib.md5(b"something else").hexdigest(),
+                              part_size=PART_SIZE, connections=1, http=ScriptedHttp())
+    with pytest.raises(DownloadError, match="Checksum mismatch"):
+        download.run()
+    assert not destination.exists()
+    assert not leftovers(tmp_path)
@@ -0,0 +1,141 @@
+import importlib
+import json
+import os
+import pickle
+import sys
+import threading
+
+import pytest
+
+from .util import wait_for
+
+FAKES = os.path.join(os.path.dirname(__file__), "fake_google")
+FAKED = ("google", "googleapiclient", "fake_state", "study_core.drive_service")
+
+
+def faked(name):
+    return any(name == prefix or name.startswith(prefix + ".") for prefix in FAKED)
+
+
+@pytest.fixture
+def fakes(tmp_path, monkeypatch):
+    """The fake Google libraries (fake_google/fake_state.py), in place of any installed ones"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(FAKES)
+    saved = {name: module for name, module in sys.modules.items() if faked(name)}
+    for name in saved:
+        del sys.modules[name]
+    state = importlib.import_module("fake_state")
+    state.reset()
+    yield state
+    for name in [name for name in sys.modules if faked(name)]:
+        del sys.modules[name]
+    sys.modules.update(saved)
+
+
+@pytest.fixture
+def drive_service(fakes):
+    return importlib.import_module("study_core.drive_service")
+
+
+@pytest.fixture
+def connect(drive_service):
+    services = []
+
+    def connect(**kwargs):
+        service = drive_service.DriveService(**kwargs)
+        services.append(service)
+        return service
+
+    yield connect
+    for service in services:
+        service.close()
+
+
+def save_token(expired=False):
+    from google.oauth2.credentials import Credentials
+    with open("token.pickle", "wb") as fh:
+        pickle.dump(Credentials(expired=expired), fh)
+
+
+def saved_token():
+    with open("token.pickle", "rb") as fh:
+        return pickle.load(fh).token
+
+
+def test_first_connect_looks_up_and_caches_folder(fakes, connect):
+    save_token()
+    service = connect()
+    assert service.folder_id == "folder-1"
+    # The discovery document ships with the client library; no fetch needed
+    assert fakes.CALLS == ["static_doc", "files.list"]
+    with open("drive_state.json", encoding="utf-8") as fh:
+        state = json.load(fh)
+    assert state["folder"]["id"] == "folder-1"
+    assert state["discovery"]["document"]["name"] == "drive"
+
+
+def test_reconnect_makes_no_calls_up_front(fakes, connect):
+    save_token()
+    connect().close()
+    fakes.CALLS.clear()
+
+    service = connect()
+    assert service.folder_id == "folder-1"
+    assert "static_doc" not in fakes.CALLS
+    assert "files.list" not in fakes.CALLS
+    wait_for(lambda: "files.get" in fakes.CALLS)  # the folder is checked in the background
+
+
+def test_deleted_folder_is_replaced(fakes, connect):
+    save_token()
+    connect().close()
+    fakes.FOLDER["id"] = None
+
+    changed = []
+    service = connect(on_folder_changed=changed.append)
+    wait_for(lambda: changed)
+    assert changed == ["folder-2"]
+    assert service.folder_id == "folder-2"
+
+
+def test_expired_token_is_refreshed_in_the_background(fakes, connect):
+    save_token(expired=True)
+    service = connect()
+    wait_for(lambda: saved_token() != "token-1")
+    assert service.creds.valid
+    assert saved_token() == service.creds.token
+    assert fakes.CALLS.count("refresh") == 1
+
+
+def test_worker_credentials_share_the_token(fakes, connect):
+    save_token()
+    service = connect()
+    workers = [service.new_worker_client().service.credentials for _ in range(4)]
+    for creds in workers:
+        headers = {}
+        creds.before_request(None, "GET", "https://example.invalid", headers)
+        assert headers["authorization"] == "Bearer token-1"
+    assert "refresh" not in fakes.CALLS
+
+    # A 401 makes googleapiclient refresh; workers that all got one refresh the shared token once
+    threads = [threading.Thread(target=creds.refresh, args=(None,)) for creds in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fakes.CALLS.count("refresh") == 1
+    assert {creds.token for creds in workers} == {service.creds.token} != {"token-1"}
+
+
+def test_revoked_sign_in_disconnects(fakes, connect):
+    fakes.AUTH["revoked"] = True
+    save_token(expired=True)
+    lost = []
+    service = connect(on_disconnected=lost.append)
+    wait_for(lambda: lost)
+    assert not os.path.exists("token.pickle")
+    with pytest.raises(Exception) as raised:
+        service.get_access_token()
+    assert raised.value is lost[0]
+    assert fakes.CALLS.count("refresh") == 1
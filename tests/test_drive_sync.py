@@ -0,0 +1,98 @@
+import pytest
+
+from study_core import MetadataCache, SyncEngine
+
+FOLDER_TYPE = "application/vnd.google-apps.folder"
+
+
+class RecordingCache:
+    """Stands in for AttachmentCache; records which cached copies were dropped"""
+
+    def __init__(self):
+        self.invalidated = []
+
+    def invalidate(self, file_id, keep_version=None):
+        self.invalidated.append((file_id, keep_version))
+
+
+def file_change(file_id, **resource):
+    return {"changeType": "file", "fileId": file_id, "file": dict(resource, id=file_id)}
+
+
+@pytest.fixture
+def feed():
+    """Changes pages by page token"""
+    return {}
+
+
+@pytest.fixture
+def metadata(db):
+    return MetadataCache(db)
+
+
+@pytest.fixture
+def attachments():
+    return RecordingCache()
+
+
+@pytest.fixture
+def engine(db, metadata, attachments, feed):
+    requested = []
+
+    def list_changes(token):
+        requested.append(token)
+        return feed[token]
+
+    engine = SyncEngine(db, metadata, attachments, get_start_token=lambda: "1",
+                        list_changes=list_changes)
+    engine.requested = requested
+    return engine
+
+
+def test_first_sync_only_records_the_start_token(engine):
+    assert engine.sync_once() == []
+    assert engine.page_token == "1"
+    assert engine.requested == []
+
+
+def test_applies_changes_across_pages(engine, metadata, attachments, feed):
+    engine.sync_once()
+    metadata.put({"id": "renamed-file", "name": "old.pdf", "md5Checksum": "a" * 32})
+    feed["1"] = {"nextPageToken": "2", "changes": [
+        file_change("renamed-file", name="new.pdf", mimeType="application/pdf", size="10",
+                    md5Checksum="b" * 32, modifiedTime="2024-05-01T10:00:00.000Z"),
+        {"changeType": "file", "fileId": "removed-file", "removed": True},
+        file_change("folder", name="StudyMaterialManager", mimeType=FOLDER_TYPE),
+        {"changeType": "drive", "driveId": "shared-drive"},
+    ]}
+    feed["2"] = {"newStartPageToken": "3", "changes": [
+        file_change("trashed-file", name="gone.txt", trashed=True),
+    ]}
+
+    assert engine.sync_once() == ["renamed-file", "removed-file", "trashed-file"]
+    assert engine.page_token == "3"
+    assert metadata.get("renamed-file")["name"] == "new.pdf"
+    assert metadata.get("removed-file")["trashed"] is True
+    assert metadata.get("trashed-file")["trashed"] is True
+    assert metadata.get("folder") is None
+    # Only the copy of the new content is kept; nothing of removed files
+    assert attachments.invalidated[0][0] == "renamed-file"
+    assert attachments.invalidated[0][1] is not None
+    assert attachments.invalidated[1:] == [("removed-file", None), ("trashed-file", None)]
+
+
+def test_interrupted_sync_resumes_from_the_last_page(engine, feed):
+    engine.sync_once()
+    feed["1"] = {"nextPageToken": "2", "changes": [file_change("first", name="a.txt")]}
+    with pytest.raises(KeyError):
+        engine.sync_once()  # page "2" isn't in the feed yet
+    assert engine.page_token == "2"
+
+    feed["2"] = {"newStartPageToken": "3", "changes": [file_change("second", name="b.txt")]}
+    engine.requested.clear()
+    assert engine.sync_once() == ["second"]
+    assert engine.requested == ["2"]
+
+    feed["3"] = {"newStartPageToken": "3", "changes": []}
+    assert engine.sync_once() == []
+    assert engine.page_token == "3"
@@ -0,0 +1,68 @@
+import pytest
+
+from study_core import MetadataCache, TextIndexer
+
+
+@pytest.fixture
+def indexer(db):
+    return TextIndexer(db, MetadataCache(db), workers=1)
+
+
+def index(indexer):
+    """Index pending attachments on this thread instead of the process pool"""
+    pending = indexer.pending()
+    indexer._store([(material_id, md5, open(path).read())
+                    for material_id, path, name, md5 in pending])
+    return len(pending)
+
+
+def matches(db, query):
+    return [row[0] for row in db.search_materials(query)]
+
+
+@pytest.fixture
+def notes(db, indexer, tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("Gaussian elimination")
+    material = db.add_material("Week 1", "", "", str(path))
+    assert index(indexer) == 1
+    assert matches(db, "gaussian") == [material]
+    return material, path
+
+
+def test_unchanged_attachments_are_not_indexed_again(indexer, notes):
+    assert index(indexer) == 0
+
+
+def test_edited_attachment_is_indexed_again(db, indexer, notes):
+    material, path = notes
+    path.write_text("Cramer rule")
+    assert index(indexer) == 1
+    assert matches(db, "gaussian") == []
+    assert matches(db, "cramer") == [material]
+
+
+def test_text_of_an_unsupported_attachment_is_dropped(db, indexer, notes, tmp_path):
+    material, _ = notes
+    video = tmp_path / "lecture.mp4"
+    video.write_bytes(b"\x00")
+    db.update_material(material, "Week 1", "", "", str(video))
+    assert index(indexer) == 0
+    assert matches(db, "gaussian") == []
+
+
+def test_text_of_a_missing_attachment_is_dropped(db, indexer, notes):
+    _, path = notes
+    path.unlink()
+    assert index(indexer) == 0
+    assert matches(db, "gaussian") == []
+
+
+def test_text_of_a_trashed_drive_attachment_is_dropped(db, indexer, notes):
+    material, _ = notes
+    file_id = "drive-file-0001"
+    indexer.metadata_cache.put({"id": file_id, "name": "notes.txt", "md5Checksum": "abc",
+                                "trashed": True})
+    db.update_material(material, "Week 1", "", "", file_id)
+    assert index(indexer) == 0
+    assert matches(db, "gaussian") == []
@@ -0,0 +1,149 @@
+import sqlite3
+import time
+
+import pytest
+
+from study_core import DatabaseManager, SCHEMA_VERSION
+from study_core.database import MIGRATIONS, unpack_content
+
+# Rows as the app stored them before the schema was versioned
+LEGACY_ROWS = [
+    (1, "Linear algebra", "Eigenvalues " * 50, "Math, exams", "", "2023-09-01 08:30",
+     "2023-10-02 17:45"),
+    (2, "Deleted later", "", "", "", "2023-09-02 09:00", "2023-09-02 09:00"),
+    (3, "Short note", "tiny", "math", "notes.pdf", "2023-09-03 10:15", None),
+    (4, "Undated", None, None, None, None, None),
+]
+
+
+def local_epoch(text):
+    return int(time.mktime(time.strptime(text, "%Y-%m-%d %H:%M")))
+
+
+@pytest.fixture
+def legacy_path(tmp_path):
+    """A database from before PRAGMA user_version, with its old external-content FTS index"""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+    CREATE TABLE materials (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        content TEXT,
+        tags TEXT,
+        file_path TEXT,
+        date_added TEXT,
+        last_modified TEXT
+    );
+    CREATE VIRTUAL TABLE materials_fts USING fts5(
+        title, tags, content, content='materials', content_rowid='id'
+    );
+    ''')
+    conn.executemany("INSERT INTO materials VALUES (?, ?, ?, ?, ?, ?, ?)", LEGACY_ROWS)
+    conn.execute("INSERT INTO materials (title) VALUES ('Newest, then deleted')")
+    conn.execute("DELETE FROM materials WHERE id IN (2, 5)")
+    conn.execute("INSERT INTO materials_fts(materials_fts) VALUES ('rebuild')")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def migrate_to(path, version):
+    """Apply MIGRATIONS up to `version` alone, the way DatabaseManager.migrate() does"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    for done in range(conn.execute("PRAGMA user_version").fetchone()[0], version):
+        conn.execute("BEGIN")
+        MIGRATIONS[done](conn)
+        conn.execute(f"PRAGMA user_version = {done + 1}")
+        conn.execute("COMMIT")
+    return conn
+
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def test_fresh_database(tmp_path):
+    db = DatabaseManager(str(tmp_path / "new.db"))
+    assert db.schema_version() == SCHEMA_VERSION
+    assert "content" not in columns(db.conn, "materials")
+    assert db.add_material("First", "text", "", "") == 1
+    db.close()
+
+
+def test_base_schema_keeps_legacy_tables(legacy_path):
+    conn = migrate_to(legacy_path, 1)
+    assert columns(conn, "materials") == [
+        "id", "title", "content", "tags", "file_path", "date_added", "last_modified"]
+    assert "attachment_text" in {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='table'")}
+    assert conn.execute("SELECT COUNT(*) FROM materials").fetchone()[0] == 3
+
+
+def test_integer_timestamps(legacy_path):
+    conn = migrate_to(legacy_path, 2)
+    rows = {row[0]: row[1:] for row in conn.execute(
+        "SELECT id, date_added, last_modified, typeof(date_added) FROM materials")}
+    assert rows[1] == (local_epoch("2023-09-01 08:30"), local_epoch("2023-10-02 17:45"), "integer")
+    # A missing date falls back to the other one, and to 0 without either
+    assert rows[3][:2] == (local_epoch("2023-09-03 10:15"),) * 2
+    assert rows[4][:2] == (0, 0)
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name='materials'").fetchone() == (5,)
+    assert {"idx_materials_last_modified", "idx_materials_date_added"} <= {
+        row[1] for row in conn.execute("PRAGMA index_list(materials)")}
+
+
+def test_compressed_content(legacy_path):
+    conn = migrate_to(legacy_path, 3)
+    assert "content" not in columns(conn, "materials")
+    stored = {row[0]: row[1:] for row in conn.execute(
+        "SELECT material_id, size, codec, data FROM material_content")}
+    assert sorted(stored) == [1, 3]  # no row for empty content
+    assert unpack_content(*stored[1][1:]) == LEGACY_ROWS[0][2]
+    assert len(stored[1][2]) < stored[1][0]  # repetitive text got compressed
+    assert unpack_content(*stored[3][1:]) == "tiny"
+    assert conn.execute("SELECT seq FROM sqlite_sequence WHERE name='materials'").fetchone() == (5,)
+    assert conn.execute(
+        "SELECT name FROM sqlite_master WHERE name='materials_fts'").fetchone() is None
+
+
+def test_opening_a_legacy_database_upgrades_it(legacy_path):
+    db = DatabaseManager(legacy_path)
+    assert db.schema_version() == SCHEMA_VERSION
+    assert db.get_material(1)[2] == LEGACY_ROWS[0][2]
+    assert db.get_material(4)[2] == ""
+    # The search index and tag tables are rebuilt from the migrated rows
+    assert [row[0] for row in db.search_materials("eigenvalues")] == [1]
+    assert db.tag_counts() == [("math", 2), ("exams", 1)]
+    # IDs of deleted materials are not reused
+    assert db.add_material("After upgrade", "", "", "") == 6
+    db.close()
+
+
+def test_newer_schema_is_refused(tmp_path):
+    path = str(tmp_path / "future.db")
+    conn = sqlite3.connect(path)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    conn.close()
+    with pytest.raises(RuntimeError, match="schema version"):
+        DatabaseManager(path)
+
+
+def test_queue_and_metadata_tables_gain_their_columns(legacy_path):
+    conn = migrate_to(legacy_path, 3)
+    # As the upload queue and metadata cache created them before the outbox and sync
+    conn.execute("CREATE TABLE uploads (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                 "material_id INTEGER NOT NULL, local_path TEXT NOT NULL, "
+                 "file_name TEXT NOT NULL, size INTEGER NOT NULL, mtime REAL NOT NULL, "
+                 "session_uri TEXT, bytes_sent INTEGER NOT NULL DEFAULT 0, "
+                 "status TEXT NOT NULL DEFAULT 'pending', error TEXT)")
+    conn.execute("INSERT INTO uploads (material_id, local_path, file_name, size, mtime) "
+                 "VALUES (1, '/notes.pdf', 'notes.pdf', 5, 0)")
+    conn.execute("CREATE TABLE attachment_metadata (file_id TEXT PRIMARY KEY, name TEXT, "
+                 "size INTEGER, mime_type TEXT, md5_checksum TEXT, modified_time TEXT, "
+                 "fetched_at REAL NOT NULL, trashed INTEGER NOT NULL DEFAULT 0)")
+    conn.close()
+    conn = migrate_to(legacy_path, SCHEMA_VERSION)
+    assert conn.execute("SELECT material_id, op, old_file_id FROM uploads").fetchall() == [
+        (1, "upload", None)]
+    assert columns(conn, "attachment_metadata")[-1] == "trashed"
@@ -0,0 +1,134 @@
+import pytest
+
+from study_core import (
+    MetadataCache, RequestExecutor, SYNC_QUEUED, SYNC_SYNCED, TransferScheduler, UploadManager,
+    sync_state
+)
+from study_core.upload_manager import OP_DELETE, OP_UPLOAD
+
+from .util import TransferClient, wait_for
+
+OLD_FILE_ID = "oldDriveFile0001"
+
+
+@pytest.fixture
+def make_file(tmp_path):
+    def make_file(name, data=b"notes"):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return make_file
+
+
+@pytest.fixture
+def outbox(db):
+    return UploadManager(db)
+
+
+def operations(db):
+    return db.reader().execute(
+        "SELECT material_id, op, local_path, old_file_id FROM uploads ORDER BY id"
+    ).fetchall()
+
+
+def test_requeueing_an_unchanged_file_is_a_no_op(db, outbox, make_file):
+    path = make_file("a.txt")
+    material_id = db.add_material("A", "", "", path)
+    assert outbox.enqueue(material_id, path) == outbox.enqueue(material_id, path)
+    assert outbox.pending_count() == 1
+    assert outbox.sync_states() == {material_id: SYNC_QUEUED}
+
+
+def test_newer_attachment_replaces_queued_upload(db, outbox, make_file):
+    first, second = make_file("a.txt"), make_file("b.txt")
+    material_id = db.add_material("A", "", "", first)
+    outbox.enqueue(material_id, first, old_file_id=OLD_FILE_ID)
+    outbox.enqueue(material_id, second)
+    # Still replaces the Drive file the dropped upload was going to replace
+    assert operations(db) == [(material_id, OP_UPLOAD, second, OLD_FILE_ID)]
+
+
+def test_deleting_drops_queued_upload(db, outbox, make_file):
+    path = make_file("a.txt")
+    material_id = db.add_material("A", "", "", path)
+    outbox.enqueue(material_id, path)
+    assert outbox.enqueue_delete(material_id) is None
+    assert operations(db) == []
+
+
+def test_deleting_a_queued_replace_trashes_the_old_file(db, outbox, make_file):
+    path = make_file("a.txt")
+    material_id = db.add_material("A", "", "", path)
+    outbox.enqueue(material_id, path, old_file_id=OLD_FILE_ID)
+    outbox.enqueue_delete(material_id)
+    assert operations(db) == [(material_id, OP_DELETE, "", OLD_FILE_ID)]
+
+
+def test_trash_is_queued_once_per_file(db, outbox):
+    first = db.add_material("A", "", "", OLD_FILE_ID)
+    second = db.add_material("B", "", "", OLD_FILE_ID)
+    assert outbox.enqueue_delete(first, OLD_FILE_ID) == outbox.enqueue_delete(second, OLD_FILE_ID)
+    assert outbox.pending_count() == 1
+
+
+def test_delete_material_removes_row_and_queues_trash(db, outbox):
+    material_id = db.add_material("A", "", "", OLD_FILE_ID)
+    outbox.delete_material(material_id)
+    assert db.get_material(material_id) is None
+    assert operations(db) == [(material_id, OP_DELETE, "", OLD_FILE_ID)]
+
+
+@pytest.fixture
+def running_outbox(db, drive_server):
+    outbox = UploadManager(db, upload_url=drive_server.upload_url,
+                           files_url=drive_server.files_url, metadata_cache=MetadataCache(db))
+    scheduler = TransferScheduler(TransferClient, 2)
+
+    def drained():
+        wait_for(lambda: outbox.pending_count() == 0 and not outbox.in_flight)
+
+    outbox.start(lambda: "token", "folder", scheduler, RequestExecutor(rate=1000, burst=100))
+    outbox.drained = drained
+    yield outbox
+    outbox.close()
+    scheduler.shutdown()
+
+
+def trashed(drive_server, file_id):
+    return bool(drive_server.state.files[file_id]["resource"].get("trashed"))
+
+
+def test_upload_swaps_local_path_for_file_id(db, drive_server, running_outbox, make_file):
+    path = make_file("a.txt", b"A" * 1000)
+    material_id = db.add_material("A", "", "", path)
+    running_outbox.enqueue(material_id, path)
+    running_outbox.drained()
+    file_id = db.get_material(material_id)[4]
+    assert sync_state(file_id) == SYNC_SYNCED
+    assert drive_server.state.files[file_id]["data"] == b"A" * 1000
+
+
+def test_replaced_attachment_is_trashed_after_upload(db, drive_server, running_outbox,
+                                                     make_file):
+    old = drive_server.state.add_file("a.txt", b"old")
+    material_id = db.add_material("A", "", "", old["id"])
+    path = make_file("a2.txt", b"new")
+    db.update_material(material_id, "A", "", "", path)
+    running_outbox.enqueue(material_id, path, old_file_id=old["id"])
+    running_outbox.drained()
+    assert db.get_material(material_id)[4] != old["id"]
+    assert trashed(drive_server, old["id"])
+
+
+def test_file_still_in_use_is_not_trashed(db, drive_server, running_outbox):
+    shared = drive_server.state.add_file("shared.pdf", b"shared")
+    deleted = db.add_material("A", "", "", shared["id"])
+    kept = db.add_material("B", "", "", shared["id"])
+
+    running_outbox.delete_material(deleted)
+    running_outbox.drained()
+    assert not trashed(drive_server, shared["id"])
+
+    running_outbox.delete_material(kept)
+    running_outbox.drained()
+    assert trashed(drive_server, shared["id"])
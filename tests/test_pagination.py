@@ -0,0 +1,74 @@
+import pytest
+
+from study_core import MATERIAL_COLUMNS
+
+BASE_TIME = 1_700_000_000
+
+
+@pytest.fixture
+def materials(db):
+    """25 materials; several share a last_modified, so the id breaks ties"""
+    return db.insert_materials([
+        (f"Chapter {n}", "review " * (n % 4 + 1), "even" if n % 2 == 0 else "odd", "",
+         BASE_TIME, BASE_TIME + n // 3)
+        for n in range(25)
+    ])
+
+
+def all_pages(db, limit, **kwargs):
+    rows, cursor, pages = [], None, 0
+    while True:
+        page, cursor = db.page_materials(after=cursor, limit=limit, **kwargs)
+        rows.extend(page)
+        pages += 1
+        if cursor is None:
+            return rows, pages
+
+
+@pytest.mark.parametrize("limit", [1, 7, 10, 25, 100])
+def test_pages_follow_newest_first(db, materials, limit):
+    rows, pages = all_pages(db, limit)
+    ids = [row[0] for row in rows]
+    expected = sorted(materials,
+                      key=lambda material_id: (BASE_TIME + (material_id - materials[0]) // 3,
+                                               material_id),
+                      reverse=True)
+    assert ids == expected
+    assert pages == len(materials) // limit + 1
+
+
+def test_ranked_pages_match_unpaged_results(db, materials):
+    unpaged = [row[0] for row in db.search_materials("review")]
+    assert len(unpaged) == len(materials)
+    rows, _ = all_pages(db, 4, query="review")
+    assert [row[0] for row in rows] == unpaged
+
+
+def test_offset_without_cursor(db, materials):
+    everything, _ = db.page_materials(limit=None)
+    page, cursor = db.page_materials(limit=5, offset=10)
+    assert page == everything[10:15]
+    # The cursor continues after the page that offset selected
+    assert db.page_materials(after=cursor, limit=5)[0] == everything[15:20]
+
+
+def test_columns(db, materials):
+    page, _ = db.page_materials(limit=1, columns=MATERIAL_COLUMNS)
+    assert len(page[0]) == len(MATERIAL_COLUMNS)
+    assert page[0][2].startswith("review")
+    with pytest.raises(ValueError):
+        db.page_materials(columns=("id", "password"))
+
+
+def test_locate_matches_page_positions(db, materials):
+    everything, _ = db.page_materials(limit=None)
+    wanted = materials[::4]
+    located = db.locate_materials(wanted)
+    assert [(position, row) for position, row in located] == sorted(
+        (everything.index(row), row) for row in everything if row[0] in wanted)
+
+
+def test_tag_filter_pages(db, materials):
+    rows, _ = all_pages(db, 3, tags=["even"])
+    assert [row[2] for row in rows] == ["even"] * 13
+    assert len({row[0] for row in rows}) == 13
@@ -0,0 +1,149 @@
+import email.utils
+import time
+
+import pytest
+
+from study_core import RequestExecutor, RetryableError, UploadError
+from study_core import request_executor
+from study_core.request_executor import classify, is_retryable_status, parse_retry_after
+
+
+class Response(dict):
+    """httplib2-style response: a dict of headers with a status"""
+
+    def __init__(self, status, headers=None):
+        super().__init__(headers or {})
+        self.status = status
+
+
+class HttpError(Exception):
+    def __init__(self, status, headers=None, content=b""):
+        super().__init__(f"HTTP {status}")
+        self.resp = Response(status, headers)
+        self.content = content
+
+
+def executor(rate=1000, burst=100, sleep=lambda seconds: None, **kwargs):
+    """A RequestExecutor that doesn't rate limit or sleep between retries"""
+    return RequestExecutor(rate=rate, burst=burst, sleep=sleep, **kwargs)
+
+
+def failing(errors, result="done"):
+    """fn() that raises each of `errors` in turn, then returns `result`"""
+    errors = list(errors)
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+
+    fn.calls = calls
+    return fn
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    later = email.utils.formatdate(time.time() + 60, usegmt=True)
+    assert 55 < parse_retry_after(later) <= 60
+
+
+@pytest.mark.parametrize("status, body, retryable", [
+    (429, b"", True),
+    (500, b"", True),
+    (503, b"", True),
+    (403, b'{"reason": "userRateLimitExceeded"}', True),
+    (403, b'{"reason": "insufficientPermissions"}', False),
+    (404, b"", False),
+    (400, b"", False),
+])
+def test_retryable_statuses(status, body, retryable):
+    assert is_retryable_status(status, body) is retryable
+
+
+@pytest.mark.parametrize("error, expected", [
+    (RetryableError("HTTP 503", retry_after=3.0), (True, 3.0)),
+    (HttpError(429, {"retry-after": "7"}), (True, 7.0)),
+    (HttpError(403, content=b"rateLimitExceeded"), (True, None)),
+    (HttpError(404), (False, None)),
+    (UploadError(503, "Backend Error", retry_after=2.0), (True, 2.0)),
+    (UploadError(400, "Bad Request"), (False, None)),
+    (ConnectionResetError(), (True, None)),
+    (TimeoutError(), (True, None)),
+    (ValueError("bad"), (False, None)),
+])
+def test_classify(error, expected):
+    assert classify(error) == expected
+
+
+def test_backoff_is_capped_exponential(monkeypatch):
+    monkeypatch.setattr(request_executor.random, "uniform", lambda low, high: high)
+    limited = executor(base_delay=0.5, max_delay=4.0)
+    assert [limited.backoff(attempt) for attempt in range(6)] == [0.5, 1.0, 2.0, 4.0, 4.0, 4.0]
+
+
+def test_retries_transient_errors():
+    sleeps = []
+    fn = failing([ConnectionResetError(), UploadError(503, "Backend Error")])
+    limited = executor(sleep=sleeps.append)
+    assert limited.call("files.get", fn) == "done"
+    assert len(fn.calls) == 3
+    assert len(sleeps) == 2
+    assert limited.stats()["files.get"]["retries"] == 2
+    assert limited.stats()["files.get"]["errors"] == 0
+
+
+def test_permanent_errors_are_not_retried():
+    fn = failing([UploadError(404, "File not found")])
+    limited = executor()
+    with pytest.raises(UploadError):
+        limited.call("files.get", fn)
+    assert len(fn.calls) == 1
+    assert limited.stats()["files.get"]["errors"] == 1
+
+
+def test_gives_up_after_attempts():
+    fn = failing([UploadError(503, "Backend Error")] * 5)
+    with pytest.raises(UploadError):
+        executor(attempts=3).call("files.get", fn)
+    assert len(fn.calls) == 3
+
+
+def test_retry_after_holds_back_the_next_attempt():
+    limited = executor()
+    start = time.monotonic()
+    limited.call("files.list", failing([RetryableError("HTTP 429", retry_after=0.2)]))
+    assert time.monotonic() - start >= 0.2
+    assert limited.stats()["files.list"]["throttled_s"] >= 0.2
+
+
+class ScriptedClient:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.headers = []
+
+    def request(self, method, url, body=None, headers=None):
+        self.headers.append(headers)
+        return self.responses.pop(0)
+
+
+def test_request_retries_retryable_statuses_with_fresh_headers():
+    client = ScriptedClient((503, {}, b""), (200, {}, b"ok"))
+    tokens = iter(["token-1", "token-2"])
+    status, _, data = executor().request(
+        "files.get", client, "GET", "https://example.invalid/files/1",
+        headers=lambda: {"Authorization": f"Bearer {next(tokens)}"})
+    assert (status, data) == (200, b"ok")
+    assert [headers["Authorization"] for headers in client.headers] == [
+        "Bearer token-1", "Bearer token-2"]
+
+
+def test_request_returns_last_response_when_attempts_run_out():
+    client = ScriptedClient((503, {}, b"busy"), (503, {}, b"still busy"))
+    response = executor(attempts=2).request("files.get", client, "GET",
+                                            "https://example.invalid/files/1")
+    assert response == (503, {}, b"still busy")
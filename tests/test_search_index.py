@@ -0,0 +1,122 @@
+import random
+import sqlite3
+
+import pytest
+
+
+def index_entries(db):
+    """Every (term, rowid, column, offset) in materials_fts"""
+    conn = db.reader()
+    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.materials_terms "
+                 "USING fts5vocab(main, materials_fts, instance)")
+    return sorted(conn.execute("SELECT term, doc, col, offset FROM temp.materials_terms"))
+
+
+def titles(db, query, **kwargs):
+    return sorted(row[1] for row in db.search_materials(query, **kwargs))
+
+
+@pytest.fixture
+def materials(db):
+    return [
+        db.add_material("Linear algebra", "Eigenvalues and eigenvectors", "math, exams", ""),
+        db.add_material("Organic chemistry", "Reaction mechanisms of alkenes", "chemistry", ""),
+        db.add_material("Café notes", "", "", ""),
+    ]
+
+
+def test_index_follows_writes(db, materials):
+    rng = random.Random(7)
+    words = ["matrix", "vector", "enzyme", "protein", "résumé", "history", "Ångström"]
+    ids = list(materials)
+    for _ in range(60):
+        action = rng.random()
+        text = " ".join(rng.choices(words, k=rng.randint(0, 4)))
+        if action < 0.3 or not ids:
+            ids.append(db.add_material(f"Note {rng.choice(words)}", text, rng.choice(words), ""))
+        elif action < 0.8:
+            material_id = rng.choice(ids)
+            current = db.get_material(material_id)
+            # Sometimes an unchanged save, which must leave the index as it is
+            content = text if rng.random() < 0.7 else current[2]
+            db.update_material(material_id, current[1], content, current[3], current[4])
+        else:
+            db.delete_material(ids.pop(rng.randrange(len(ids))))
+
+    entries = index_entries(db)
+    db.rebuild_search_index()
+    assert entries == index_entries(db)
+
+
+def test_updating_a_deleted_material_writes_nothing(db, materials):
+    changes = []
+    db.on_change = lambda kind, ids: changes.append(kind)
+    db.delete_material(materials[0])
+    db.update_material(materials[0], "Linear algebra", "Determinants", "math", "")
+    assert changes == ["deleted"]
+    assert titles(db, "determinants") == []
+    assert db.reader().execute("SELECT COUNT(*) FROM material_content WHERE material_id=?",
+                               (materials[0],)).fetchone() == (0,)
+    assert db.tag_counts(names=["math"]) == []
+
+
+def test_search_sees_updates_and_deletes(db, materials):
+    algebra, chemistry, _ = materials
+    assert titles(db, "eigen") == ["Linear algebra"]
+    db.update_material(algebra, "Linear algebra", "Determinants", "math", "")
+    assert titles(db, "eigen") == []
+    assert titles(db, "determinants") == ["Linear algebra"]
+    assert titles(db, "exams") == []
+    db.delete_material(chemistry)
+    assert titles(db, "alkenes") == []
+    assert titles(db, "cafe") == ["Café notes"]
+
+
+def test_title_matches_rank_first(db):
+    in_content = db.add_material("Week 1", "Notes on entropy", "", "")
+    in_title = db.add_material("Entropy", "", "", "")
+    assert db.is_ranked("entr")
+    assert [row[0] for row in db.search_materials("entr")] == [in_title, in_content]
+
+
+def test_punctuation_only_query_matches_nothing(db, materials):
+    assert db.search_materials("*") == []
+    assert db.count_materials('"-') == 0
+    assert len(db.search_materials("")) == 3
+
+
+def test_like_fallback_without_fts(db, materials):
+    db.fts_enabled = False
+    assert titles(db, "MECHANISMS") == ["Organic chemistry"]
+    assert titles(db, "exam") == ["Linear algebra"]
+
+
+def test_rebuild_after_outside_changes(db, materials):
+    outside = sqlite3.connect(db.db_name)
+    outside.execute("UPDATE materials SET title='Thermodynamics' WHERE id=?", (materials[1],))
+    outside.commit()
+    outside.close()
+    assert titles(db, "thermodynamics") == []
+    db.rebuild_search_index()
+    assert titles(db, "thermodynamics") == ["Thermodynamics"]
+    assert titles(db, "organic") == []
+
+
+def test_attachment_text_triggers(db, materials):
+    algebra = materials[0]
+    with db.transaction() as conn:
+        conn.execute("INSERT INTO attachment_text (material_id, source_md5, text, extracted_at) "
+                     "VALUES (?, 'md5', 'Gaussian elimination worksheet', 'now')", (algebra,))
+    assert titles(db, "gaussian") == ["Linear algebra"]
+    assert "\x02Gaussian\x03" in db.attachment_snippet(algebra, "gaussian")
+
+    with db.transaction() as conn:
+        conn.execute("UPDATE attachment_text SET text='Cramer rule' WHERE material_id=?",
+                     (algebra,))
+    assert titles(db, "gaussian") == []
+    assert titles(db, "cramer") == ["Linear algebra"]
+
+    db.delete_material(algebra)
+    assert titles(db, "cramer") == []
+
+
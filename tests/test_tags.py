@@ -0,0 +1,43 @@
+import pytest
+
+
+def titles(db, **kwargs):
+    return sorted(row[1] for row in db.search_materials(**kwargs))
+
+
+@pytest.fixture
+def materials(db):
+    return [
+        db.add_material("Neural networks", "", "ML, Exams", ""),
+        db.add_material("Web basics", "", "html", ""),
+        db.add_material("Regression", "", "ml", ""),
+    ]
+
+
+def test_tags_are_counted_and_normalized(db, materials):
+    assert db.tag_counts() == [("ml", 2), ("exams", 1), ("html", 1)]
+    assert db.tag_counts(names=["html", "missing"]) == [("html", 1)]
+
+
+def test_counts_follow_edits_and_deletes(db, materials):
+    networks, _, regression = materials
+    db.update_material(networks, "Neural networks", "", "", "")
+    db.delete_material(regression)
+    assert db.tag_counts() == [("html", 1)]
+
+
+def test_completion_by_prefix(db, materials):
+    assert db.complete_tags("E") == [("exams", 1)]
+    assert db.complete_tags(" m") == [("ml", 2)]
+    assert db.complete_tags("") == db.tag_counts(10)
+
+
+def test_tag_filters_are_exact(db, materials):
+    assert titles(db, tags=["ml"]) == ["Neural networks", "Regression"]
+    assert titles(db, tags=["ML", "exams"]) == ["Neural networks"]
+    assert db.count_materials(tags=["ml", "html"]) == 0
+
+
+def test_match_any(db, materials):
+    assert titles(db, tags=["html", "exams"], match_any=True) == ["Neural networks", "Web basics"]
+    assert db.count_materials(tags=["html", "exams"], match_any=True) == 2
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from study_core import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, TransferCancelled
+from study_core import TransferScheduler
+from study_core.transfer_scheduler import THROUGHPUT_SECONDS
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = TransferScheduler(object, workers=1)
+    yield scheduler
+    scheduler.shutdown()
+
+
+def blocker(scheduler):
+    """Occupy the only worker until the returned event is set"""
+    release = threading.Event()
+    scheduler.submit("upload", "blocker", lambda client, transfer: release.wait(5))
+    return release
+
+
+def test_interactive_transfers_jump_the_queue(scheduler):
+    release = blocker(scheduler)
+    order = []
+    background = [scheduler.submit("upload", f"up{n}", lambda c, t, n=n: order.append(f"up{n}"))
+                  for n in range(3)]
+    opened = scheduler.submit("download", "open", lambda c, t: order.append("open"),
+                              PRIORITY_INTERACTIVE)
+    release.set()
+    for transfer in background + [opened]:
+        transfer.wait(5)
+    assert order == ["open", "up0", "up1", "up2"]
+
+
+def test_cancelled_transfer_never_runs(scheduler):
+    release = blocker(scheduler)
+    ran = []
+    transfer = scheduler.submit("upload", "later", lambda c, t: ran.append(1),
+                                PRIORITY_BACKGROUND)
+    transfer.cancel()
+    release.set()
+    with pytest.raises(TransferCancelled):
+        transfer.wait(5)
+    assert ran == []
+    assert scheduler.stats()["cancelled"] == 1
+
+
+def test_progress_samples_stay_bounded(scheduler):
+    def work(client, transfer):
+        for done in range(1, 10001):
+            transfer.update(done, 10000)
+
+    scheduler.submit("download", "big", work).wait(5)
+    stats = scheduler.stats()
+    assert stats["bytes_total"] == 10000
+    assert stats["recent_throughput_bps"] == 10000 / 5
+    assert len(scheduler.samples) <= THROUGHPUT_SECONDS
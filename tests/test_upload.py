@@ -0,0 +1,98 @@
+import os
+
+import pytest
+
+from study_core import HttpClient, RequestExecutor, ResumableUpload
+from study_core.upload_manager import CHUNK_GRANULARITY, SessionExpired
+
+DATA = os.urandom(CHUNK_GRANULARITY * 2 + 1000)
+
+
+@pytest.fixture
+def local_file(tmp_path):
+    path = tmp_path / "notes.bin"
+    path.write_bytes(DATA)
+    return str(path)
+
+
+def new_upload(server, local_file, http=None, **kwargs):
+    return ResumableUpload(http or HttpClient(), lambda: "token", local_file,
+                           {"name": "notes.bin"}, chunk_size=CHUNK_GRANULARITY,
+                           upload_url=server.upload_url, **kwargs)
+
+
+def stored(server, resource):
+    return server.state.files[resource["id"]]["data"]
+
+
+class DroppingHttp(HttpClient):
+    """Loses the connection on the `drop_at`th chunk PUT, before or after the server got it"""
+
+    def __init__(self, drop_at: int, delivered: bool):
+        super().__init__()
+        self.drop_at = drop_at
+        self.delivered = delivered
+        self.chunks = 0
+        self.status_queries = 0
+
+    def request(self, method, url, body=None, headers=None):
+        if method == "PUT" and body:
+            self.chunks += 1
+            if self.chunks == self.drop_at:
+                if self.delivered:
+                    super().request(method, url, body, headers)
+                raise ConnectionResetError("connection lost")
+        elif method == "PUT":
+            self.status_queries += 1
+        return super().request(method, url, body, headers)
+
+
+def test_uploads_in_chunks(drive_server, local_file):
+    offsets = []
+    resource = new_upload(drive_server, local_file).run(
+        on_chunk=lambda offset, uri: offsets.append(offset))
+    assert stored(drive_server, resource) == DATA
+    assert offsets == [0, CHUNK_GRANULARITY, CHUNK_GRANULARITY * 2]
+
+
+def test_resumes_from_offset_the_session_reports(drive_server, local_file):
+    first = new_upload(drive_server, local_file)
+    uri = first.start()
+    assert first.send_chunk(0) == (CHUNK_GRANULARITY, None)
+
+    offsets = []
+    resumed = new_upload(drive_server, local_file, session_uri=uri)
+    # The offset passed in is only a hint; the session's own count wins
+    resource = resumed.run(0, lambda offset, uri: offsets.append(offset))
+    assert offsets[0] == CHUNK_GRANULARITY
+    assert stored(drive_server, resource) == DATA
+
+
+def test_expired_session_raises(drive_server, local_file):
+    upload = new_upload(drive_server, local_file,
+                        session_uri=f"{drive_server.base_url}/upload/session/gone")
+    with pytest.raises(SessionExpired):
+        upload.run()
+
+
+@pytest.mark.parametrize("delivered", [False, True])
+def test_failed_chunk_resent_from_resynced_offset(drive_server, local_file, delivered):
+    http = DroppingHttp(drop_at=2, delivered=delivered)
+    executor = RequestExecutor(rate=1000, burst=100, base_delay=0)
+    resource = new_upload(drive_server, local_file, http=http, executor=executor).run()
+    # Whether or not the lost chunk arrived, asking the session avoids gaps and duplicates
+    assert stored(drive_server, resource) == DATA
+    assert http.status_queries == 1
+    assert executor.stats()["upload.chunk"]["retries"] == 1
+
+
+def test_client_recovers_after_a_timeout(drive_server):
+    resource = drive_server.state.add_file("notes.txt", b"notes")
+    url = f"{drive_server.files_url}/{resource['id']}"
+    http = HttpClient(timeout=0.2)
+    drive_server.latency = 0.5
+    with pytest.raises(TimeoutError):
+        http.request("GET", url)
+    drive_server.latency = 0
+    # A fresh connection, not the one left waiting for the slow response
+    assert http.request("GET", url)[0] == 200
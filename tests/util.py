@@ -0,0 +1,19 @@
+import time
+
+from study_core import HttpClient
+
+
+class TransferClient:
+    """A TransferScheduler worker client with just the HttpClient the outbox needs"""
+
+    def __init__(self):
+        self.http = HttpClient()
+
+
+def wait_for(condition, timeout: float = 10.0, interval: float = 0.02):
+    """Poll until condition() is true; fails the test after `timeout` seconds"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError(f"timed out waiting for {condition}")
+        time.sleep(interval)